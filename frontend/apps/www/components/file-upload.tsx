@@ -27,6 +27,17 @@ interface FileUploadProps {
 
 type UploadStep = "select" | "uploading" | "description" | "complete"
 
+interface IngestionJobStatus {
+  job_id: string
+  status: "queued" | "running" | "completed" | "failed"
+  pages_parsed: number
+  total_pages: number
+  chunks_indexed: number
+  error?: string | null
+}
+
+const JOB_POLL_INTERVAL_MS = 1000
+
 export function FileUpload({ onFileUpload, children }: FileUploadProps) {
   const [isOpen, setIsOpen] = useState(false)
   const [step, setStep] = useState<UploadStep>("select")
@@ -37,8 +48,15 @@ export function FileUpload({ onFileUpload, children }: FileUploadProps) {
     sourceId: string
     filename: string
   } | null>(null)
-  const [chunkingMode, setChunkingMode] = useState<"whole" | "pages">("whole") // Default: no chunking
+  const [chunkingMode, setChunkingMode] = useState<
+    "passages" | "whole" | "pages"
+  >("passages") // Default: overlapping passages
+  const [jobProgress, setJobProgress] = useState<IngestionJobStatus | null>(
+    null
+  )
   const fileInputRef = useRef<HTMLInputElement>(null)
+  // Bumped whenever the dialog resets, so a running poll knows to stop
+  const pollIdRef = useRef(0)
 
   const supportedTypes = [".txt", ".md", ".html", ".htm", ".pdf"]
 
@@ -48,7 +66,9 @@ export function FileUpload({ onFileUpload, children }: FileUploadProps) {
     setDescription("")
     setError(null)
     setUploadResult(null)
-    setChunkingMode("whole") // Reset to default
+    setJobProgress(null)
+    setChunkingMode("passages") // Reset to default
+    pollIdRef.current += 1
     if (fileInputRef.current) {
       fileInputRef.current.value = ""
     }
@@ -87,9 +107,45 @@ export function FileUpload({ onFileUpload, children }: FileUploadProps) {
     }
   }
 
+  // Poll the background ingestion job until it completes or fails.
+  // Returns false when the dialog was reset in the meantime.
+  const waitForIngestionJob = async (jobId: string): Promise<boolean> => {
+    const pollId = pollIdRef.current
+    while (pollId === pollIdRef.current) {
+      const response = await fetch(
+        "http://localhost:4000/get_ingestion_job_status",
+        {
+          method: "POST",
+          headers: {
+            "Content-Type": "application/json",
+          },
+          body: JSON.stringify({ job_id: jobId }),
+        }
+      )
+
+      if (!response.ok) {
+        const errorData = await response.json()
+        throw new Error(errorData.detail || "Failed to get indexing progress")
+      }
+
+      const job: IngestionJobStatus = await response.json()
+      if (pollId !== pollIdRef.current) break
+      setJobProgress(job)
+
+      if (job.status === "completed") return true
+      if (job.status === "failed") {
+        throw new Error(job.error || "Indexing failed")
+      }
+
+      await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS))
+    }
+    return false
+  }
+
   const uploadFile = async (fileToUpload: File) => {
     setStep("uploading")
     setError(null)
+    setJobProgress(null)
 
     try {
       const formData = new FormData()
@@ -97,8 +153,10 @@ export function FileUpload({ onFileUpload, children }: FileUploadProps) {
 
       // Add chunking parameter for PDF files
       if (fileToUpload.name.toLowerCase().endsWith(".pdf")) {
-        const pagesPerChunk = chunkingMode === "whole" ? "-1" : "1"
-        formData.append("pages_per_chunk", pagesPerChunk)
+        if (chunkingMode !== "passages") {
+          const pagesPerChunk = chunkingMode === "whole" ? "-1" : "1"
+          formData.append("pages_per_chunk", pagesPerChunk)
+        }
       }
 
       const response = await fetch("http://localhost:4000/upload_file_to_rag", {
@@ -112,6 +170,12 @@ export function FileUpload({ onFileUpload, children }: FileUploadProps) {
       }
 
       const result = await response.json()
+
+      // The file is indexed in the background: wait until it is searchable
+      if (result.job_id && !(await waitForIngestionJob(result.job_id))) {
+        return
+      }
+
       setUploadResult({
         sourceId: result.source_id,
         filename: result.filename,
@@ -233,6 +297,26 @@ export function FileUpload({ onFileUpload, children }: FileUploadProps) {
                   PDF Processing Options
                 </div>
                 <div className="space-y-2">
+                  <label className="flex cursor-pointer items-center space-x-2">
+                    <input
+                      type="radio"
+                      name="chunking"
+                      value="passages"
+                      checked={chunkingMode === "passages"}
+                      onChange={(e) =>
+                        setChunkingMode(
+                          e.target.value as "passages" | "whole" | "pages"
+                        )
+                      }
+                      className="h-4 w-4"
+                    />
+                    <div className="flex-1">
+                      <div className="text-sm font-medium">Passages</div>
+                      <div className="text-xs text-muted-foreground">
+                        Split into short overlapping passages (recommended)
+                      </div>
+                    </div>
+                  </label>
                   <label className="flex cursor-pointer items-center space-x-2">
                     <input
                       type="radio"
@@ -240,14 +324,16 @@ export function FileUpload({ onFileUpload, children }: FileUploadProps) {
                       value="whole"
                       checked={chunkingMode === "whole"}
                       onChange={(e) =>
-                        setChunkingMode(e.target.value as "whole" | "pages")
+                        setChunkingMode(
+                          e.target.value as "passages" | "whole" | "pages"
+                        )
                       }
                       className="h-4 w-4"
                     />
                     <div className="flex-1">
                       <div className="text-sm font-medium">Whole document</div>
                       <div className="text-xs text-muted-foreground">
-                        Process entire PDF as one chunk (recommended)
+                        Process entire PDF as one chunk
                       </div>
                     </div>
                   </label>
@@ -258,7 +344,9 @@ export function FileUpload({ onFileUpload, children }: FileUploadProps) {
                       value="pages"
                       checked={chunkingMode === "pages"}
                       onChange={(e) =>
-                        setChunkingMode(e.target.value as "whole" | "pages")
+                        setChunkingMode(
+                          e.target.value as "passages" | "whole" | "pages"
+                        )
                       }
                       className="h-4 w-4"
                     />
@@ -298,9 +386,20 @@ export function FileUpload({ onFileUpload, children }: FileUploadProps) {
               <span className="text-sm font-medium">
                 {uploadResult
                   ? "Updating description..."
-                  : "Uploading and indexing file..."}
+                  : jobProgress
+                  ? "Indexing file..."
+                  : "Uploading file..."}
               </span>
             </div>
+            {!uploadResult && jobProgress && (
+              <div className="text-xs text-muted-foreground">
+                {jobProgress.status === "queued"
+                  ? "Waiting for an indexing worker"
+                  : jobProgress.total_pages > 0
+                  ? `${jobProgress.pages_parsed} of ${jobProgress.total_pages} pages parsed, ${jobProgress.chunks_indexed} chunks indexed`
+                  : `${jobProgress.chunks_indexed} chunks indexed`}
+              </div>
+            )}
             {file && (
               <div className="flex items-center gap-2 text-sm text-muted-foreground">
                 <FileText className="h-4 w-4" />
@@ -0,0 +1,105 @@
+"""
+Benchmark BM25LocalDB ingestion of raw text with the regex Analyzer against NLTK.
+
+Chunks are synthetic prose: Zipf-distributed words (with English stopwords
+among the most frequent ones), capitalised sentence starts and punctuation.
+Each chunk is tokenized and indexed, as when a RAG source ingests documents.
+The script reports chunks/s for:
+
+* nltk: `word_tokenize` + NLTK stopword filtering, the previous tokenizer
+* analyzer: the default Analyzer (regex, lowercase, stopwords)
+* analyzer+stem: the Analyzer with Porter stemming
+
+The NLTK run needs the punkt_tab and stopwords data to be installed.
+
+Usage:
+    python analyzer_benchmark.py --chunks 100000
+"""
+
+import argparse
+import logging
+import time
+from typing import Callable, List
+
+import numpy as np
+
+from yaaaf.components.retrievers.analyzer import ENGLISH_STOPWORDS, Analyzer
+from yaaaf.components.retrievers.local_vector_db import BM25LocalDB
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+_SYLLABLES = ["ka", "lo", "mer", "tin", "sa", "vo", "ren", "di", "qua", "pel", "ost", "ing", "ed", "ers"]
+
+
+def make_vocabulary(size: int, rng: np.random.Generator) -> List[str]:
+    stopwords = sorted(ENGLISH_STOPWORDS)
+    words = []
+    while len(words) < size:
+        words.append("".join(rng.choice(_SYLLABLES, int(rng.integers(2, 5)))))
+    # Stopwords are the most frequent words of real text
+    return stopwords + words
+
+
+def make_chunks(count: int, length: int, vocabulary: List[str], rng: np.random.Generator) -> List[str]:
+    chunks = []
+    for _ in range(count):
+        word_ids = (rng.zipf(1.3, length) - 1) % len(vocabulary)
+        sentences = []
+        for start in range(0, length, 15):
+            words = [vocabulary[i] for i in word_ids[start : start + 15]]
+            words[0] = words[0].capitalize()
+            sentences.append(" ".join(words) + rng.choice([".", "!", "?", ";"]))
+        chunks.append(" ".join(sentences))
+    return chunks
+
+
+def time_ingestion(chunks: List[str], tokenize: Callable[[str], List[str]]) -> float:
+    db = BM25LocalDB()
+    started = time.perf_counter()
+    for index, chunk in enumerate(chunks):
+        db.add_tokens_and_index(tokenize(chunk), str(index))
+    db.build()
+    return time.perf_counter() - started
+
+
+def nltk_tokenizer() -> Callable[[str], List[str]]:
+    from nltk.corpus import stopwords
+    from nltk.tokenize import word_tokenize
+
+    english = set(stopwords.words("english"))
+    return lambda text: [token for token in word_tokenize(text) if token not in english]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark BM25 text analysis during ingestion")
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--chunk-length", type=int, default=120, help="Words per chunk")
+    parser.add_argument("--vocabulary", type=int, default=50_000)
+    parser.add_argument("--skip-nltk", action="store_true", help="Do not run the NLTK baseline")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    vocabulary = make_vocabulary(args.vocabulary, rng)
+    logger.info(f"Generating {args.chunks} chunks")
+    chunks = make_chunks(args.chunks, args.chunk_length, vocabulary, rng)
+
+    runs = [("analyzer", Analyzer().analyze), ("analyzer+stem", Analyzer(stem=True).analyze)]
+    if not args.skip_nltk:
+        runs.insert(0, ("nltk", nltk_tokenizer()))
+
+    results = []
+    for name, tokenize in runs:
+        logger.info(f"Ingesting with {name}")
+        results.append((name, time_ingestion(chunks, tokenize)))
+
+    baseline = results[0][1]
+    print()
+    print(f"{'tokenizer':>15}{'ingest':>10}{'chunks/s':>12}{'speed-up':>10}")
+    for name, seconds in results:
+        print(f"{name:>15}{seconds:>9.1f}s{args.chunks / seconds:>12.0f}{baseline / seconds:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
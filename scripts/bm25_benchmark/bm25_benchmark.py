@@ -0,0 +1,142 @@
+"""
+Benchmark BM25LocalDB ingestion and query latency on synthetic corpora.
+
+Chunks are drawn from a Zipf-distributed vocabulary, so a few terms appear in
+most chunks and most terms are rare, as in real text. For each corpus size
+the script reports:
+
+* ingestion time (tokens are passed pre-tokenized, so the tokenizer is not measured)
+* the one-off matrix compilation that the first query triggers
+* p50/p95 query latency over random multi-term queries
+* optionally the same queries against rank_bm25's BM25Okapi (the previous
+  implementation: dense scoring of every chunk plus a full sort)
+
+Usage:
+    python bm25_benchmark.py --sizes 10000 100000 1000000
+    python bm25_benchmark.py --sizes 10000 100000 --compare-up-to 100000
+"""
+
+import argparse
+import logging
+import math
+import time
+from typing import Iterator, List
+
+import numpy as np
+
+from yaaaf.components.retrievers.local_vector_db import BM25LocalDB
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+class Corpus:
+    """Synthetic chunks generated on demand, so a million chunks fit in memory."""
+
+    def __init__(self, size: int, vocabulary: int, mean_length: int, rng: np.random.Generator):
+        lengths = np.maximum(5, rng.poisson(mean_length, size))
+        self._offsets = np.concatenate([[0], np.cumsum(lengths)])
+        self._term_ids = ((rng.zipf(1.2, int(lengths.sum())) - 1) % vocabulary).astype(np.int32)
+        self._words = [f"w{i}" for i in range(vocabulary)]
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __iter__(self) -> Iterator[List[str]]:
+        words = self._words
+        for i in range(len(self)):
+            yield [words[term_id] for term_id in self._term_ids[self._offsets[i] : self._offsets[i + 1]].tolist()]
+
+
+def make_queries(count: int, vocabulary: int, rng: np.random.Generator) -> List[str]:
+    queries = []
+    for _ in range(count):
+        # Mix frequent and rare terms, like a natural-language question
+        terms = (rng.zipf(1.2, int(rng.integers(2, 6))) - 1) % vocabulary
+        queries.append(" ".join(f"w{term}" for term in terms))
+    return queries
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(fraction * len(ordered))) - 1]
+
+
+def time_queries(search, queries: List[str]) -> List[float]:
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        search(query)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def benchmark(size: int, args, rng: np.random.Generator) -> dict:
+    corpus = Corpus(size, args.vocabulary, args.chunk_length, rng)
+    queries = make_queries(args.queries, args.vocabulary, rng)
+
+    db = BM25LocalDB()
+    db._tokenize = str.split  # queries are whitespace separated, like the corpus
+    started = time.perf_counter()
+    for index, tokens in enumerate(corpus):
+        db.add_tokens_and_index(tokens, str(index))
+    ingest_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    db.build()
+    compile_seconds = time.perf_counter() - started
+
+    latencies = time_queries(lambda query: db.get_indices_from_text(query, args.topn), queries)
+    result = {
+        "size": size,
+        "ingest_seconds": ingest_seconds,
+        "compile_seconds": compile_seconds,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "okapi_p50": None,
+    }
+
+    if size <= args.compare_up_to:
+        from rank_bm25 import BM25Okapi
+
+        okapi = BM25Okapi(list(corpus))
+
+        def okapi_search(query):
+            scores = okapi.get_scores(query.split())
+            return np.argsort(scores)[::-1][: args.topn]
+
+        result["okapi_p50"] = percentile(time_queries(okapi_search, queries), 0.50)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark BM25LocalDB on synthetic corpora")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--chunk-length", type=int, default=120, help="Mean tokens per chunk")
+    parser.add_argument("--vocabulary", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--topn", type=int, default=10)
+    parser.add_argument("--compare-up-to", type=int, default=100_000, help="Largest size also run through rank_bm25 (0 = never)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    results = []
+    for size in args.sizes:
+        logger.info(f"Benchmarking {size} chunks")
+        results.append(benchmark(size, args, rng))
+
+    def ms(value):
+        return "n/a" if value is None else f"{value * 1000:.1f}ms"
+
+    print()
+    print(f"{'chunks':>10}{'ingest':>10}{'compile':>10}{'query p50':>12}{'query p95':>12}{'okapi p50':>12}")
+    for result in results:
+        print(
+            f"{result['size']:>10}{result['ingest_seconds']:>9.1f}s{result['compile_seconds']:>9.2f}s"
+            f"{ms(result['p50']):>12}{ms(result['p95']):>12}{ms(result['okapi_p50']):>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+A local stand-in for Ollama and vLLM used by the load-testing harness.
+
+It serves the endpoints YAAAF's clients call (/api/tags and /api/chat for
+Ollama, /v1/models and /v1/chat/completions for vLLM) and answers with canned
+responses after a simulated delay:
+
+    delay = latency + completion_tokens / tokens_per_second
+
+The canned responses are picked by matching substrings of the prompt, so the
+goal extractor, the planner (valid workflow YAML), the validation agent and
+the answerer all receive something they can parse. Rules can be overridden
+with a JSON file: a list of {"match": "...", "response": "..."} objects,
+checked in order; the first match wins and "match": "" is a catch-all.
+
+Usage:
+    python fake_llm_server.py --port 11434 --latency 0.2 --tokens-per-second 50
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, List
+
+import uvicorn
+from fastapi import FastAPI, Request
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "fake-model"
+
+PLANNER_RESPONSE = """```yaml
+assets:
+  final_answer:
+    agent: answerer
+    description: "Answer the user's question with a summary table"
+    type: table
+```"""
+
+ANSWERER_RESPONSE = """```table
+| item | value |
+|------|-------|
+| rows | 42 |
+| status | ok |
+```
+<taskcompleted/>"""
+
+VALIDATION_RESPONSE = """```json
+{"is_valid": true, "confidence": 0.95, "reason": "The artifact answers the question", "should_ask_user": false, "suggested_fix": null}
+```"""
+
+GOAL_RESPONSE = "Goal: Answer the user's question\nArtifact Type: TABLE"
+
+DEFAULT_RULES: List[Dict[str, str]] = [
+    {"match": "Artifact Type:", "response": GOAL_RESPONSE},
+    {"match": "\"is_valid\"", "response": VALIDATION_RESPONSE},
+    {"match": "```table", "response": ANSWERER_RESPONSE},
+    {"match": "```yaml", "response": PLANNER_RESPONSE},
+    {"match": "", "response": "The task is done. <taskcompleted/>"},
+]
+
+
+def count_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)."""
+    return max(1, len(text) // 4)
+
+
+class FakeLLM:
+    """Chooses canned responses and simulates generation time."""
+
+    def __init__(self, latency: float, tokens_per_second: float, rules: List[Dict[str, str]]):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.rules = rules
+        self.requests_served = 0
+
+    def choose_response(self, messages: List[Dict[str, Any]]) -> str:
+        prompt = "\n".join(str(message.get("content", "")) for message in messages)
+        for rule in self.rules:
+            if rule["match"] in prompt:
+                return rule["response"]
+        return DEFAULT_RULES[-1]["response"]
+
+    async def generate(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        content = self.choose_response(messages)
+        prompt_tokens = sum(count_tokens(str(message.get("content", ""))) for message in messages)
+        completion_tokens = count_tokens(content)
+
+        delay = self.latency
+        if self.tokens_per_second > 0:
+            delay += completion_tokens / self.tokens_per_second
+        await asyncio.sleep(delay)
+
+        self.requests_served += 1
+        return {
+            "content": content,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "seconds": delay,
+        }
+
+
+def create_app(fake_llm: FakeLLM) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/tags")
+    async def ollama_tags():
+        return {"models": [{"name": MODEL_NAME}]}
+
+    @app.post("/api/chat")
+    async def ollama_chat(request: Request):
+        payload = await request.json()
+        result = await fake_llm.generate(payload.get("messages", []))
+        return {
+            "model": payload.get("model", MODEL_NAME),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "message": {"role": "assistant", "content": result["content"]},
+            "done": True,
+            "prompt_eval_count": result["prompt_tokens"],
+            "eval_count": result["completion_tokens"],
+            "eval_duration": int(result["seconds"] * 1e9),
+        }
+
+    @app.get("/v1/models")
+    async def vllm_models():
+        return {"object": "list", "data": [{"id": MODEL_NAME, "object": "model"}]}
+
+    @app.post("/v1/chat/completions")
+    async def vllm_chat(request: Request):
+        payload = await request.json()
+        result = await fake_llm.generate(payload.get("messages", []))
+        return {
+            "id": f"chatcmpl-{fake_llm.requests_served}",
+            "object": "chat.completion",
+            "model": payload.get("model", MODEL_NAME),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": result["content"]},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": result["prompt_tokens"],
+                "completion_tokens": result["completion_tokens"],
+                "total_tokens": result["prompt_tokens"] + result["completion_tokens"],
+            },
+        }
+
+    @app.get("/stats")
+    async def stats():
+        return {"requests_served": fake_llm.requests_served}
+
+    return app
+
+
+def load_rules(path: str) -> List[Dict[str, str]]:
+    with open(path) as f:
+        rules = json.load(f)
+    for rule in rules:
+        if "match" not in rule or "response" not in rule:
+            raise ValueError(f"Each rule needs 'match' and 'response' keys, got {rule}")
+    return rules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Ollama/vLLM server for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="Simulated generation speed (0 = instant)")
+    parser.add_argument("--responses", default=None, help="JSON file with canned response rules")
+    args = parser.parse_args()
+
+    rules = load_rules(args.responses) if args.responses else DEFAULT_RULES
+    fake_llm = FakeLLM(args.latency, args.tokens_per_second, rules)
+    logger.info(
+        f"Fake LLM on {args.host}:{args.port} (latency={args.latency}s, "
+        f"{args.tokens_per_second} tokens/s, {len(rules)} rules)"
+    )
+    uvicorn.run(create_app(fake_llm), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Drive a running YAAAF backend at a target arrival rate and report latencies.
+
+Each simulated user calls /create_stream and then reads /stream_utterances
+until the orchestrator completes (or pauses) the stream. Arrivals follow a
+Poisson process at --rate users per second, so the load is open-loop: slow
+responses do not slow down new arrivals.
+
+The report contains throughput, p50/p95/p99 end-to-end latency and
+time-to-first-note (the first note received on the SSE stream).
+
+Usage:
+    python load_client.py --backend http://localhost:4000 --rate 2 --num-users 50
+"""
+
+import argparse
+import json
+import logging
+import math
+import random
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from typing import List, Optional
+
+import requests
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUERY = "How many rows are in the sales table?"
+
+
+@dataclass
+class UserResult:
+    stream_id: str
+    started_at: float
+    success: bool = False
+    latency: Optional[float] = None  # create_stream -> final note
+    time_to_first_note: Optional[float] = None
+    notes_received: int = 0
+    error: Optional[str] = None
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile, `fraction` in [0, 1]."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def is_final_note(note: dict) -> bool:
+    agent_name = (note.get("agent_name") or "").lower()
+    message = (note.get("message") or "").lower()
+    return agent_name in ("orchestrator", "system") and (
+        "<taskcompleted/>" in message or "<taskpaused/>" in message
+    )
+
+
+def run_user(backend: str, query: str, timeout: float) -> UserResult:
+    """Simulate one user: create a stream and follow it until it ends or `timeout` expires."""
+    result = UserResult(stream_id=f"load_{uuid.uuid4().hex}", started_at=time.perf_counter())
+    deadline = result.started_at + timeout
+    try:
+        response = requests.post(
+            f"{backend}/create_stream",
+            json={"stream_id": result.stream_id, "messages": [{"role": "user", "content": query}]},
+            timeout=timeout,
+        )
+        response.raise_for_status()
+
+        with requests.post(
+            f"{backend}/stream_utterances",
+            json={"stream_id": result.stream_id},
+            stream=True,
+            timeout=timeout,
+        ) as stream:
+            stream.raise_for_status()
+            for line in stream.iter_lines(decode_unicode=True):
+                if time.perf_counter() > deadline:
+                    result.error = f"No final note within {timeout:.0f}s"
+                    break
+                if not line or not line.startswith("data: "):
+                    continue  # keep-alive comments and separators
+                note = json.loads(line[len("data: "):])
+                if "error" in note:
+                    result.error = note["error"]
+                    break
+
+                result.notes_received += 1
+                if result.time_to_first_note is None:
+                    result.time_to_first_note = time.perf_counter() - result.started_at
+
+                if is_final_note(note):
+                    result.latency = time.perf_counter() - result.started_at
+                    if (note.get("agent_name") or "").lower() == "system":
+                        result.error = note.get("message", "")[:200]
+                    else:
+                        result.success = True
+                    break
+
+        if result.latency is None and result.error is None:
+            result.error = "Stream ended without a final note"
+    except Exception as e:
+        result.error = str(e)
+    return result
+
+
+def run_load(
+    backend: str,
+    rate: float,
+    num_users: int,
+    query: str = DEFAULT_QUERY,
+    timeout: float = 600.0,
+    seed: Optional[int] = None,
+) -> dict:
+    """Start `num_users` users with Poisson arrivals at `rate` per second and wait for them."""
+    rng = random.Random(seed)
+    results: List[UserResult] = []
+    lock = threading.Lock()
+
+    def worker():
+        user_result = run_user(backend, query, timeout)
+        with lock:
+            results.append(user_result)
+        status = "ok" if user_result.success else f"error: {user_result.error}"
+        logger.info(f"{user_result.stream_id} finished ({status})")
+
+    threads = []
+    started_at = time.perf_counter()
+    for index in range(num_users):
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        threads.append(thread)
+        if index < num_users - 1:
+            time.sleep(rng.expovariate(rate))
+    for thread in threads:
+        thread.join()
+    wall_seconds = time.perf_counter() - started_at
+
+    return build_report(results, wall_seconds, rate)
+
+
+def build_report(results: List[UserResult], wall_seconds: float, rate: float) -> dict:
+    latencies = [r.latency for r in results if r.success and r.latency is not None]
+    first_notes = [r.time_to_first_note for r in results if r.time_to_first_note is not None]
+    errors = [r for r in results if not r.success]
+
+    def summary(values: List[float]) -> dict:
+        return {
+            "p50": percentile(values, 0.50),
+            "p95": percentile(values, 0.95),
+            "p99": percentile(values, 0.99),
+            "max": max(values) if values else None,
+        }
+
+    return {
+        "target_rate": rate,
+        "users": len(results),
+        "succeeded": len(latencies),
+        "failed": len(errors),
+        "wall_seconds": wall_seconds,
+        "throughput_per_second": len(latencies) / wall_seconds if wall_seconds > 0 else 0.0,
+        "latency_seconds": summary(latencies),
+        "time_to_first_note_seconds": summary(first_notes),
+        "errors": sorted({r.error for r in errors if r.error})[:10],
+        "results": [asdict(r) for r in results],
+    }
+
+
+def format_report(report: dict) -> str:
+    def fmt(value):
+        return "n/a" if value is None else f"{value:.3f}s"
+
+    lines = [
+        "",
+        "YAAAF load test report",
+        "======================",
+        f"Target arrival rate : {report['target_rate']:.2f} users/s",
+        f"Users               : {report['users']} ({report['succeeded']} ok, {report['failed']} failed)",
+        f"Wall time           : {report['wall_seconds']:.1f}s",
+        f"Throughput          : {report['throughput_per_second']:.2f} completed streams/s",
+        "",
+        f"{'':22}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}",
+    ]
+    for label, key in (("End-to-end latency", "latency_seconds"), ("Time to first note", "time_to_first_note_seconds")):
+        stats = report[key]
+        lines.append(
+            f"{label:22}{fmt(stats['p50']):>10}{fmt(stats['p95']):>10}{fmt(stats['p99']):>10}{fmt(stats['max']):>10}"
+        )
+    if report["errors"]:
+        lines.append("")
+        lines.append("Errors:")
+        lines.extend(f"  - {error}" for error in report["errors"])
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test a running YAAAF backend")
+    parser.add_argument("--backend", default="http://localhost:4000")
+    parser.add_argument("--rate", type=float, default=1.0, help="Target arrival rate (users per second)")
+    parser.add_argument("--num-users", type=int, default=20)
+    parser.add_argument("--query", default=DEFAULT_QUERY)
+    parser.add_argument("--timeout", type=float, default=600.0, help="Give up on a user after this many seconds")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", default=None, help="Write the full report as JSON")
+    args = parser.parse_args()
+
+    report = run_load(args.backend, args.rate, args.num_users, args.query, args.timeout, args.seed)
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Full report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
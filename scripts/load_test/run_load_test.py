@@ -0,0 +1,139 @@
+"""
+Run an offline end-to-end load test: fake LLM server + YAAAF backend + load client.
+
+The script starts fake_llm_server.py, writes a temporary YAAAF configuration
+pointing the client at it, starts `python -m yaaaf backend`, waits for both to
+answer, drives the backend with load_client.py and prints the report. Nothing
+leaves the machine.
+
+Usage:
+    python run_load_test.py --rate 2 --num-users 50 --latency 0.2 --tokens-per-second 40
+    python run_load_test.py --client-type vllm --agents answerer --output report.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import requests
+
+from load_client import DEFAULT_QUERY, format_report, run_load
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+SCRIPT_DIR = Path(__file__).parent
+
+
+def wait_for(url: str, timeout: float, method: str = "get") -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            response = requests.request(method, url, timeout=2)
+            if response.status_code < 500:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"{url} did not come up within {timeout}s")
+
+
+def write_config(path: str, client_type: str, llm_host: str, agents: list) -> None:
+    config = {
+        "client": {
+            "type": client_type,
+            "model": "fake-model",
+            "host": llm_host,
+            "temperature": 0.0,
+            "max_tokens": 512,
+        },
+        "agents": agents,
+        "sources": [],
+        # Validation failures would ask the user; replan instead so streams always finish
+        "disable_user_prompts": True,
+    }
+    with open(path, "w") as f:
+        json.dump(config, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end load test for YAAAF")
+    parser.add_argument("--rate", type=float, default=1.0, help="Target arrival rate (users per second)")
+    parser.add_argument("--num-users", type=int, default=20)
+    parser.add_argument("--query", default=DEFAULT_QUERY)
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM time to first token (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="Fake LLM generation speed")
+    parser.add_argument("--responses", default=None, help="JSON file with canned response rules")
+    parser.add_argument("--client-type", choices=["ollama", "vllm"], default="ollama")
+    parser.add_argument("--agents", nargs="+", default=["answerer"], help="Agents enabled in the backend")
+    parser.add_argument("--llm-port", type=int, default=11435)
+    parser.add_argument("--backend-port", type=int, default=4100)
+    parser.add_argument("--startup-timeout", type=float, default=120.0)
+    parser.add_argument("--timeout", type=float, default=600.0, help="Give up on a user after this many seconds")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", default=None, help="Write the full report as JSON")
+    args = parser.parse_args()
+
+    llm_host = f"http://127.0.0.1:{args.llm_port}"
+    backend = f"http://127.0.0.1:{args.backend_port}"
+    processes = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        config_path = os.path.join(work_dir, "config.json")
+        write_config(config_path, args.client_type, llm_host, args.agents)
+
+        try:
+            llm_command = [
+                sys.executable,
+                str(SCRIPT_DIR / "fake_llm_server.py"),
+                "--port", str(args.llm_port),
+                "--latency", str(args.latency),
+                "--tokens-per-second", str(args.tokens_per_second),
+            ]
+            if args.responses:
+                llm_command += ["--responses", args.responses]
+            processes.append(subprocess.Popen(llm_command))
+            wait_for(f"{llm_host}/api/tags", args.startup_timeout)
+            logger.info(f"Fake LLM server ready at {llm_host}")
+
+            backend_log = open(os.path.join(work_dir, "backend.log"), "w")
+            processes.append(
+                subprocess.Popen(
+                    [sys.executable, "-m", "yaaaf", "backend", str(args.backend_port)],
+                    env={**os.environ, "YAAAF_CONFIG": config_path},
+                    cwd=work_dir,
+                    stdout=backend_log,
+                    stderr=subprocess.STDOUT,
+                )
+            )
+            wait_for(f"{backend}/get_agents_config", args.startup_timeout)
+            logger.info(f"YAAAF backend ready at {backend}")
+
+            report = run_load(backend, args.rate, args.num_users, args.query, args.timeout, args.seed)
+            report["fake_llm"] = {
+                "latency": args.latency,
+                "tokens_per_second": args.tokens_per_second,
+                "requests_served": requests.get(f"{llm_host}/stats", timeout=5).json()["requests_served"],
+            }
+            print(format_report(report))
+            print(f"LLM requests served by the fake server: {report['fake_llm']['requests_served']}")
+            if args.output:
+                with open(args.output, "w") as f:
+                    json.dump(report, f, indent=2)
+                logger.info(f"Full report written to {args.output}")
+        finally:
+            for process in reversed(processes):
+                process.terminate()
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+
+if __name__ == "__main__":
+    main()
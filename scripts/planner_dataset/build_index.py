@@ -0,0 +1,38 @@
+"""
+Build the planner example index shipped with the package.
+
+The index is written next to the dataset, in yaaaf/data/planner_examples.index,
+and is memory-mapped by PlannerExampleRetriever at startup. Run this after
+updating yaaaf/data/planner_dataset.csv and before building the package;
+without a current prebuilt index the retriever builds one on first run under
+$YAAAF_CACHE_DIR (default ~/.cache/yaaaf).
+
+Usage:
+    python build_index.py
+    python build_index.py --dataset planner_dataset.csv --output ../../yaaaf/data/planner_examples.index
+"""
+
+import argparse
+import logging
+import os
+
+from yaaaf.components.retrievers.planner_example_index import PlannerExampleIndex
+from yaaaf.components.retrievers.planner_example_retriever import PREBUILT_INDEX_NAME
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+_DATA_DIRECTORY = os.path.join(os.path.dirname(__file__), "..", "..", "yaaaf", "data")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the prebuilt planner example index")
+    parser.add_argument("--dataset", default=os.path.join(_DATA_DIRECTORY, "planner_dataset.csv"))
+    parser.add_argument("--output", default=os.path.join(_DATA_DIRECTORY, PREBUILT_INDEX_NAME))
+    args = parser.parse_args()
+
+    index = PlannerExampleIndex.build(args.dataset, args.output)
+    print(f"Indexed {len(index)} examples using {len(index.manifest['agents'])} agents into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
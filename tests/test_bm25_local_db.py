@@ -0,0 +1,196 @@
+import math
+import pickle
+import unittest
+from collections import Counter
+
+from yaaaf.components.retrievers.analyzer import ENGLISH_STOPWORDS, Analyzer
+from yaaaf.components.retrievers.local_vector_db import BM25LocalDB
+
+_DOCUMENTS = {
+    "cats": "cats chase mice and cats sleep all day",
+    "dogs": "dogs chase cats in the park",
+    "birds": "birds sing in the morning",
+    "fish": "fish swim in the sea and the river",
+}
+
+
+def _terms(text):
+    return [word for word in text.split() if word not in ENGLISH_STOPWORDS]
+
+
+def _brute_force_scores(documents, query, k1=1.5, b=0.75):
+    tokenized = {index: _terms(text) for index, text in documents.items()}
+    average_length = sum(len(tokens) for tokens in tokenized.values()) / len(tokenized)
+    scores = {}
+    for index, tokens in tokenized.items():
+        frequencies = Counter(tokens)
+        score = 0.0
+        for term in set(_terms(query)):
+            document_frequency = sum(1 for other in tokenized.values() if term in other)
+            if not frequencies[term]:
+                continue
+            idf = math.log(1 + (len(tokenized) - document_frequency + 0.5) / (document_frequency + 0.5))
+            norm = 1 - b + b * len(tokens) / average_length
+            score += idf * frequencies[term] * (k1 + 1) / (frequencies[term] + k1 * norm)
+        if score:
+            scores[index] = score
+    return scores
+
+
+class TestBM25LocalDB(unittest.TestCase):
+    def _build(self, documents=_DOCUMENTS) -> BM25LocalDB:
+        db = BM25LocalDB()
+        for index, text in documents.items():
+            db.add_text_and_index(text, index)
+        return db
+
+    def test_returns_top_matches_with_their_scores(self):
+        db = self._build()
+
+        indices, scores = db.get_indices_from_text("cats chase", topn=2)
+
+        expected = _brute_force_scores(_DOCUMENTS, "cats chase")
+        best = sorted(expected, key=expected.get, reverse=True)[:2]
+        self.assertEqual(indices, best)
+        for index, score in zip(indices, scores):
+            self.assertAlmostEqual(score, expected[index])
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_documents_are_searchable_without_build(self):
+        db = self._build()
+        db.add_text_and_index("whales sing in the ocean", "whales")
+
+        indices, _ = db.get_indices_from_text("whales", topn=3)
+
+        self.assertEqual(indices, ["whales"])
+
+    def test_delete_matches_a_fresh_index(self):
+        db = self._build()
+        self.assertTrue(db.delete_index("cats"))
+        self.assertFalse(db.delete_index("cats"))
+
+        remaining = {index: text for index, text in _DOCUMENTS.items() if index != "cats"}
+        fresh = self._build(remaining)
+        query = "cats chase in the park"
+        self.assertEqual(
+            db.get_indices_from_text(query, topn=4),
+            fresh.get_indices_from_text(query, topn=4),
+        )
+        self.assertEqual(len(db), 3)
+
+    def test_deleted_slots_are_reclaimed(self):
+        documents = {f"doc{i}": f"shared word{i % 10} term{i}" for i in range(3000)}
+        db = self._build(documents)
+        db.build()
+        for i in range(0, 3000, 2):
+            db.delete_index(f"doc{i}")
+        db.add_text_and_index("shared word1 term1 again", "doc1")
+
+        # Half the slots are dead: the next query compacts them away
+        indices, scores = db.get_indices_from_text("word3", topn=5)
+
+        self.assertEqual(len(db._slot_to_index), 1500)
+        self.assertEqual((len(db._lengths), len(db._alive)), (1500, 1500))
+        remaining = {index: text for index, text in documents.items() if int(index[3:]) % 2}
+        remaining["doc1"] = "shared word1 term1 again"
+        fresh = self._build(remaining)
+        fresh.build()
+        self.assertEqual((indices, scores), fresh.get_indices_from_text("word3", topn=5))
+        self.assertEqual(db.get_indices_from_text("term1 again", topn=1)[0], ["doc1"])
+        self.assertTrue(db.delete_index("doc2999"))
+        db.build()
+        self.assertEqual(len(db._slot_to_index), 1499)
+
+    def test_re_adding_an_index_replaces_it(self):
+        db = self._build()
+        db.add_text_and_index("completely different words", "cats")
+
+        self.assertEqual(len(db), len(_DOCUMENTS))
+        self.assertNotIn("cats", db.get_indices_from_text("mice", topn=4)[0])
+        self.assertEqual(db.get_indices_from_text("different", topn=4)[0], ["cats"])
+
+    def test_empty_index(self):
+        db = BM25LocalDB()
+        self.assertEqual(db.get_indices_from_text("anything", topn=5), ([], []))
+
+    def test_pickle_round_trip(self):
+        db = self._build()
+        restored = pickle.loads(pickle.dumps(db))
+        self.assertEqual(
+            restored.get_indices_from_text("birds sing", topn=2),
+            db.get_indices_from_text("birds sing", topn=2),
+        )
+
+    def test_compiled_and_pending_documents_score_alike(self):
+        db = self._build()
+        db.build()
+        db.add_text_and_index("whales sing in the ocean", "whales")
+        db.delete_index("dogs")
+
+        documents = {index: text for index, text in _DOCUMENTS.items() if index != "dogs"}
+        documents["whales"] = "whales sing in the ocean"
+        expected = _brute_force_scores(documents, "sing in the park")
+        indices, scores = db.get_indices_from_text("sing in the park", topn=10)
+
+        self.assertEqual(set(indices), set(expected))
+        for index, score in zip(indices, scores):
+            self.assertAlmostEqual(score, expected[index])
+
+        db.build()
+        self.assertEqual(db.get_indices_from_text("sing in the park", topn=10), (indices, scores))
+
+    def test_top_k_over_a_large_corpus_matches_brute_force(self):
+        words = ["alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta", "theta"]
+        documents = {
+            f"doc{i}": " ".join(words[(i * j) % len(words)] for j in range(1, 2 + i % 7))
+            for i in range(3000)
+        }
+        db = self._build(documents)
+
+        indices, scores = db.get_indices_from_text("gamma theta", topn=5)
+
+        expected = _brute_force_scores(documents, "gamma theta")
+        best = sorted(expected, key=lambda index: (-expected[index], int(index[3:])))[:5]
+        self.assertEqual(indices, best)
+        for index, score in zip(indices, scores):
+            self.assertAlmostEqual(score, expected[index])
+
+    def test_loads_pickles_of_the_previous_implementation(self):
+        legacy = BM25LocalDB.__new__(BM25LocalDB)
+        legacy.__dict__.update(
+            {
+                "_indices": list(_DOCUMENTS),
+                "_texts": [text.split() for text in _DOCUMENTS.values()],
+                "_bm25": None,
+                "_stopwords": [],
+            }
+        )
+        restored = pickle.loads(pickle.dumps(legacy))
+
+        self.assertEqual(len(restored), len(_DOCUMENTS))
+        self.assertEqual(restored.get_indices_from_text("river", topn=1)[0], ["fish"])
+
+
+class TestAnalyzer(unittest.TestCase):
+    def test_lowercases_and_drops_stopwords_and_punctuation(self):
+        self.assertEqual(
+            Analyzer().analyze("The Cats, weren't they sleeping?"),
+            ["cats", "sleeping"],
+        )
+
+    def test_optional_stemming(self):
+        analyzer = Analyzer(stem=True)
+
+        self.assertEqual(analyzer.analyze("Running runners ran"), ["run", "runner", "ran"])
+        self.assertNotEqual(analyzer.name, Analyzer().name)
+
+    def test_stemmed_queries_match_inflections(self):
+        db = BM25LocalDB(analyzer=Analyzer(stem=True))
+        db.add_text_and_index("The river flooded the valleys", "flood")
+        db.add_text_and_index("Cats sleep all day", "cats")
+
+        self.assertEqual(db.get_indices_from_text("floods in a valley", topn=2)[0], ["flood"])
+
+
+if __name__ == "__main__":
+    unittest.main()
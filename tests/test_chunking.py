@@ -0,0 +1,76 @@
+import unittest
+
+from yaaaf.components.sources.chunking import TextChunker
+from yaaaf.components.sources.rag_source import RAGSource
+
+
+def _sentences(count: int, prefix: str = "word") -> str:
+    return " ".join(f"{prefix}{i} is here." for i in range(count))
+
+
+class TestTextChunker(unittest.TestCase):
+    def test_windows_respect_size_and_overlap(self):
+        chunker = TextChunker(chunk_size=20, chunk_overlap=5)
+        text = " ".join(f"w{i}" for i in range(50))
+
+        chunks = chunker.chunk_text(text)
+
+        self.assertTrue(all(chunk.token_count <= 20 for chunk in chunks))
+        first, second = chunks[0].text.split(), chunks[1].text.split()
+        self.assertEqual(first[-5:], second[:5])
+        self.assertEqual(chunks[-1].text.split()[-1], "w49")
+        for chunk in chunks:
+            self.assertEqual(text[chunk.char_start : chunk.char_end], chunk.text)
+
+    def test_windows_end_at_paragraph_breaks(self):
+        chunker = TextChunker(chunk_size=30, chunk_overlap=0)
+        text = _sentences(6, "a") + "\n\n" + _sentences(6, "b")
+
+        chunks = chunker.chunk_text(text)
+
+        self.assertEqual(chunks[0].text, _sentences(6, "a"))
+        self.assertEqual(chunks[1].text, _sentences(6, "b"))
+
+    def test_headings_start_new_chunks(self):
+        chunker = TextChunker(chunk_size=100, chunk_overlap=10)
+        text = "# Intro\nShort intro.\n\n## Results\nRevenue grew.\n\nCosts fell."
+
+        chunks = chunker.chunk_text(text, "report.md")
+
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(chunks[0].heading, "# Intro")
+        self.assertEqual(chunks[1].heading, "## Results")
+        self.assertTrue(chunks[1].text.startswith("[report.md]\n\n## Results"))
+
+    def test_pages_are_not_merged(self):
+        chunker = TextChunker(chunk_size=100, chunk_overlap=0)
+
+        chunks = chunker.chunk_pages([(1, "First page."), (2, "Second page.")], "doc.pdf")
+
+        self.assertEqual([chunk.page for chunk in chunks], [1, 2])
+        self.assertEqual(chunks[1].text, "[doc.pdf - Page 2]\n\nSecond page.")
+        self.assertEqual(chunks[1].get_metadata()["chunk_index"], 1)
+
+    def test_rejects_overlap_not_smaller_than_size(self):
+        with self.assertRaises(ValueError):
+            TextChunker(chunk_size=10, chunk_overlap=10)
+
+
+class TestRAGSourceChunking(unittest.TestCase):
+    def test_text_is_indexed_as_passages_with_metadata(self):
+        source = RAGSource("docs", "docs", chunker=TextChunker(chunk_size=30, chunk_overlap=0))
+        source.add_text(
+            _sentences(10, "alpha") + "\n\n" + _sentences(10, "omega"), filename="notes.txt"
+        )
+
+        results = source.get_data("omega3", topn=1)
+
+        self.assertEqual(source.get_document_count(), 2)
+        self.assertTrue(results[0].startswith("[notes.txt]"))
+        self.assertNotIn("alpha1", results[0])
+        chunk_id = next(iter(source._id_to_metadata))
+        self.assertEqual(source.get_chunk_metadata(chunk_id)["source"], "notes.txt")
+
+
+if __name__ == "__main__":
+    unittest.main()
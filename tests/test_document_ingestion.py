@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+
+from yaaaf.components.sources.chunking import TextChunker
+from yaaaf.components.sources.document_ingestion import DocumentIngestor, _read_text_file
+from yaaaf.components.sources.rag_source import RAGSource
+
+
+def _write_pdf(path: str, page_texts):
+    """Write a minimal PDF with one line of Helvetica text per page."""
+    count = len(page_texts)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids ["
+        + b" ".join(b"%d 0 R" % (4 + 2 * i) for i in range(count))
+        + b"] /Count %d >>" % count,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(page_texts):
+        stream = b"BT /F1 12 Tf 72 720 Td (%s) Tj ET" % text.encode("latin-1")
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (5 + 2 * i)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+
+    content = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(content))
+        content += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(content)
+    content += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    content += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    content += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    with open(path, "wb") as f:
+        f.write(content)
+
+
+class TestDocumentIngestor(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self._directory.cleanup)
+        self.folder = self._directory.name
+        self.source = RAGSource("docs", self.folder, chunker=TextChunker(chunk_size=50, chunk_overlap=0))
+
+    def _write(self, filename: str, text: str) -> str:
+        path = os.path.join(self.folder, filename)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_pdf_pages_are_fanned_out_across_processes(self):
+        _write_pdf(
+            os.path.join(self.folder, "manual.pdf"),
+            [f"Page {number} explains topic{number}" for number in range(1, 8)],
+        )
+        self._write("notes.txt", "Cats sleep all day.")
+        ingestor = DocumentIngestor(self.source, self.folder, max_workers=2, pages_per_task=2)
+
+        report = ingestor.sync()
+
+        self.assertEqual(report.files_indexed, 2)
+        self.assertEqual(report.pages, 8)
+        self.assertGreater(report.pages_per_second, 0)
+        result = self.source.get_data("topic6", topn=1)[0]
+        self.assertTrue(result.startswith("[manual.pdf - Page 6]"))
+        pages = sorted(metadata["page"] for metadata in self.source._id_to_metadata.values() if metadata["page"])
+        self.assertEqual(pages, list(range(1, 8)))
+
+    def test_text_files_are_read_as_utf8_or_latin1(self):
+        for encoding in ["utf-8", "latin-1"]:
+            path = os.path.join(self.folder, f"{encoding}.txt")
+            with open(path, "w", encoding=encoding) as f:
+                f.write("Unicode: café, naïve, résumé")
+
+            self.assertEqual(_read_text_file(path), (1, [(None, "Unicode: café, naïve, résumé")]))
+
+    def test_unchanged_files_are_skipped(self):
+        path = self._write("notes.txt", "Cats sleep all day.")
+        ingestor = DocumentIngestor(self.source, self.folder, max_workers=1)
+        ingestor.sync()
+
+        # Touched but identical content: hashed, not re-indexed
+        os.utime(path, ns=(0, 0))
+        report = ingestor.sync()
+
+        self.assertEqual(report.files_skipped, 1)
+        self.assertEqual(report.files_indexed, 0)
+        self.assertEqual(self.source.get_document_count(), 1)
+
+    def test_changed_and_deleted_files_replace_their_chunks(self):
+        notes = self._write("notes.txt", "Cats sleep all day.")
+        other = self._write("other.md", "Rivers flood in spring.")
+        ingestor = DocumentIngestor(self.source, self.folder, max_workers=1)
+        ingestor.sync()
+
+        self._write("notes.txt", "Dogs bark at night.")
+        os.utime(notes, ns=(1, 1))
+        os.remove(other)
+        report = ingestor.sync()
+
+        self.assertEqual((report.files_indexed, report.files_removed), (1, 1))
+        self.assertEqual(list(self.source._id_to_chunk.values()), ["[notes.txt]\n\nDogs bark at night."])
+        self.assertEqual(self.source.get_data("cats rivers"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
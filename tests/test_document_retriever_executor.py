@@ -0,0 +1,83 @@
+import asyncio
+import json
+import re
+import unittest
+from types import SimpleNamespace
+
+from yaaaf.components.executors.document_retriever_executor import DocumentRetrieverExecutor
+from yaaaf.components.extractors.chunk_extractor import ChunkExtractor
+from yaaaf.components.sources.rag_source import RAGSource
+
+
+class _EchoClient:
+    """Returns every sentence of the prompt text that mentions a query word."""
+
+    def __init__(self):
+        self.prompt_sizes = []
+        self.running = 0
+        self.max_running = 0
+
+    async def predict(self, messages):
+        prompt = messages.utterances[0].content
+        self.prompt_sizes.append(len(prompt))
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        text = prompt.split("Text:\n", 1)[1].split("\n\nInstructions:", 1)[0]
+        query = messages.utterances[1].content.lower().split()
+        sentences = re.findall(r"[^.\n]+\.", text)
+        found = [
+            {"relevant_chunk_text": sentence.strip(), "position_in_document": "p"}
+            for sentence in sentences
+            if any(word in sentence.lower() for word in query)
+        ]
+        return SimpleNamespace(message=json.dumps(found))
+
+
+def _source() -> RAGSource:
+    source = RAGSource("Animals", "animals")
+    for number in range(30):
+        source.add_text(f"Passage {number} says cats purr. Filler text number {number}.")
+    source.add_text("Dogs bark at strangers.")
+    return source
+
+
+class TestDocumentRetrieverExecutor(unittest.TestCase):
+    def test_passages_are_batched_and_extracted_concurrently(self):
+        client = _EchoClient()
+        extractor = ChunkExtractor(client, max_prompt_chars=200, max_concurrency=3)
+        executor = DocumentRetrieverExecutor([_source()], extractor, passages_per_query=12)
+        instruction = "| folder_index | query |\n| --- | --- |\n| 0 | cats purr |"
+
+        result, error = asyncio.run(executor.execute_operation(instruction, {}))
+
+        self.assertIsNone(error)
+        self.assertGreater(len(client.prompt_sizes), 1)
+        self.assertEqual(client.max_running, 3)
+        self.assertTrue(all(size < 200 + 2000 for size in client.prompt_sizes))
+        self.assertEqual(len(result["chunks"]), 12)
+        self.assertNotIn("Dogs", result["content"])
+        artefact = executor.transform_to_artifact(result, instruction, "id")
+        self.assertEqual(len(artefact.data), 12)
+
+    def test_duplicate_chunks_are_merged(self):
+        extractor = ChunkExtractor(_EchoClient(), max_prompt_chars=60)
+        passages = ["Cats purr loudly.", "Cats purr loudly.", "Cats  purr loudly."]
+
+        chunks = asyncio.run(extractor.extract_from_passages(passages, "cats"))
+
+        self.assertEqual([chunk["relevant_chunk_text"] for chunk in chunks], ["Cats purr loudly."])
+
+    def test_plain_query_searches_every_source(self):
+        executor = DocumentRetrieverExecutor([_source(), _source()], ChunkExtractor(_EchoClient()))
+
+        result, error = asyncio.run(executor.execute_operation("dogs bark", {}))
+
+        self.assertIsNone(error)
+        self.assertEqual(result["sources_count"], 2)
+        self.assertEqual(result["content"], "[p] Dogs bark at strangers.")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+
+import pandas as pd
+
+from yaaaf.components.executors.sql_executor import SQLExecutor
+from yaaaf.components.sources.duckdb_source import DUCKDB_SUPPORT, DuckDBSource
+from yaaaf.components.sources.query_result_cache import QueryResultCache
+from yaaaf.components.sources.sqlite_source import QueryCancelledError, QueryTimeoutError
+
+if DUCKDB_SUPPORT:
+    import duckdb
+
+_ENDLESS_QUERY = """
+WITH RECURSIVE counter(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM counter)
+SELECT COUNT(*) FROM counter
+"""
+
+
+@unittest.skipUnless(DUCKDB_SUPPORT, "duckdb is not installed")
+class TestDuckDBSource(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp_dir.cleanup)
+        self.directory = self._tmp_dir.name
+        pd.DataFrame({"region": ["north", "south", "north"], "amount": [10, 20, 30]}).to_csv(
+            os.path.join(self.directory, "Sales 2024.csv"), index=False
+        )
+        self.source = DuckDBSource(name="files", path=self.directory)
+
+    def test_files_are_queried_in_place(self):
+        result = self.source.get_data(
+            "SELECT region, SUM(amount) AS total FROM sales_2024 GROUP BY region ORDER BY region"
+        )
+
+        self.assertEqual(result["total"].tolist(), [40, 20])
+        self.assertIn("# Table sales_2024 (3 rows)", self.source.get_description())
+        self.assertIn("SQL dialect: DuckDB", self.source.get_description())
+
+    def test_new_and_rewritten_files_are_picked_up(self):
+        version = self.source.get_data_version()
+        pd.DataFrame({"id": [1, 2]}).to_csv(os.path.join(self.directory, "extra.csv"), index=False)
+
+        self.assertNotEqual(self.source.get_data_version(), version)
+        self.assertEqual(self.source.count_rows("SELECT * FROM extra -- ids"), 2)
+        self.assertIn("extra", self.source.get_catalog().tables)
+
+    def test_only_select_statements_are_accepted(self):
+        result = self.source.get_data(
+            f"COPY sales_2024 TO '{os.path.join(self.directory, 'copy.csv')}'"
+        )
+
+        self.assertIn("Errors", result.columns)
+        self.assertFalse(os.path.exists(os.path.join(self.directory, "copy.csv")))
+
+    def test_files_outside_the_source_are_not_readable(self):
+        for query in [
+            "SELECT * FROM read_text('/etc/passwd')",
+            "SELECT * FROM read_csv_auto('/etc/passwd')",
+            "SELECT * FROM glob('/root/*')",
+            "SET enable_external_access = true",
+        ]:
+            result = self.source.get_data(query)
+
+            self.assertIn("Errors", result.columns, query)
+        with self.assertRaises(duckdb.Error):
+            self.source.explain_query_plan("SELECT * FROM read_text('/etc/passwd')")
+
+    def test_queries_are_interrupted(self):
+        with self.assertRaises(QueryTimeoutError):
+            self.source.get_data(_ENDLESS_QUERY, timeout=0.2)
+
+        cancel_event = threading.Event()
+        threading.Timer(0.2, cancel_event.set).start()
+        with self.assertRaises(QueryCancelledError):
+            self.source.get_data(_ENDLESS_QUERY, cancel_event=cancel_event)
+
+    def test_executor_queries_duckdb_sources(self):
+        executor = SQLExecutor([self.source], result_cache=QueryResultCache())
+
+        result, error = asyncio.run(
+            executor.execute_operation("SELECT COUNT(*) AS n FROM sales_2024", {})
+        )
+
+        self.assertIsNone(error)
+        self.assertEqual(result.data["n"][0], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
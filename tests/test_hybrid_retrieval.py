@@ -0,0 +1,129 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from yaaaf.components.retrievers.dense_index import DenseIndex
+from yaaaf.components.retrievers.rank_fusion import reciprocal_rank_fusion
+from yaaaf.components.sources.persistent_rag_source import PersistentRAGSource
+from yaaaf.components.sources.rag_source import RAGSource
+
+# Words sharing a concept get the same embedding direction, like paraphrases would
+_CONCEPTS = {
+    "car": 0, "automobile": 0, "vehicle": 0,
+    "price": 1, "cost": 1, "expensive": 1,
+    "cat": 2, "kitten": 2,
+    "weather": 3, "rain": 3, "forecast": 3,
+}
+
+
+class _ConceptEmbedder:
+    def __init__(self, model_name: str = "concepts", batch_size: int = 32):
+        self.model_name = model_name
+        self.calls = 0
+
+    def encode(self, texts):
+        self.calls += 1
+        vectors = np.full((len(texts), 5), 1e-3, dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().replace(".", " ").replace("?", " ").split():
+                if word in _CONCEPTS:
+                    vectors[row, _CONCEPTS[word]] += 1.0
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+_CHUNKS = [
+    "How much does an automobile cost",
+    "The kitten sleeps on the sofa",
+    "Tomorrow's forecast says rain",
+]
+
+
+class TestDenseIndex(unittest.TestCase):
+    def test_exact_search_orders_by_similarity(self):
+        index = DenseIndex()
+        index.add_vectors(["a", "b", "c"], np.eye(3, dtype=np.float32))
+
+        ids, scores = index.search(np.array([0.1, 0.9, 0.3]), topn=2)
+
+        self.assertEqual(ids, ["b", "c"])
+        self.assertAlmostEqual(scores[0], 0.9, places=5)
+
+    def test_inverted_file_search_finds_near_duplicates(self):
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(2000, 16)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        index = DenseIndex(n_probe=4, ann_min_vectors=500)
+        index.add_vectors([f"v{i}" for i in range(2000)], vectors)
+
+        ids, _ = index.search(vectors[123], topn=1)
+
+        self.assertIsNotNone(index.get_centroids())
+        self.assertEqual(ids, ["v123"])
+        index.delete_index("v123")
+        self.assertNotIn("v123", index.search(vectors[123], topn=5)[0])
+
+
+class TestReciprocalRankFusion(unittest.TestCase):
+    def test_items_ranked_by_both_lists_win(self):
+        fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "c", "d"]])
+
+        self.assertEqual([item for item, _ in fused], ["b", "c", "a", "d"])
+        self.assertAlmostEqual(fused[0][1], 1 / 61 + 1 / 62)
+
+
+@patch("yaaaf.components.sources.rag_source.LocalEmbedder", _ConceptEmbedder)
+class TestHybridRAGSource(unittest.TestCase):
+    def test_paraphrased_question_is_answered(self):
+        lexical = RAGSource("docs", "docs")
+        hybrid = RAGSource("docs", "docs", embedding_model="concepts")
+        for source in (lexical, hybrid):
+            for chunk in _CHUNKS:
+                source.add_text(chunk)
+
+        question = "price of a car"
+        self.assertNotIn(_CHUNKS[0], lexical.get_data(question, topn=1))
+        self.assertEqual(hybrid.get_data(question, topn=1), [_CHUNKS[0]])
+
+    def test_pending_chunks_are_encoded_in_one_batch(self):
+        source = RAGSource("docs", "docs", embedding_model="concepts")
+        for chunk in _CHUNKS:
+            source._add_chunk(chunk)
+        source._embed_pending_chunks()
+
+        self.assertEqual(source._embedder.calls, 1)
+        self.assertEqual(len(source._dense_index), len(_CHUNKS))
+
+    def test_embeddings_are_persisted_with_the_segments(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "index.pkl")
+            source = PersistentRAGSource("kb", "kb", path, embedding_model="concepts")
+            for chunk in _CHUNKS:
+                source.add_text(chunk)
+
+            reopened = PersistentRAGSource("kb", "kb", path, embedding_model="concepts")
+
+            self.assertEqual(reopened._embedder.calls, 0)
+            self.assertEqual(len(reopened._dense_index), len(_CHUNKS))
+            self.assertEqual(reopened.get_data("is it going to be wet weather", topn=1), [_CHUNKS[2]])
+
+    def test_stored_chunks_are_embedded_when_a_model_is_added(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "index.pkl")
+            lexical = PersistentRAGSource("kb", "kb", path)
+            for chunk in _CHUNKS:
+                lexical.add_text(chunk)
+
+            hybrid = PersistentRAGSource("kb", "kb", path, embedding_model="concepts")
+            self.assertEqual(len(hybrid._dense_index), len(_CHUNKS))
+            self.assertEqual(hybrid.get_segment_count(), 1)
+
+            reopened = PersistentRAGSource("kb", "kb", path, embedding_model="concepts")
+            self.assertEqual(reopened._embedder.calls, 0)
+            self.assertEqual(reopened.get_data("kitten", topn=1), [_CHUNKS[1]])
+
+
+if __name__ == "__main__":
+    unittest.main()
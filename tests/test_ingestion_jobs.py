@@ -0,0 +1,93 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from yaaaf.server.config import get_config
+from yaaaf.server.ingestion import (
+    IngestionJob,
+    submit_ingestion_job,
+    get_ingestion_job,
+    get_all_ingestion_jobs,
+)
+
+
+def _wait_for(job: IngestionJob, timeout: float = 5.0):
+    deadline = time.time() + timeout
+    while not job.is_finished and time.time() < deadline:
+        time.sleep(0.01)
+
+
+class TestIngestionJobs(unittest.TestCase):
+    def test_job_reports_progress_and_completes(self):
+        def work(job: IngestionJob):
+            for page in range(1, 4):
+                job.update_progress(page, 3, page)
+
+        job = submit_ingestion_job("report.pdf", "source_1", work)
+        _wait_for(job)
+
+        self.assertIs(get_ingestion_job(job.job_id), job)
+        self.assertEqual(job.status, IngestionJob.COMPLETED)
+        self.assertEqual(job.pages_parsed, 3)
+        self.assertEqual(job.total_pages, 3)
+        self.assertEqual(job.chunks_indexed, 3)
+        self.assertIsNone(job.error)
+
+    def test_failed_job_records_error(self):
+        def work(job: IngestionJob):
+            raise ValueError("corrupted pdf")
+
+        job = submit_ingestion_job("broken.pdf", "source_2", work)
+        _wait_for(job)
+
+        self.assertEqual(job.status, IngestionJob.FAILED)
+        self.assertIn("corrupted pdf", job.error)
+
+    def test_jobs_run_in_parallel(self):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def work(job: IngestionJob):
+            # Both jobs must be running at the same time to pass the barrier
+            barrier.wait()
+
+        jobs = [
+            submit_ingestion_job(f"file_{i}.txt", "source_3", work) for i in range(2)
+        ]
+        for job in jobs:
+            _wait_for(job)
+
+        self.assertTrue(all(job.status == IngestionJob.COMPLETED for job in jobs))
+        self.assertTrue(all(job in get_all_ingestion_jobs() for job in jobs))
+
+    def test_finished_jobs_are_forgotten_past_the_cap_and_ttl(self):
+        config = get_config()
+        config.ingestion_max_finished_jobs = 2
+        with patch("yaaaf.server.ingestion.get_config", return_value=config):
+            jobs = [
+                submit_ingestion_job(f"file_{i}.txt", "source_4", lambda job: None)
+                for i in range(3)
+            ]
+            for job in jobs:
+                _wait_for(job)
+            release = threading.Event()
+            running = submit_ingestion_job("slow.txt", "source_4", lambda job: release.wait(5))
+
+            self.assertIsNone(get_ingestion_job(jobs[0].job_id))
+            self.assertIs(get_ingestion_job(jobs[1].job_id), jobs[1])
+            self.assertIs(get_ingestion_job(jobs[2].job_id), jobs[2])
+
+            config.ingestion_job_ttl = 0.0
+            submit_ingestion_job("next.txt", "source_4", lambda job: None)
+
+            self.assertIsNone(get_ingestion_job(jobs[2].job_id))
+            self.assertIs(get_ingestion_job(running.job_id), running)
+            release.set()
+            _wait_for(running)
+
+    def test_unknown_job_returns_none(self):
+        self.assertIsNone(get_ingestion_job("does_not_exist"))
+
+
+if __name__ == "__main__":
+    unittest.main()
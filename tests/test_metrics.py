@@ -0,0 +1,126 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from fastapi.testclient import TestClient
+
+from yaaaf.components import metrics
+from yaaaf.components.data_types import ClientResponse
+from yaaaf.components.decorators import track_llm_metrics
+
+
+class _FakeClient:
+    backend = "fake"
+    model = "fake-model"
+
+    def __init__(self, fail: bool = False):
+        self._fail = fail
+
+    @track_llm_metrics
+    async def predict(self, messages, stop_sequences=None, tools=None):
+        if self._fail:
+            raise ConnectionError("backend down")
+        return ClientResponse(message="hi", prompt_tokens=12, completion_tokens=3)
+
+
+class TestMetrics(unittest.TestCase):
+    def test_counter_and_gauge_render(self):
+        registry = metrics.MetricsRegistry()
+        counter = metrics.Counter(
+            "test_requests_total", "Requests", ["route"], registry=registry
+        )
+        gauge = metrics.Gauge("test_connections", "Open connections", registry=registry)
+
+        counter.inc(route="/a")
+        counter.inc(2, route="/a")
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+
+        text = registry.render()
+        self.assertIn("# TYPE test_requests_total counter", text)
+        self.assertIn('test_requests_total{route="/a"} 3', text)
+        self.assertIn("# TYPE test_connections gauge", text)
+        self.assertIn("test_connections 1", text)
+        with self.assertRaises(ValueError):
+            counter.inc(-1, route="/a")
+        with self.assertRaises(ValueError):
+            counter.inc(other="label")
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = metrics.MetricsRegistry()
+        histogram = metrics.Histogram(
+            "test_latency_seconds",
+            "Latency",
+            ["agent"],
+            buckets=(0.1, 1.0),
+            registry=registry,
+        )
+
+        for value in (0.05, 0.5, 5.0):
+            histogram.observe(value, agent="sql")
+
+        text = registry.render()
+        self.assertIn('test_latency_seconds_bucket{agent="sql",le="0.1"} 1', text)
+        self.assertIn('test_latency_seconds_bucket{agent="sql",le="1"} 2', text)
+        self.assertIn('test_latency_seconds_bucket{agent="sql",le="+Inf"} 3', text)
+        self.assertIn('test_latency_seconds_count{agent="sql"} 3', text)
+        self.assertIn('test_latency_seconds_sum{agent="sql"} 5.55', text)
+
+    def test_llm_decorator_records_tokens_and_errors(self):
+        labels = {"backend": "fake", "model": "fake-model"}
+        requests_before = metrics.LLM_REQUESTS.get(**labels)
+        errors_before = metrics.LLM_ERRORS.get(**labels)
+        tokens_before = metrics.LLM_COMPLETION_TOKENS.get(**labels)
+
+        asyncio.run(_FakeClient().predict([]))
+        with self.assertRaises(ConnectionError):
+            asyncio.run(_FakeClient(fail=True).predict([]))
+
+        self.assertEqual(metrics.LLM_REQUESTS.get(**labels), requests_before + 2)
+        self.assertEqual(metrics.LLM_ERRORS.get(**labels), errors_before + 1)
+        self.assertEqual(
+            metrics.LLM_COMPLETION_TOKENS.get(**labels), tokens_before + 3
+        )
+        self.assertGreaterEqual(metrics.LLM_REQUEST_SECONDS.get_count(**labels), 2)
+
+    def test_metrics_endpoint(self):
+        from yaaaf.server.run import app
+
+        response = TestClient(app).get("/metrics")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/plain"))
+        self.assertIn('yaaaf_streams{state="active"}', response.text)
+        self.assertIn("# TYPE yaaaf_llm_request_duration_seconds histogram", response.text)
+        self.assertIn("yaaaf_artefacts ", response.text)
+
+    def test_rag_chunks_include_folder_text_sources(self):
+        from yaaaf.components.orchestrator_builder import OrchestratorBuilder
+        from yaaaf.server.config import ClientSettings, Settings, SourceSettings
+        from yaaaf.server.run import app
+
+        config = Settings(
+            client=ClientSettings(model="test", temperature=0.7, max_tokens=1024),
+            agents=[],
+            sources=[],
+        )
+        with tempfile.TemporaryDirectory() as folder:
+            with open(os.path.join(folder, "notes.txt"), "w") as f:
+                f.write("Metrics are sampled when the server is scraped.")
+            rag_source = OrchestratorBuilder(config)._sync_text_source(
+                SourceSettings(name="notes", type="text", path=folder)
+            )
+
+            response = TestClient(app).get("/metrics")
+
+        self.assertGreater(rag_source.get_document_count(), 0)
+        self.assertIn(
+            f'yaaaf_rag_chunks{{source="{folder}"}} {rag_source.get_document_count()}',
+            response.text,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+
+from yaaaf.components.retrievers.near_duplicates import NearDuplicateIndex
+from yaaaf.components.sources.persistent_rag_source import PersistentRAGSource
+from yaaaf.components.sources.rag_source import RAGSource
+
+_REPORT = (
+    "Revenue grew in every region during the third quarter. Europe led the growth "
+    "with new contracts in Germany and France, while sales in Asia recovered after "
+    "a slow start of the year. Operating costs stayed flat because the new "
+    "warehouse replaced two older sites. The board expects the same trend in the "
+    "fourth quarter and keeps the yearly forecast unchanged. Hiring will focus on "
+    "support staff for the expanded product line and on engineers for the data "
+    "platform that the company started building last spring."
+)
+_REVISED_REPORT = _REPORT.replace("The board expects", "The board still expects")
+_OTHER = "Cats sleep most of the day and hunt at night in the fields near the river."
+
+
+class TestNearDuplicateIndex(unittest.TestCase):
+    def test_similar_texts_are_found_and_different_ones_are_not(self):
+        index = NearDuplicateIndex(threshold=0.8)
+        index.add("report", index.signature(_REPORT))
+
+        match = index.find(index.signature(_REVISED_REPORT))
+
+        self.assertEqual(match[0], "report")
+        self.assertGreaterEqual(match[1], 0.8)
+        self.assertIsNone(index.find(index.signature(_OTHER)))
+
+    def test_chunk_headers_are_ignored(self):
+        index = NearDuplicateIndex()
+
+        self.assertTrue(
+            (index.signature(f"[a.pdf - Page 1]\n\n{_REPORT}") == index.signature(_REPORT)).all()
+        )
+
+    def test_invalid_threshold(self):
+        with self.assertRaises(ValueError):
+            NearDuplicateIndex(threshold=1.5)
+
+
+class TestRAGSourceDeduplication(unittest.TestCase):
+    def test_near_duplicates_of_other_files_are_not_indexed(self):
+        source = RAGSource("docs", "docs", near_duplicate_threshold=0.8)
+        source.add_text(_REPORT, filename="report_v1.txt")
+        source.add_text(_REVISED_REPORT, filename="report_v2.txt")
+        source.add_text(_REPORT, filename="report_v1.txt")
+        source.add_text(_OTHER, filename="cats.txt")
+
+        report = source.get_deduplication_report()
+        self.assertEqual(source.get_document_count(), 2)
+        self.assertEqual(
+            (report.chunks_seen, report.exact_duplicates, report.near_duplicates), (4, 1, 1)
+        )
+        self.assertEqual(report.examples[0][0], "report_v2.txt")
+
+    def test_disabled_by_default(self):
+        source = RAGSource("docs", "docs")
+        source.add_text(_REPORT)
+        source.add_text(_REVISED_REPORT)
+
+        self.assertEqual(source.get_document_count(), 2)
+
+    def test_removed_chunks_can_be_added_again(self):
+        source = RAGSource("docs", "docs", near_duplicate_threshold=0.8)
+        chunk_ids = source.add_pages([(None, _REPORT)], "report_v1.txt")
+        source.remove_chunks(chunk_ids)
+        source.add_pages([(None, _REVISED_REPORT)], "report_v2.txt")
+
+        self.assertEqual(source.get_document_count(), 1)
+        self.assertIn("still expects", source.get_data("board expects")[0])
+
+    def test_signatures_survive_a_reopen(self):
+        with tempfile.TemporaryDirectory() as directory:
+            pickle_path = os.path.join(directory, "rag_index.pkl")
+            source = PersistentRAGSource(
+                "docs", "docs", pickle_path, near_duplicate_threshold=0.8
+            )
+            source.add_text(_REPORT, filename="report_v1.txt")
+
+            reopened = PersistentRAGSource(
+                "docs", "docs", pickle_path, near_duplicate_threshold=0.8
+            )
+            reopened.add_text(_REVISED_REPORT, filename="report_v2.txt")
+
+            self.assertEqual(reopened.get_document_count(), 1)
+            self.assertEqual(reopened.get_deduplication_report().near_duplicates, 1)
+            self.assertTrue(
+                any(
+                    os.path.exists(os.path.join(root, "minhash.npy"))
+                    for root, _, _ in os.walk(directory)
+                )
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,13 @@
 import asyncio
 import os
 import tempfile
+import threading
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
 
 from yaaaf.components.orchestrator_builder import OrchestratorBuilder
+from yaaaf.components.sources.document_ingestion import DocumentIngestor
 from yaaaf.server.config import Settings, SourceSettings, ClientSettings
 
 
@@ -141,32 +145,26 @@ class TestOrchestratorBuilder(unittest.IsolatedAsyncioTestCase):
             # Verify texts were added (check that vector DB has content)
             self.assertGreater(len(rag_source._id_to_chunk), 0)
 
-    def test_load_text_from_file_with_encoding(self):
-        """Test that the text loading handles different encodings correctly."""
-        # Create a temporary file with UTF-8 content
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".txt", delete=False, encoding="utf-8"
-        ) as temp_file:
-            temp_file.write("Test content with Unicode: café, naïve, résumé")
-            temp_file_path = temp_file.name
-
-        try:
-            config = Settings(
-                client=ClientSettings(model="test", temperature=0.7, max_tokens=1024),
-                agents=[],
-                sources=[],
-            )
-            builder = OrchestratorBuilder(config)
+    def test_different_folders_sync_in_parallel(self):
+        config = Settings(
+            client=ClientSettings(model="test", temperature=0.7, max_tokens=1024),
+            agents=[],
+            sources=[],
+        )
+        builder = OrchestratorBuilder(config)
+        barrier = threading.Barrier(2, timeout=5)
 
-            # Test loading the file
-            content = builder._load_text_from_file(temp_file_path)
-            self.assertIn("café", content)
-            self.assertIn("naïve", content)
-            self.assertIn("résumé", content)
+        with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as second:
+            source_configs = [
+                SourceSettings(name=f"folder {i}", type="text", path=path)
+                for i, path in enumerate([first, second])
+            ]
+            # Each sync only returns once the other one is running too
+            with patch.object(DocumentIngestor, "_sync", side_effect=lambda: barrier.wait()):
+                with ThreadPoolExecutor(max_workers=2) as pool:
+                    sources = list(pool.map(builder._sync_text_source, source_configs))
 
-        finally:
-            if os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
+        self.assertEqual([source.source_path for source in sources], [first, second])
 
     async def test_rag_agent_integration_with_archaeology_file(self):
         """Integration test: Test document retriever agent with the actual archaeology file."""
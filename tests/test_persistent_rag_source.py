@@ -0,0 +1,162 @@
+import json
+import os
+import pickle
+import tempfile
+import unittest
+
+from yaaaf.components.retrievers.local_vector_db import BM25LocalDB
+from yaaaf.components.sources.persistent_rag_source import (
+    PersistentRAGSource,
+    get_persistent_rag_source,
+)
+from yaaaf.server.config import ClientSettings, Settings, SourceSettings
+
+_TEXTS = [
+    "The quarterly report shows revenue growth in Europe",
+    "Cats sleep most of the day and hunt at night",
+    "The river floods every spring after the snow melts",
+]
+
+
+class TestPersistentRAGSource(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self._directory.cleanup)
+        self.pickle_path = os.path.join(self._directory.name, "rag_index.pkl")
+        self.store_path = os.path.join(self._directory.name, "rag_index.segments")
+
+    def _open(self, **kwargs) -> PersistentRAGSource:
+        return PersistentRAGSource("Knowledge base", "persistent_rag", self.pickle_path, **kwargs)
+
+    def _manifest(self) -> dict:
+        with open(os.path.join(self.store_path, "manifest.json")) as f:
+            return json.load(f)
+
+    def test_each_add_appends_a_segment(self):
+        source = self._open()
+        for text in _TEXTS:
+            source.add_text(text)
+
+        self.assertEqual(len(self._manifest()["segments"]), len(_TEXTS))
+        self.assertFalse(os.path.exists(self.pickle_path))
+
+    def test_reopened_source_answers_the_same(self):
+        source = self._open()
+        for text in _TEXTS:
+            source.add_text(text)
+
+        reopened = self._open()
+
+        self.assertEqual(reopened.get_document_count(), len(_TEXTS))
+        self.assertEqual(reopened.get_data("river snow"), source.get_data("river snow"))
+        self.assertEqual(reopened.get_data("river snow")[0], _TEXTS[2])
+        reopened.add_text("Dogs chase cats in the park")
+        self.assertEqual(self._open().get_document_count(), len(_TEXTS) + 1)
+
+    def test_chunk_metadata_survives_reopening(self):
+        source = self._open()
+        source.add_text(_TEXTS[0], filename="report.txt")
+        source.add_text(_TEXTS[1], filename="cats.txt")
+        source.compact()
+
+        reopened = self._open()
+
+        sources = sorted(metadata["source"] for metadata in reopened._id_to_metadata.values())
+        self.assertEqual(sources, ["cats.txt", "report.txt"])
+
+    def test_compaction_merges_segments(self):
+        source = self._open(max_segments=100)
+        for text in _TEXTS:
+            source.add_text(text)
+        source.add_text(_TEXTS[0])  # already stored, nothing new to write
+
+        source.compact()
+
+        self.assertEqual(self._manifest()["segments"], ["seg-000004"])
+        self.assertEqual(sorted(os.listdir(self.store_path)), ["manifest.json", "seg-000004"])
+        self.assertEqual(source.get_data("cats night")[0], _TEXTS[1])
+        reopened = self._open()
+        self.assertEqual(reopened.get_document_count(), len(_TEXTS))
+        self.assertEqual(reopened.get_data("revenue")[0], _TEXTS[0])
+
+    def test_background_compaction_keeps_segment_count_bounded(self):
+        source = self._open(max_segments=2)
+        for text in _TEXTS:
+            source.add_text(text)
+        source._compaction_thread.join(timeout=10)
+
+        self.assertEqual(source.get_segment_count(), 1)
+        self.assertEqual(self._open().get_document_count(), len(_TEXTS))
+
+    def test_interrupted_writes_are_ignored(self):
+        source = self._open()
+        source.add_text(_TEXTS[0])
+        # A segment and a manifest whose writes never completed
+        os.makedirs(os.path.join(self.store_path, "seg-000002.tmp-dead"))
+        with open(os.path.join(self.store_path, "manifest.json.tmp-dead"), "w") as f:
+            f.write("{")
+
+        reopened = self._open()
+
+        self.assertEqual(reopened.get_document_count(), 1)
+        self.assertEqual(sorted(os.listdir(self.store_path)), ["manifest.json", "seg-000001"])
+
+    def test_terms_of_another_analyzer_are_recomputed(self):
+        source = self._open()
+        for text in _TEXTS:
+            source.add_text(text)
+        manifest = self._manifest()
+        manifest["analyzer"] = None  # written before analyzers were recorded
+        with open(os.path.join(self.store_path, "manifest.json"), "w") as f:
+            json.dump(manifest, f)
+
+        self._open()
+        reopened = self._open()
+
+        self.assertEqual(self._manifest()["analyzer"], reopened._vector_db.analyzer.name)
+        self.assertEqual(reopened.get_segment_count(), 1)
+        self.assertEqual(reopened.get_data("REVENUE")[0], _TEXTS[0])
+
+    def test_migrates_a_legacy_pickle(self):
+        vector_db = BM25LocalDB()
+        id_to_chunk = {}
+        for number, text in enumerate(_TEXTS):
+            vector_db.add_text_and_index(text, f"chunk{number}")
+            id_to_chunk[f"chunk{number}"] = text
+        with open(self.pickle_path, "wb") as f:
+            pickle.dump({"vector_db": vector_db, "id_to_chunk": id_to_chunk}, f)
+
+        self._open()
+        reopened = self._open()
+
+        self.assertEqual(reopened.get_document_count(), len(_TEXTS))
+        self.assertEqual(reopened.get_data("revenue Europe")[0], _TEXTS[0])
+
+    def test_configured_source_is_opened_once_and_shared(self):
+        def settings(sources):
+            return Settings(
+                client=ClientSettings(model="test", temperature=0.7, max_tokens=1024),
+                agents=[],
+                sources=sources,
+            )
+
+        rag = SourceSettings(name="kb", type="rag", path=self.pickle_path)
+        source = get_persistent_rag_source(settings([rag]))
+
+        self.assertIsInstance(source, PersistentRAGSource)
+        self.assertIs(get_persistent_rag_source(settings([rag])), source)
+        self.assertIsNone(get_persistent_rag_source(settings([])))
+
+    def test_clear_and_description_are_persisted(self):
+        source = self._open()
+        source.add_text(_TEXTS[0])
+        source.set_description("Updated")
+        source.clear()
+
+        self.assertEqual(self._manifest()["description"], "Updated")
+        self.assertEqual(self._manifest()["segments"], [])
+        self.assertEqual(self._open().get_document_count(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import csv
+import os
+import tempfile
+import unittest
+
+from yaaaf.components.retrievers.planner_example_index import (
+    PlannerExampleIndex,
+    file_sha256,
+)
+from yaaaf.components.retrievers.planner_example_retriever import PlannerExampleRetriever
+
+_ROWS = [
+    ("Query the sales database and plot revenue", "assets:\n  sales: {}", "['SqlAgent', 'VisualizationAgent']"),
+    ("Search the web for sales trends", "assets:\n  trends: {}", "['DuckDuckGoSearchAgent']"),
+    ("Summarize the sales database", "assets:\n  summary: {}", "SqlAgent,AnswererAgent"),
+    ("Write a poem about the sea", "assets:\n  poem: {}", "['AnswererAgent']"),
+    ("", "assets: {}", "['AnswererAgent']"),
+]
+
+
+class TestPlannerExampleIndex(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self._directory.cleanup)
+        self.csv_path = os.path.join(self._directory.name, "planner_dataset.csv")
+        with open(self.csv_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["scenario", "workflow_yaml", "agents_used"])
+            writer.writerows(_ROWS)
+        self.index_path = os.path.join(self._directory.name, "planner_examples.index")
+
+    def _build(self) -> PlannerExampleIndex:
+        index = PlannerExampleIndex.build(self.csv_path, self.index_path)
+        self.addCleanup(index.close)
+        return index
+
+    def test_build_and_reopen(self):
+        built = self._build()
+        reopened = PlannerExampleIndex(self.index_path)
+        self.addCleanup(reopened.close)
+
+        self.assertEqual(len(reopened), 4)
+        self.assertEqual(reopened.search("sales database", 2), built.search("sales database", 2))
+        self.assertEqual(reopened.get_example(3), ("Write a poem about the sea", "assets:\n  poem: {}"))
+        self.assertTrue(PlannerExampleIndex.is_current(self.index_path, file_sha256(self.csv_path)))
+        self.assertFalse(PlannerExampleIndex.is_current(self.index_path, "0" * 64))
+
+    def test_agent_mask_filters_examples(self):
+        index = self._build()
+        mask = index.get_agent_mask(["SqlAgent", "AnswererAgent", "UnknownAgent"])
+
+        results = [index.get_example(position)[0] for position in index.search("sales", 5, mask)]
+
+        self.assertEqual(results, ["Summarize the sales database"])
+        self.assertEqual(index.count_allowed(mask), 2)
+        self.assertEqual(len(index.search("sales", 5)), 3)
+        self.assertEqual(index.search("sales", 5, index.get_agent_mask([])), [])
+
+    def test_retrievers_share_one_index(self):
+        index = self._build()
+        previous = PlannerExampleRetriever._index
+        PlannerExampleRetriever._index = index
+        self.addCleanup(setattr, PlannerExampleRetriever, "_index", previous)
+
+        sql_only = PlannerExampleRetriever(["SqlAgent", "VisualizationAgent"])
+        everything = PlannerExampleRetriever()
+
+        self.assertIs(sql_only._example_index, everything._example_index)
+        self.assertEqual(
+            [scenario for scenario, _ in sql_only.get_examples("sales", topn=5)],
+            ["Query the sales database and plot revenue"],
+        )
+        self.assertEqual(len(everything.get_examples("sales", topn=5)), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
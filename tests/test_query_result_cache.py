@@ -0,0 +1,96 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+
+from yaaaf.components.executors.sql_executor import SQLExecutor
+from yaaaf.components.sources.query_result_cache import QueryResultCache, normalize_sql
+from yaaaf.components.sources.sqlite_pool import close_connection_pool
+from yaaaf.components.sources.sqlite_source import SqliteSource
+
+
+class TestNormalizeSql(unittest.TestCase):
+    def test_formatting_differences_are_ignored(self):
+        self.assertEqual(
+            normalize_sql("select  Name,COUNT(*) from T\n where x>=1.50 -- recent\n;"),
+            normalize_sql("SELECT name, count( * ) FROM t WHERE x >= 1.5"),
+        )
+
+    def test_values_that_differ_stay_different(self):
+        self.assertNotEqual(normalize_sql("SELECT 'A'"), normalize_sql("SELECT 'a'"))
+        self.assertNotEqual(normalize_sql("SELECT 1 / 2"), normalize_sql("SELECT 1.0 / 2"))
+        self.assertNotEqual(normalize_sql('SELECT "Name"'), normalize_sql('SELECT "name"'))
+
+
+class TestQueryResultCache(unittest.TestCase):
+    def test_least_recently_used_entries_are_evicted_by_size(self):
+        cache = QueryResultCache(max_bytes=100)
+        cache.put(("db", 1, "a"), "a", 40)
+        cache.put(("db", 1, "b"), "b", 40)
+        cache.get(("db", 1, "a"))
+        cache.put(("db", 1, "c"), "c", 40)
+
+        self.assertEqual(cache.get(("db", 1, "a")), "a")
+        self.assertIsNone(cache.get(("db", 1, "b")))
+        self.assertEqual(cache.get_size_bytes(), 80)
+
+    def test_dropped_values_are_released(self):
+        released = []
+
+        class Value:
+            def __init__(self, name):
+                self.name = name
+
+            def release(self):
+                released.append(self.name)
+
+        cache = QueryResultCache(max_bytes=100)
+        cache.put(cache.make_key("db", 1, "SELECT a"), Value("a"), 40)
+        cache.put(cache.make_key("db", 1, "SELECT b"), Value("b"), 40)
+        cache.put(cache.make_key("db", 1, "SELECT b"), Value("new b"), 40)
+        cache.put(cache.make_key("db", 1, "SELECT c"), Value("c"), 40)
+        cache.invalidate("db")
+
+        self.assertEqual(released, ["b", "a", "new b", "c"])
+        self.assertEqual(cache.get_size_bytes(), 0)
+
+
+class TestSQLExecutorResultCache(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp_dir.cleanup)
+        self.db_path = os.path.join(self._tmp_dir.name, "test.db")
+        self.addCleanup(close_connection_pool, self.db_path)
+        self.source = SqliteSource(name="numbers", db_path=self.db_path)
+        self.source.ingest(pd.DataFrame({"value": range(10)}), "numbers")
+        self.cache = QueryResultCache()
+        self.executor = SQLExecutor([self.source], result_cache=self.cache)
+
+    def _total(self, query: str) -> int:
+        result, error = asyncio.run(self.executor.execute_operation(query, {}))
+        self.assertIsNone(error)
+        return result.data["total"][0]
+
+    def test_repeated_queries_are_answered_from_the_cache_until_a_write(self):
+        with patch.object(self.executor, "_fetch_result", wraps=self.executor._fetch_result) as fetch:
+            self.assertEqual(self._total("SELECT SUM(value) AS total FROM numbers"), 45)
+            self.assertEqual(self._total("select sum(value) as total\nfrom numbers;"), 45)
+            self.assertEqual(fetch.call_count, 1)
+
+            self.source.ingest(pd.DataFrame({"value": [100]}), "numbers", if_exists="append")
+            self.assertEqual(len(self.cache), 0)
+            self.assertEqual(self._total("SELECT SUM(value) AS total FROM numbers"), 145)
+
+            # Writes by another connection change the data version too
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("INSERT INTO numbers VALUES (1000)")
+            self.assertEqual(self._total("SELECT SUM(value) AS total FROM numbers"), 1145)
+            self.assertEqual(fetch.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import math
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from yaaaf.components.sources.result_spool import ResultSpool, ResultSpoolWriter
+
+
+class TestResultSpool(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp_dir.cleanup)
+
+    def test_pages_span_row_groups_with_changing_types(self):
+        writer = ResultSpoolWriter(["id", "value", "id"], directory=self._tmp_dir.name)
+        writer.append(pd.DataFrame([(0, 1.5, 10), (1, None, 11)]))
+        # SQLite lets a column change type between rows
+        writer.append(pd.DataFrame([(2, "text|with\nnewline", 12), (3, None, 13)]))
+        writer.append(pd.DataFrame([(4, 2.5, 14)]))
+        spool = writer.close()
+
+        page = ResultSpool(spool.path).read_rows(offset=1, limit=3)
+
+        self.assertEqual(len(spool), 5)
+        self.assertEqual(list(page.columns), ["id", "value", "id"])
+        self.assertEqual(page.iloc[:, 0].tolist(), [1, 2, 3])
+        self.assertTrue(math.isnan(page["value"][0]))
+        self.assertEqual(page["value"][1], "text|with\nnewline")
+        self.assertIsNone(page["value"][2])
+        self.assertEqual(page.iloc[:, 2].tolist(), [11, 12, 13])
+
+    def test_numeric_columns_keep_their_types(self):
+        writer = ResultSpoolWriter(["n", "x"], directory=self._tmp_dir.name)
+        writer.append(pd.DataFrame({"n": np.arange(5), "x": np.linspace(0, 1, 5)}))
+        spool = writer.close()
+
+        page = spool.read_rows(0, 10)
+
+        self.assertEqual(page["n"].dtype, np.int64)
+        self.assertEqual(page["x"].tolist(), [0.0, 0.25, 0.5, 0.75, 1.0])
+        self.assertTrue(spool.read_rows(5, 10).empty)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import asyncio
+import time
+import unittest
+
+from yaaaf.components.retrievers.retrieval_coordinator import RetrievalCoordinator
+from yaaaf.components.sources.rag_source import RAGSource
+
+
+def _source(*texts: str) -> RAGSource:
+    source = RAGSource("docs", "docs")
+    for text in texts:
+        source.add_text(text)
+    return source
+
+
+class _CountingSource(RAGSource):
+    def __init__(self, *texts: str, delay: float = 0.0):
+        super().__init__("docs", "docs")
+        self.calls = 0
+        self.delay = delay
+        for text in texts:
+            self.add_text(text)
+
+    def get_scored_data(self, query, topn=10):
+        self.calls += 1
+        time.sleep(self.delay)
+        return super().get_scored_data(query, topn)
+
+
+class TestRetrievalCoordinator(unittest.TestCase):
+    def test_scores_are_normalized_before_the_global_merge(self):
+        small = _source("red bicycle", "blue car", "green tree")
+        big = _source(
+            "red apple pie",
+            *[f"red apple filler {i}" for i in range(190)],
+            *[f"filler {i}" for i in range(10)],
+        )
+        coordinator = RetrievalCoordinator([small, big])
+        raw_small = small._vector_db.get_indices_from_text("red apple", 1)[1][0]
+        raw_big = big._vector_db.get_indices_from_text("red apple", 1)[1][0]
+
+        passages = asyncio.run(coordinator.search("red apple", topn=200))
+
+        # Raw BM25 would rank the partial match of the small source first
+        self.assertGreater(raw_small, raw_big)
+        self.assertEqual((passages[0].text, passages[0].source_index), ("red apple pie", 1))
+        self.assertEqual((passages[-1].text, passages[-1].source_index), ("red bicycle", 0))
+        self.assertTrue(all(0 < passage.score <= 1 for passage in passages))
+
+    def test_results_are_cached_until_the_source_changes(self):
+        first = _CountingSource("cats purr")
+        second = _CountingSource("dogs bark")
+        coordinator = RetrievalCoordinator([first, second])
+
+        asyncio.run(coordinator.search("cats", topn=3))
+        asyncio.run(coordinator.search("cats", topn=3))
+        second.add_text("cats and dogs")
+        passages = asyncio.run(coordinator.search("cats", topn=3))
+
+        self.assertEqual((first.calls, second.calls), (1, 2))
+        self.assertEqual(len(passages), 2)
+
+    def test_sources_are_queried_concurrently(self):
+        sources = [_CountingSource(f"document {i}", delay=0.2) for i in range(4)]
+        coordinator = RetrievalCoordinator(sources)
+
+        started = time.perf_counter()
+        asyncio.run(coordinator.search("document", topn=4, source_indices=[0, 1, 2, 3]))
+
+        self.assertLess(time.perf_counter() - started, 0.6)
+        self.assertTrue(all(source.calls == 1 for source in sources))
+
+
+if __name__ == "__main__":
+    unittest.main()
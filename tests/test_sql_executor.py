@@ -0,0 +1,317 @@
+import asyncio
+import gc
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+
+from yaaaf.components.executors.sql_executor import SQLExecutor, referenced_tables
+from yaaaf.components.executors.sql_preflight import preflight
+from yaaaf.components.sources.query_result_cache import QueryResultCache
+from yaaaf.components.sources.sqlite_pool import close_connection_pool
+from yaaaf.components.sources.sqlite_source import SqliteSource
+
+_ENDLESS_QUERY = """
+WITH RECURSIVE counter(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM counter)
+SELECT COUNT(*) FROM counter
+"""
+
+
+class TestSQLExecutor(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp_dir.cleanup)
+        self.db_path = os.path.join(self._tmp_dir.name, "test.db")
+        self.addCleanup(close_connection_pool, self.db_path)
+        self.source = SqliteSource(name="numbers", db_path=self.db_path)
+        self.source.ingest(pd.DataFrame({"value": range(10)}), "numbers")
+
+    def test_query_result(self):
+        executor = SQLExecutor([self.source])
+
+        result, error = asyncio.run(
+            executor.execute_operation("SELECT SUM(value) AS total FROM numbers", {})
+        )
+
+        self.assertIsNone(error)
+        self.assertEqual(result.data["total"][0], 45)
+        self.assertEqual((result.total_rows, result.truncated, result.spool), (1, False, None))
+
+    def test_large_result_is_spooled_to_disk_and_paged(self):
+        self.source.ingest(
+            pd.DataFrame({"id": range(250), "name": [f"row {i}" for i in range(250)]}), "rows"
+        )
+        executor = SQLExecutor([self.source], preview_rows=30, batch_size=40)
+
+        result, error = asyncio.run(executor.execute_operation("SELECT * FROM rows", {}))
+        artefact = executor.transform_to_artifact(result, "SELECT * FROM rows", "rows")
+
+        self.assertIsNone(error)
+        self.assertEqual((len(result.data), result.total_rows, result.truncated), (30, 250, False))
+        self.assertEqual(len(result.spool), 250)
+        page = artefact.get_rows(offset=195, limit=10)
+        self.assertEqual(page["id"].tolist(), list(range(195, 205)))
+        self.assertEqual(page["name"][0], "row 195")
+
+    def test_result_beyond_max_rows_is_truncated_with_the_total_count(self):
+        self.source.ingest(pd.DataFrame({"id": range(250)}), "rows")
+        executor = SQLExecutor([self.source], preview_rows=10, max_rows=100, batch_size=40)
+
+        result, error = asyncio.run(executor.execute_operation("SELECT * FROM rows;", {}))
+
+        self.assertIsNone(error)
+        self.assertEqual((len(result.data), result.total_rows, result.truncated), (10, 250, True))
+        self.assertEqual(len(result.spool), 100)
+        self.assertIn("first 10 of 250 rows", str(result))
+
+    def test_rows_are_counted_for_queries_ending_in_a_comment(self):
+        self.source.ingest(pd.DataFrame({"id": range(250)}), "rows")
+        executor = SQLExecutor([self.source], preview_rows=10, max_rows=100, batch_size=40)
+
+        result, error = asyncio.run(
+            executor.execute_operation("SELECT * FROM rows; -- all rows", {})
+        )
+
+        self.assertIsNone(error)
+        self.assertEqual((result.total_rows, result.truncated), (250, True))
+        self.assertEqual(self.source.count_rows("SELECT * FROM rows /* all */ -- rows"), 250)
+
+    def test_spool_is_counted_and_deleted_by_the_result_cache(self):
+        self.source.ingest(pd.DataFrame({"id": range(250)}), "rows")
+        result_cache = QueryResultCache()
+        executor = SQLExecutor(
+            [self.source], preview_rows=10, batch_size=40, result_cache=result_cache
+        )
+
+        result, _ = asyncio.run(executor.execute_operation("SELECT * FROM rows", {}))
+        artefact = executor.transform_to_artifact(result, "SELECT * FROM rows", "rows")
+        size = result.get_size_bytes()
+        self.assertGreater(result.spool.size_bytes, 0)
+        self.assertEqual(result_cache.get_size_bytes(), size)
+
+        # A cache with room for one result evicts the first spool for the second
+        result_cache.set_max_bytes(size + size // 2)
+        other, _ = asyncio.run(executor.execute_operation("SELECT id + 1 FROM rows", {}))
+        self.assertFalse(os.path.exists(result.spool.path))
+        self.assertTrue(os.path.exists(other.spool.path))
+        with self.assertRaises(FileNotFoundError):
+            artefact.get_rows(offset=240, limit=5)
+
+        result_cache.invalidate(self.db_path)
+        self.assertFalse(os.path.exists(other.spool.path))
+        self.assertEqual(result_cache.get_size_bytes(), 0)
+
+    def test_uncached_spool_is_deleted_once_no_artefact_refers_to_it(self):
+        self.source.ingest(pd.DataFrame({"id": range(250)}), "rows")
+        executor = SQLExecutor(
+            [self.source], preview_rows=10, batch_size=40, result_cache=QueryResultCache(0)
+        )
+
+        result, _ = asyncio.run(executor.execute_operation("SELECT * FROM rows", {}))
+        artefact = executor.transform_to_artifact(result, "SELECT * FROM rows", "rows")
+        path = result.spool.path
+        del result
+        gc.collect()
+
+        page = artefact.get_rows(offset=240, limit=5)
+        self.assertEqual(page["id"].tolist(), list(range(240, 245)))
+        del artefact
+        gc.collect()
+        self.assertFalse(os.path.exists(path))
+
+    def test_failed_query_leaves_no_partial_spool(self):
+        self.source.ingest(pd.DataFrame({"id": range(250)}), "rows")
+        spool_directory = os.path.join(self._tmp_dir.name, "spools")
+        os.mkdir(spool_directory)
+        executor = SQLExecutor([self.source], preview_rows=10, batch_size=40)
+        # abs() of the smallest integer overflows once the first batches are spooled
+        query = "SELECT CASE WHEN id < 200 THEN id ELSE abs(-9223372036854775808) END FROM rows"
+
+        with patch("tempfile.tempdir", spool_directory):
+            result, error = asyncio.run(executor.execute_operation(query, {}))
+
+        self.assertIsNone(result)
+        self.assertIn("integer overflow", error)
+        self.assertEqual(os.listdir(spool_directory), [])
+
+    def test_sql_errors_are_reported(self):
+        result, error = asyncio.run(
+            SQLExecutor([self.source], preflight=False).execute_operation(
+                "SELECT * FROM missing", {}
+            )
+        )
+
+        self.assertIsNone(result)
+        self.assertIn("no such table: missing", error)
+
+    def test_slow_query_is_interrupted_with_a_timeout_message(self):
+        executor = SQLExecutor([self.source], query_timeout=0.2)
+
+        started = time.perf_counter()
+        result, error = asyncio.run(executor.execute_operation(_ENDLESS_QUERY, {}))
+
+        self.assertLess(time.perf_counter() - started, 5)
+        self.assertIsNone(result)
+        self.assertIn("more than 0.2 seconds", error)
+
+    def test_event_loop_is_not_blocked_and_cancellation_stops_the_query(self):
+        executor = SQLExecutor([self.source], query_timeout=60)
+
+        async def run():
+            task = asyncio.create_task(executor.execute_operation(_ENDLESS_QUERY, {}))
+            ticks = 0
+            for _ in range(5):
+                await asyncio.sleep(0.02)
+                ticks += 1
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            return ticks
+
+        self.assertEqual(asyncio.run(run()), 5)
+        # The reader was handed back, so the next query gets one without waiting
+        started = time.perf_counter()
+        result, error = asyncio.run(
+            executor.execute_operation("SELECT COUNT(*) AS n FROM numbers", {})
+        )
+        self.assertIsNone(error)
+        self.assertEqual(result.data["n"][0], 10)
+        self.assertLess(time.perf_counter() - started, 5)
+
+
+class TestPreflight(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp_dir.cleanup)
+        self.db_path = os.path.join(self._tmp_dir.name, "test.db")
+        self.addCleanup(close_connection_pool, self.db_path)
+        self.source = SqliteSource(name="shop", db_path=self.db_path)
+        self.source.ingest(
+            pd.DataFrame({"id": range(5000), "customer_id": range(5000)}), "orders"
+        )
+        self.source.ingest(
+            pd.DataFrame({"id": range(5000), "name": [f"c{i}" for i in range(5000)]}),
+            "customers",
+        )
+        self.executor = SQLExecutor([self.source], result_cache=QueryResultCache())
+
+    def _error(self, query: str) -> str:
+        with patch.object(self.executor, "_fetch_result") as fetch:
+            result, error = asyncio.run(self.executor.execute_operation(query, {}))
+        self.assertIsNone(result)
+        fetch.assert_not_called()
+        return error
+
+    def test_unknown_names_get_suggestions(self):
+        self.assertEqual(
+            self._error("SELECT * FROM ordrs"),
+            "Table ordrs does not exist. Did you mean orders? "
+            "Available tables: customers, orders.",
+        )
+        self.assertIn(
+            "Did you mean customer_id?", self._error("SELECT custmer_id FROM orders")
+        )
+        self.assertIn(
+            "Did you mean c.name?",
+            self._error("SELECT c.nme FROM orders o JOIN customers c ON o.customer_id = c.id"),
+        )
+
+    def test_ambiguous_columns_are_explained(self):
+        error = self._error(
+            "SELECT id FROM orders JOIN customers ON orders.customer_id = customers.id"
+        )
+
+        self.assertIn("Column id is in several tables of the query", error)
+        self.assertIn("customers.id or orders.id", error)
+
+    def test_cartesian_products_of_large_tables_are_rejected(self):
+        error = self._error("SELECT o.id, c.name FROM orders o, customers c")
+
+        self.assertIn("orders (5,000 rows) with every row of customers (5,000 rows)", error)
+
+        result, error = asyncio.run(
+            self.executor.execute_operation(
+                "SELECT COUNT(*) AS n FROM orders o JOIN customers c ON o.customer_id = c.id",
+                {},
+            )
+        )
+        self.assertIsNone(error)
+        self.assertEqual(result.data["n"][0], 5000)
+
+    def test_range_joins_are_not_mistaken_for_cartesian_products(self):
+        for query in [
+            "SELECT * FROM orders o LEFT JOIN customers c ON o.customer_id < c.id",
+            "SELECT * FROM orders o, customers c WHERE o.id BETWEEN c.id - 1 AND c.id + 1",
+            "SELECT * FROM orders, customers WHERE customer_id > customers.id AND name = 'c1'",
+        ]:
+            self.assertIsNone(preflight(self.source, query), query)
+
+        error = preflight(
+            self.source, "SELECT * FROM orders o, customers c WHERE o.id < 10 AND c.name > 'c'"
+        )
+        self.assertIn("because no join condition links them", error)
+
+
+class TestReferencedTables(unittest.TestCase):
+    def test_tables_after_from_and_join(self):
+        query = """
+            SELECT * FROM main.Orders o, "Customers" AS c
+            LEFT JOIN items i ON i.order_id = o.id
+            WHERE o.id IN (SELECT order_id FROM refunds)
+        """
+        self.assertEqual(
+            referenced_tables(query), {"orders", "customers", "items", "refunds"}
+        )
+
+    def test_common_table_expressions_and_table_functions_are_skipped(self):
+        query = """
+            WITH totals(region, amount) AS (SELECT region, SUM(amount) FROM sales GROUP BY region)
+            SELECT * FROM totals JOIN read_csv('x.csv') ON 1 = 1
+        """
+        self.assertEqual(referenced_tables(query), {"sales"})
+
+
+class TestSourceRouting(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp_dir.cleanup)
+        self.sources = []
+        for name, table in [("first", "alpha"), ("second", "beta"), ("third", "beta")]:
+            db_path = os.path.join(self._tmp_dir.name, f"{name}.db")
+            self.addCleanup(close_connection_pool, db_path)
+            source = SqliteSource(name=name, db_path=db_path)
+            source.ingest(pd.DataFrame({"source": [name]}), table)
+            self.sources.append(source)
+        self.executor = SQLExecutor(self.sources, result_cache=QueryResultCache())
+
+    def test_query_goes_only_to_the_source_owning_its_tables(self):
+        with patch.object(
+            self.executor, "_fetch_result", wraps=self.executor._fetch_result
+        ) as fetch:
+            result, error = asyncio.run(
+                self.executor.execute_operation("SELECT source FROM alpha", {})
+            )
+
+        self.assertIsNone(error)
+        self.assertEqual(result.data["source"][0], "first")
+        self.assertEqual([call.args[0].name for call in fetch.call_args_list], ["first"])
+
+    def test_ambiguous_query_runs_on_every_candidate(self):
+        self.assertEqual(
+            [source.name for source in self.executor._route_query("SELECT * FROM beta")],
+            ["second", "third"],
+        )
+
+        result, error = asyncio.run(
+            self.executor.execute_operation("SELECT source FROM beta", {})
+        )
+
+        self.assertIsNone(error)
+        self.assertIn(result.data["source"][0], {"second", "third"})
+
+
+if __name__ == "__main__":
+    unittest.main()
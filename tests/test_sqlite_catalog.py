@@ -0,0 +1,71 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+
+from yaaaf.components.data_types import Messages
+from yaaaf.components.executors.sql_executor import SQLExecutor
+from yaaaf.components.sources import sqlite_catalog
+from yaaaf.components.sources.sqlite_pool import close_connection_pool
+from yaaaf.components.sources.sqlite_source import SqliteSource
+
+
+class TestSchemaCatalog(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp_dir.cleanup)
+        self.db_path = os.path.join(self._tmp_dir.name, "test.db")
+        self.addCleanup(close_connection_pool, self.db_path)
+        self.source = SqliteSource(name="finds", db_path=self.db_path)
+        self.source.ingest(
+            pd.DataFrame(
+                {
+                    "id": [1, 2, 3, 4],
+                    "kind": ["coin", "pot", "coin", "bone"],
+                    "depth": [0.5, 1.0, 1.5, 2.0],
+                }
+            ),
+            "finds",
+        )
+
+    def test_catalog_has_types_counts_and_samples(self):
+        table = self.source.get_catalog().tables["finds"]
+
+        self.assertEqual(table.row_count, 4)
+        self.assertEqual(
+            [(column.name, column.type) for column in table.columns],
+            [("id", "INTEGER"), ("kind", "TEXT"), ("depth", "REAL")],
+        )
+        self.assertEqual(table.columns[1].sample_values, ["coin", "pot", "bone"])
+        self.assertIn("# Table finds (4 rows)", self.source.get_description())
+        self.assertIn("| kind | TEXT | coin, pot, bone |", self.source.get_description())
+
+    def test_catalog_is_read_once_until_the_database_changes(self):
+        with patch.object(sqlite_catalog, "read_catalog", wraps=sqlite_catalog.read_catalog) as read:
+            first = self.source.get_catalog()
+            second = SqliteSource(name="finds", db_path=self.db_path).get_catalog()
+            self.assertIs(first, second)
+            self.assertEqual(read.call_count, 1)
+
+            self.source.ingest(pd.DataFrame({"a": [1]}), "other")
+            self.assertIn("other", self.source.get_catalog().tables)
+
+            # Rows written by another connection are noticed too
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("INSERT INTO finds VALUES (5, 'nail', 2.5)")
+            self.assertEqual(self.source.get_catalog().tables["finds"].row_count, 5)
+            self.assertEqual(read.call_count, 3)
+
+    def test_executor_context_carries_the_schema(self):
+        context = asyncio.run(SQLExecutor([self.source]).prepare_context(Messages()))
+
+        self.assertIn("Source: finds", context["schema"])
+        self.assertIn("# Table finds", context["schemas"]["finds"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import io
+import os
+import sqlite3
+import tempfile
+import unittest
+
+import pandas as pd
+
+from yaaaf.components.sources.sqlite_source import SqliteSource
+from yaaaf.components.sources.sqlite_ingestion import (
+    clean_column_names,
+    infer_sqlite_schema,
+)
+
+
+class TestSqliteIngestion(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self._tmp_dir.name, "test.db")
+        self.source = SqliteSource(name="test", db_path=self.db_path)
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def _query(self, sql: str):
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute(sql).fetchall()
+
+    def test_csv_is_loaded_in_chunks_with_sample_schema(self):
+        csv = "id,Find Type,depth (m)\n" + "".join(
+            f"{i},type_{i % 3},{i * 0.5}\n" for i in range(10)
+        )
+        stats = self.source.ingest_file(
+            io.BytesIO(csv.encode("utf-8")), "csv", "finds", chunksize=3
+        )
+
+        self.assertEqual(stats.rows_inserted, 10)
+        self.assertEqual(
+            stats.columns, {"id": "INTEGER", "Find_Type": "TEXT", "depth_m": "REAL"}
+        )
+        self.assertGreater(stats.rows_per_second, 0)
+        self.assertEqual(self._query("SELECT COUNT(*) FROM finds"), [(10,)])
+        self.assertEqual(
+            self._query("SELECT Find_Type FROM finds WHERE id = 4"), [("type_1",)]
+        )
+
+    def test_append_and_replace(self):
+        csv = b"a,b\n1,x\n2,y\n"
+        self.source.ingest_file(io.BytesIO(csv), "csv", "t")
+        self.source.ingest_file(io.BytesIO(csv), "csv", "t", if_exists="append")
+        self.assertEqual(self._query("SELECT COUNT(*) FROM t"), [(4,)])
+
+        self.source.ingest_file(io.BytesIO(csv), "csv", "t", if_exists="replace")
+        self.assertEqual(self._query("SELECT COUNT(*) FROM t"), [(2,)])
+
+    def test_latin1_fallback(self):
+        csv = "name,city\nJosé,São Paulo\n".encode("latin-1")
+        stats = self.source.ingest_file(io.BytesIO(csv), "csv", "people")
+        self.assertEqual(stats.rows_inserted, 1)
+        self.assertEqual(self._query("SELECT city FROM people"), [("São Paulo",)])
+
+    def test_empty_file_raises_and_leaves_table_untouched(self):
+        self.source.ingest_file(io.BytesIO(b"a\n1\n"), "csv", "t")
+        with self.assertRaises(ValueError):
+            self.source.ingest_file(io.BytesIO(b"a\n"), "csv", "t")
+        self.assertEqual(self._query("SELECT COUNT(*) FROM t"), [(1,)])
+
+    def test_excel_is_streamed(self):
+        buffer = io.BytesIO()
+        pd.DataFrame({"x": [1, 2, 3], "y": ["a", "b", None]}).to_excel(
+            buffer, index=False
+        )
+        buffer.seek(0)
+        stats = self.source.ingest_file(buffer, "xlsx", "sheet", chunksize=2)
+        self.assertEqual(stats.rows_inserted, 3)
+        self.assertEqual(
+            self._query("SELECT y FROM sheet ORDER BY x"), [("a",), ("b",), (None,)]
+        )
+
+    def test_dataframe_ingest(self):
+        df = pd.DataFrame(
+            {"when": pd.to_datetime(["2024-01-01", None]), "value": [1.5, None]}
+        )
+        stats = self.source.ingest(df, "events", chunksize=1)
+        self.assertEqual(stats.rows_inserted, 2)
+        self.assertEqual(
+            self._query('SELECT "when", value FROM events'),
+            [("2024-01-01 00:00:00", 1.5), (None, None)],
+        )
+
+    def test_helpers(self):
+        self.assertEqual(
+            clean_column_names([" a b ", "c-d", "%"]), ["a_b", "cd", "column_2"]
+        )
+        schema = infer_sqlite_schema(
+            pd.DataFrame({"i": [1], "f": [1.0], "s": ["x"], "b": [True]})
+        )
+        self.assertEqual(
+            schema, {"i": "INTEGER", "f": "REAL", "s": "TEXT", "b": "INTEGER"}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from contextlib import closing
+from pathlib import Path
+from unittest.mock import patch
+
+import pandas as pd
+
+from yaaaf.components.sources.sqlite_pool import close_connection_pool
+from yaaaf.components.sources.sqlite_source import SqliteSource
+
+
+class TestSqliteConnectionPool(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp_dir.cleanup)
+        self.db_path = os.path.join(self._tmp_dir.name, "test.db")
+        self.addCleanup(close_connection_pool, self.db_path)
+        self.source = SqliteSource(name="test", db_path=self.db_path)
+        self.source.ingest(pd.DataFrame({"id": range(100), "value": range(100)}), "numbers")
+
+    def test_database_uses_wal_and_sources_share_the_pool(self):
+        with sqlite3.connect(self.db_path) as conn:
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertIs(SqliteSource(name="other", db_path=self.db_path)._pool, self.source._pool)
+
+    def test_readers_are_reused_and_read_only(self):
+        with self.source._pool.reader() as first:
+            pass
+        with self.source._pool.reader() as second:
+            self.assertIs(first, second)
+
+        result = self.source.get_data("DELETE FROM numbers")
+
+        self.assertIn("Errors", result.columns)
+        self.assertEqual(self.source.get_data("SELECT COUNT(*) AS n FROM numbers")["n"][0], 100)
+
+    def test_read_only_database_can_be_queried(self):
+        path = os.path.join(self._tmp_dir.name, "readonly.db")
+        with closing(sqlite3.connect(path)) as conn:
+            conn.execute("CREATE TABLE t (x)")
+            conn.execute("INSERT INTO t VALUES (1)")
+            conn.commit()
+        os.chmod(path, 0o444)
+        self.addCleanup(close_connection_pool, path)
+        source = SqliteSource(name="readonly", db_path=path)
+
+        self.assertEqual(source.get_data("SELECT x FROM t")["x"].tolist(), [1])
+        self.assertIsNone(source._pool._writer_connection)
+
+        # Root may write to the file anyway, so open the writer read-only as well
+        connect = sqlite3.connect
+
+        def read_only_connect(database, *args, **kwargs):
+            if kwargs.pop("uri", False):
+                return connect(database, *args, uri=True, **kwargs)
+            return connect(Path(database).absolute().as_uri() + "?mode=ro", *args, uri=True, **kwargs)
+
+        with patch("sqlite3.connect", side_effect=read_only_connect):
+            with source._pool.writer() as writer:
+                journal_mode = writer.execute("PRAGMA journal_mode").fetchone()[0]
+
+        self.assertEqual(journal_mode, "delete")
+        self.assertEqual(source.get_data("SELECT COUNT(*) AS n FROM t")["n"][0], 1)
+
+    def test_reads_proceed_while_a_write_is_in_progress(self):
+        writing = threading.Event()
+        finish = threading.Event()
+
+        def slow_ingest():
+            with self.source._pool.writer() as conn:
+                conn.execute("BEGIN")
+                conn.execute("INSERT INTO numbers VALUES (100, 100)")
+                writing.set()
+                finish.wait(timeout=10)
+                conn.execute("COMMIT")
+
+        writer = threading.Thread(target=slow_ingest)
+        writer.start()
+        writing.wait(timeout=10)
+        try:
+            # Readers see the last committed state instead of "database is locked"
+            during = self.source.get_data("SELECT COUNT(*) AS n FROM numbers")["n"][0]
+        finally:
+            finish.set()
+            writer.join()
+        after = self.source.get_data("SELECT COUNT(*) AS n FROM numbers")["n"][0]
+
+        self.assertEqual((during, after), (100, 101))
+
+    def test_concurrent_readers(self):
+        results = []
+
+        def query():
+            results.append(self.source.get_data("SELECT SUM(value) AS total FROM numbers")["total"][0])
+
+        threads = [threading.Thread(target=query) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [4950] * 16)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import threading
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from yaaaf.server.warmup import Warmup, WarmupTask
+
+
+def _fail():
+    raise RuntimeError("index is corrupt")
+
+
+class TestWarmup(unittest.TestCase):
+    def test_tasks_run_concurrently_and_failures_are_reported(self):
+        barrier = threading.Barrier(2, timeout=5)
+        warmup = Warmup({"first": barrier.wait, "second": barrier.wait, "broken": _fail})
+
+        warmup.start()
+
+        self.assertTrue(warmup.wait(timeout=10))
+        statuses = {task.name: task.status for task in warmup.tasks}
+        self.assertEqual(
+            statuses,
+            {"first": WarmupTask.COMPLETED, "second": WarmupTask.COMPLETED, "broken": WarmupTask.FAILED},
+        )
+        self.assertEqual(warmup.tasks[2].error, "index is corrupt")
+
+    def test_ready_endpoint(self):
+        from yaaaf.server.run import app
+
+        release = threading.Event()
+        warmup = Warmup({"planner_examples": release.wait})
+        client = TestClient(app)
+
+        with patch("yaaaf.server.routes.get_warmup", return_value=warmup):
+            warmup.start()
+            pending = client.get("/ready")
+            release.set()
+            warmup.wait(timeout=10)
+            ready = client.get("/ready")
+
+        self.assertEqual(pending.status_code, 503)
+        self.assertFalse(pending.json()["ready"])
+        self.assertEqual(ready.status_code, 200)
+        self.assertEqual(ready.json()["tasks"][0]["status"], "completed")
+
+    def test_ready_without_warmup(self):
+        from yaaaf.server.run import app
+
+        with patch("yaaaf.server.routes.get_warmup", return_value=None):
+            response = TestClient(app).get("/ready")
+
+        self.assertEqual(response.json(), {"ready": True, "tasks": []})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+import asyncio
+import unittest
+
+from fastapi.testclient import TestClient
+
+from yaaaf.components.data_types import Messages, Note
+from yaaaf.components.executors.paused_execution import PausedExecutionState
+from yaaaf.server import accessories
+from yaaaf.server.accessories import StreamStatus
+from yaaaf.server.run import app
+from yaaaf.server.websocket_session import WebSocketSession
+
+
+def _register_stream(stream_id: str, notes, is_active: bool = True) -> StreamStatus:
+    status = StreamStatus()
+    status.is_active = is_active
+    status.current_agent = "orchestrator"
+    accessories._stream_id_to_messages[stream_id] = notes
+    accessories._stream_id_to_status[stream_id] = status
+    return status
+
+
+def _receive_until(websocket, message_type: str, limit: int = 20):
+    received = []
+    for _ in range(limit):
+        message = websocket.receive_json()
+        received.append(message)
+        if message["type"] == message_type:
+            return received
+    raise AssertionError(f"No '{message_type}' message in {received}")
+
+
+class _SlowWebSocket:
+    """Accepts sends only when the test releases them."""
+
+    def __init__(self):
+        self.sent = []
+        self.release = asyncio.Event()
+
+    async def send_json(self, message):
+        await self.release.wait()
+        self.sent.append(message)
+
+
+class TestWebSocketSession(unittest.TestCase):
+    def tearDown(self):
+        for stream_id in ("ws_completed", "ws_paused", "ws_backpressure", "ws_starting"):
+            accessories.mark_stream_started(stream_id)
+            accessories._stream_id_to_messages.pop(stream_id, None)
+            accessories._stream_id_to_status.pop(stream_id, None)
+            accessories._stream_id_to_paused_state.pop(stream_id, None)
+
+    def test_ping_and_unknown_message(self):
+        with TestClient(app).websocket_connect("/session") as websocket:
+            websocket.send_json({"type": "ping"})
+            self.assertEqual(websocket.receive_json(), {"type": "pong"})
+
+            websocket.send_json({"type": "bogus", "stream_id": "x"})
+            message = websocket.receive_json()
+            self.assertEqual(message["type"], "error")
+            self.assertIn("bogus", message["error"])
+
+    def test_invalid_messages_are_answered_without_closing_the_session(self):
+        with TestClient(app).websocket_connect("/session") as websocket:
+            websocket.send_text("{not json")
+            message = websocket.receive_json()
+            self.assertEqual(message["type"], "error")
+            self.assertIn("must be JSON", message["error"])
+
+            websocket.send_json({"type": "subscribe", "stream_id": "missing"})
+            message = websocket.receive_json()
+            self.assertEqual(message["type"], "error")
+            self.assertIn("Stream missing does not exist", message["error"])
+
+            websocket.send_json({"type": "ping"})
+            self.assertEqual(websocket.receive_json(), {"type": "pong"})
+
+    def test_pump_stops_when_a_starting_stream_never_appears(self):
+        accessories.mark_stream_starting("ws_starting")
+
+        async def scenario():
+            websocket = _SlowWebSocket()
+            websocket.release.set()
+            session = WebSocketSession(websocket, poll_interval=0.01)
+            sender = asyncio.create_task(session._send_loop())
+            session.subscribe("ws_starting")
+            await asyncio.sleep(0.05)
+            still_waiting = "ws_starting" in session._pumps
+
+            # Building the orchestrator failed
+            accessories.mark_stream_started("ws_starting")
+            await asyncio.sleep(0.05)
+            sender.cancel()
+            return still_waiting, session._pumps, websocket.sent
+
+        still_waiting, pumps, sent = asyncio.run(scenario())
+
+        self.assertTrue(still_waiting)
+        self.assertEqual(pumps, {})
+        self.assertEqual(sent[-1]["type"], "error")
+        self.assertIn("does not exist", sent[-1]["error"])
+
+    def test_subscribe_forwards_notes_until_completion(self):
+        _register_stream(
+            "ws_completed",
+            [
+                Note(message="working", agent_name="sqlagent"),
+                Note(message="hidden", agent_name="sqlagent", internal=True),
+                Note(message="done <taskcompleted/>", agent_name="orchestrator"),
+            ],
+            is_active=False,
+        )
+
+        with TestClient(app).websocket_connect("/session") as websocket:
+            websocket.send_json({"type": "subscribe", "stream_id": "ws_completed"})
+            received = _receive_until(websocket, "completed")
+
+        notes = [message for message in received if message["type"] == "note"]
+        self.assertEqual([note["message"] for note in notes], ["working", "done <taskcompleted/>"])
+        self.assertEqual([note["index"] for note in notes], [0, 2])
+        self.assertTrue(all(message["stream_id"] == "ws_completed" for message in received))
+
+    def test_paused_stream_reports_question(self):
+        notes = [Note(message="Which year? <taskpaused/>", agent_name="orchestrator")]
+        _register_stream("ws_paused", notes)
+        accessories._stream_id_to_paused_state["ws_paused"] = PausedExecutionState(
+            stream_id="ws_paused",
+            original_messages=Messages(),
+            yaml_plan="",
+            completed_assets={},
+            current_asset="ask_user",
+            next_asset_index=0,
+            question_asked="Which year?",
+            user_input_messages=Messages(),
+            notes=notes,
+        )
+
+        with TestClient(app).websocket_connect("/session") as websocket:
+            websocket.send_json({"type": "subscribe", "stream_id": "ws_paused"})
+            received = _receive_until(websocket, "paused")
+
+        self.assertEqual(received[-1]["question"], "Which year?")
+
+    def test_user_response_without_pause_is_rejected(self):
+        with TestClient(app).websocket_connect("/session") as websocket:
+            websocket.send_json(
+                {"type": "user_response", "stream_id": "unknown", "user_response": "2024"}
+            )
+            message = websocket.receive_json()
+
+        self.assertEqual(message["type"], "error")
+        self.assertIn("No paused execution", message["error"])
+
+    def test_slow_client_applies_backpressure(self):
+        _register_stream(
+            "ws_backpressure",
+            [Note(message=f"note {i}", agent_name="sqlagent") for i in range(10)],
+        )
+
+        async def scenario():
+            websocket = _SlowWebSocket()
+            session = WebSocketSession(websocket, send_queue_size=2, poll_interval=0.01)
+            sender = asyncio.create_task(session._send_loop())
+            session.subscribe("ws_backpressure")
+            await asyncio.sleep(0.1)
+            # One message held by the sender plus a full queue: the pump must wait
+            cursor_while_blocked = session._cursors["ws_backpressure"]
+
+            websocket.release.set()
+            await asyncio.sleep(0.1)
+            session.unsubscribe("ws_backpressure")
+            sender.cancel()
+            return cursor_while_blocked, websocket.sent
+
+        cursor_while_blocked, sent = asyncio.run(scenario())
+
+        self.assertLessEqual(cursor_while_blocked, 4)
+        sent_notes = [message["message"] for message in sent if message["type"] == "note"]
+        self.assertEqual(sent_notes, [f"note {i}" for i in range(10)])
+
+
+if __name__ == "__main__":
+    unittest.main()
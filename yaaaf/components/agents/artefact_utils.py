@@ -170,12 +170,15 @@ def _generate_artifact_list(artefact_list: List[Artefact], max_table_rows: int =
             # Convert DataFrame to markdown, truncated to max_table_rows
             try:
                 df = artifact.data
-                if len(df) > max_table_rows:
-                    content = f"⚠️ TABLE TRUNCATED: Showing {max_table_rows} of {len(df)} total rows.\n"
+                total_rows = artifact.total_rows if artifact.total_rows is not None else len(df)
+                if total_rows > max_table_rows:
+                    content = f"⚠️ TABLE TRUNCATED: Showing {max_table_rows} of {total_rows} total rows.\n"
                     content += df.head(max_table_rows).to_markdown(index=False)
-                    content += f"\n⚠️ {len(df) - max_table_rows} rows not shown. The full data exists but is too large to display here."
+                    content += f"\n⚠️ {total_rows - max_table_rows} rows not shown. The full data exists but is too large to display here."
                 else:
                     content = df.to_markdown(index=False)
+                if artifact.truncated:
+                    content += "\n⚠️ The query returned more rows than the result limit; rows beyond it were dropped."
             except Exception as e:
                 content = f"Table artifact: {artifact.description or 'Unable to display table'}"
         elif artifact.type == Artefact.Types.IMAGE:
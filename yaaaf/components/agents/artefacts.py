@@ -8,6 +8,8 @@ import sklearn
 from pydantic import BaseModel  #
 from singleton_decorator import singleton
 
+from yaaaf.components.sources.result_spool import ResultSpool
+
 _logger = logging.getLogger(__name__)
 
 
@@ -20,6 +22,10 @@ class Artefact(BaseModel):
     type: Optional[str] = None
     id: Optional[str] = None
     summary: Optional[str] = None
+    # Large query results: `data` holds the first rows, the rest are spooled to disk
+    total_rows: Optional[int] = None
+    truncated: bool = False  # rows beyond the configured cap were dropped
+    spool: Optional[ResultSpool] = None  # deleted when the result cache drops the result
 
     class Types:
         TABLE = "table"
@@ -33,6 +39,14 @@ class Artefact(BaseModel):
         arbitrary_types_allowed = True
         use_enum_values = True
 
+    def get_rows(self, offset: int = 0, limit: int = 100) -> Optional[pd.DataFrame]:
+        """A page of the table, read from the spooled result when there is one."""
+        if self.spool is not None:
+            return self.spool.read_rows(offset, limit)
+        if self.data is None:
+            return None
+        return self.data.iloc[offset : offset + limit].reset_index(drop=True)
+
 
 @singleton
 class ArtefactStorage:
@@ -67,3 +81,22 @@ class ArtefactStorage:
         return [
             self.retrieve_from_id(artefact_match) for artefact_match in artefact_matches
         ]
+
+    def get_size(self) -> int:
+        return len(self.hash_to_artefact_dict)
+
+    def estimate_memory_bytes(self) -> int:
+        """Rough estimate of the memory held by stored tables and text fields."""
+        total = 0
+        for artefact in list(self.hash_to_artefact_dict.values()):
+            if artefact.data is not None:
+                total += int(artefact.data.memory_usage(index=True, deep=True).sum())
+            for text in (
+                artefact.code,
+                artefact.description,
+                artefact.image,
+                artefact.summary,
+            ):
+                if text:
+                    total += len(text)
+        return total
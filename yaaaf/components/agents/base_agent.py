@@ -1,5 +1,6 @@
 import logging
 import re
+import time
 from typing import Optional, List, TYPE_CHECKING
 from abc import ABC, abstractmethod
 
@@ -8,6 +9,7 @@ from yaaaf.components.agents.settings import task_completed_tag
 from yaaaf.components.agents.artefacts import ArtefactStorage, Artefact
 from yaaaf.components.agents.hash_utils import create_hash
 from yaaaf.components.agents.tokens_utils import get_first_text_between_tags
+from yaaaf.components import metrics
 from yaaaf.components.decorators import handle_exceptions
 from yaaaf.components.agents.agent_steps_config import AGENT_MAX_STEPS, DEFAULT_MAX_STEPS
 from yaaaf.components.agents.artefact_utils import create_prompt_from_artefacts
@@ -103,6 +105,7 @@ class BaseAgent(ABC):
 
         for step_idx in range(self._max_steps):
             _logger.debug(f"{self.get_name()}: Starting step {step_idx + 1}/{self._max_steps}")
+            metrics.AGENT_ITERATIONS.inc(agent=self.get_name())
             try:
                 response = await self._client.predict(
                     messages, stop_sequences=self._stop_sequences
@@ -183,7 +186,13 @@ class BaseAgent(ABC):
                 messages = messages.add_user_utterance(feedback)
                 continue
 
+            started_at = time.perf_counter()
             result, error = await self._executor.execute_operation(instruction, context)
+            metrics.AGENT_OPERATION_SECONDS.observe(
+                time.perf_counter() - started_at,
+                agent=self.get_name(),
+                outcome="error" if error else "success",
+            )
 
             if error:
                 # Log the full error without truncation for debugging
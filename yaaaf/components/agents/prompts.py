@@ -13,7 +13,8 @@ Your task is to write an SQL query according the schema below and the user's ins
 {schema}
 </schema>
     
-In the end, you need to output an SQL instruction string that would retrieve information on an sqlite instance
+In the end, you need to output an SQL instruction string that would retrieve information from the sources above.
+Use the SQL dialect of the source that holds the tables: SQLite, unless the source says otherwise.
 You can think step-by-step on the actions to take.
 However the final output needs to be an SQL instruction string.
 This output *must* be between the markdown tags ```sql SQL INSTRUCTION STRING ```
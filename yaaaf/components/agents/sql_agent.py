@@ -1,12 +1,19 @@
 import logging
-from typing import List
+from typing import List, Optional
 
 from yaaaf.components.agents.base_agent import ToolBasedAgent
 from yaaaf.components.executors import SQLExecutor
+from yaaaf.components.executors.sql_executor import (
+    DEFAULT_MAX_ROWS,
+    DEFAULT_PREVIEW_ROWS,
+    DEFAULT_QUERY_TIMEOUT,
+    SqlSource,
+)
 from yaaaf.components.agents.prompts import sql_agent_prompt_template
 from yaaaf.components.client import BaseClient
-from yaaaf.components.sources.sqlite_source import SqliteSource
-from yaaaf.components.agents.artefact_utils import create_prompt_from_sources
+from yaaaf.components.sources.query_result_cache import QueryResultCache
+from yaaaf.components.agents.artefact_utils import create_prompt_from_artefacts
+from yaaaf.components.data_types import PromptTemplate
 
 _logger = logging.getLogger(__name__)
 
@@ -14,13 +21,46 @@ _logger = logging.getLogger(__name__)
 class SqlAgent(ToolBasedAgent):
     """SQL Agent that executes SQL queries against database sources."""
 
-    def __init__(self, client: BaseClient, sources: List[SqliteSource]):
+    def __init__(
+        self,
+        client: BaseClient,
+        sources: List[SqlSource],
+        query_timeout: float = DEFAULT_QUERY_TIMEOUT,
+        preview_rows: int = DEFAULT_PREVIEW_ROWS,
+        max_rows: int = DEFAULT_MAX_ROWS,
+        result_cache: Optional[QueryResultCache] = None,
+        preflight: bool = True,
+    ):
         """Initialize SQL agent with client and data sources."""
-        super().__init__(client, SQLExecutor(sources))
-        # Complete the prompt template with schema from sources
-        self._system_prompt = create_prompt_from_sources(sources, sql_agent_prompt_template)
+        super().__init__(
+            client,
+            SQLExecutor(
+                sources,
+                query_timeout,
+                preview_rows=preview_rows,
+                max_rows=max_rows,
+                result_cache=result_cache,
+                preflight=preflight,
+            ),
+        )
+        # The schema is filled in at query time from the executor context
+        self._system_prompt = sql_agent_prompt_template
         self._output_tag = "```sql"
 
+    def _try_complete_prompt_with_artifacts(self, context: dict) -> str:
+        """Complete the prompt with the current schema of the sources and the artifacts."""
+        # Braces in sample values must survive the format() of the artifact completion
+        schema = context.get("schema", "").replace("{", "{{").replace("}", "}}")
+        prompt_template = PromptTemplate(
+            prompt=self._system_prompt.prompt.replace("{schema}", schema)
+        )
+        return create_prompt_from_artefacts(
+            context.get("artifacts", []),
+            filename="",
+            prompt_with_model=None,
+            prompt_without_model=prompt_template,
+        )
+
     @staticmethod
     def get_info() -> str:
         """Get a brief description of what this agent does."""
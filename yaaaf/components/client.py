@@ -10,6 +10,7 @@ from typing import Optional, List, TYPE_CHECKING
 from yaaaf.components.agents.tokens_utils import (
     extract_thinking_content,
 )
+from yaaaf.components.decorators import track_llm_metrics
 
 if TYPE_CHECKING:
     from yaaaf.components.data_types import Messages, Tool, ClientResponse
@@ -55,6 +56,9 @@ class OllamaResponseError(Exception):
 
 
 class BaseClient:
+    # Label used for this client's metrics (see track_llm_metrics)
+    backend: str = "unknown"
+
     async def predict(
         self,
         messages: "Messages",
@@ -75,6 +79,8 @@ class BaseClient:
 class OllamaClient(BaseClient):
     """Client for Ollama API."""
 
+    backend = "ollama"
+
     def __init__(
         self,
         model: str,
@@ -200,6 +206,7 @@ class OllamaClient(BaseClient):
         _logger.warning(f"Unknown training cutoff date for model: {self.model}")
         return None
 
+    @track_llm_metrics
     async def predict(
         self,
         messages: "Messages",
@@ -285,6 +292,8 @@ class OllamaClient(BaseClient):
                     message=message_content,
                     tool_calls=tool_calls,
                     thinking_content=thinking_content if thinking_content else None,
+                    prompt_tokens=response_data.get("prompt_eval_count"),
+                    completion_tokens=response_data.get("eval_count"),
                 )
             except (json.JSONDecodeError, KeyError) as e:
                 error_msg = f"Invalid response format from Ollama at {self.host}: {e}"
@@ -343,6 +352,8 @@ class VLLMResponseError(Exception):
 class VLLMClient(BaseClient):
     """Client for vLLM OpenAI-compatible API with LoRA adapter support."""
 
+    backend = "vllm"
+
     def __init__(
         self,
         model: str,
@@ -405,6 +416,7 @@ class VLLMClient(BaseClient):
         except Exception as e:
             _logger.warning(f"⚠️ Could not verify vLLM connection: {e}")
 
+    @track_llm_metrics
     async def predict(
         self,
         messages: "Messages",
@@ -494,10 +506,13 @@ class VLLMClient(BaseClient):
                         )
                         tool_calls.append(tool_call)
 
+                usage = response_data.get("usage") or {}
                 return ClientResponse(
                     message=message_content,
                     tool_calls=tool_calls,
                     thinking_content=thinking_content if thinking_content else None,
+                    prompt_tokens=usage.get("prompt_tokens"),
+                    completion_tokens=usage.get("completion_tokens"),
                 )
             except (json.JSONDecodeError, KeyError) as e:
                 _logger.error(f"Invalid response format from vLLM: {e}")
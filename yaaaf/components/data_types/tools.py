@@ -37,3 +37,9 @@ class ClientResponse(BaseModel):
     thinking_content: Optional[str] = Field(
         default=None, description="The thinking content extracted from <think> tags"
     )
+    prompt_tokens: Optional[int] = Field(
+        default=None, description="Prompt tokens reported by the server, if any"
+    )
+    completion_tokens: Optional[int] = Field(
+        default=None, description="Completion tokens reported by the server, if any"
+    )
@@ -1,7 +1,10 @@
 import functools
 import logging
+import time
 from typing import Callable, Any
 
+from yaaaf.components import metrics
+
 _logger = logging.getLogger(__name__)
 
 
@@ -63,3 +66,48 @@ def handle_exceptions_sync(func: Callable) -> Callable:
             return f"{error_msg} <taskcompleted/>"
 
     return wrapper
+
+
+def track_llm_metrics(func: Callable) -> Callable:
+    """
+    Decorator for client predict methods that records request counts,
+    latency, token usage and errors per backend and model.
+
+    The client is expected to expose `backend` and `model` attributes and
+    to fill `prompt_tokens`/`completion_tokens` on the returned ClientResponse
+    when the server reports them.
+
+    Usage:
+        @track_llm_metrics
+        async def predict(self, messages, stop_sequences=None, tools=None):
+            # method implementation
+    """
+
+    @functools.wraps(func)
+    async def wrapper(self, *args, **kwargs) -> Any:
+        labels = {
+            "backend": getattr(self, "backend", self.__class__.__name__),
+            "model": getattr(self, "model", None) or "unknown",
+        }
+        metrics.LLM_REQUESTS.inc(**labels)
+        started_at = time.perf_counter()
+        try:
+            response = await func(self, *args, **kwargs)
+        except Exception:
+            metrics.LLM_ERRORS.inc(**labels)
+            raise
+        finally:
+            metrics.LLM_REQUEST_SECONDS.observe(
+                time.perf_counter() - started_at, **labels
+            )
+
+        elapsed = time.perf_counter() - started_at
+        if response is not None:
+            if response.prompt_tokens:
+                metrics.LLM_PROMPT_TOKENS.inc(response.prompt_tokens, **labels)
+            if response.completion_tokens:
+                metrics.LLM_COMPLETION_TOKENS.inc(response.completion_tokens, **labels)
+                metrics.LLM_GENERATION_SECONDS.inc(elapsed, **labels)
+        return response
+
+    return wrapper
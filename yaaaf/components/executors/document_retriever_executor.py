@@ -1,12 +1,17 @@
+import asyncio
 import logging
 from typing import Dict, Any, Optional, Tuple, List
 
+import mdpd
+import pandas as pd
+
 from yaaaf.components.agents.artefacts import Artefact, ArtefactStorage
 from yaaaf.components.executors.base import ToolExecutor
 from yaaaf.components.agents.hash_utils import create_hash
 from yaaaf.components.agents.tokens_utils import get_first_text_between_tags
 from yaaaf.components.data_types import Messages, Note
 from yaaaf.components.extractors.chunk_extractor import ChunkExtractor
+from yaaaf.components.retrievers.retrieval_coordinator import RetrievalCoordinator
 from yaaaf.components.sources.rag_source import RAGSource
 
 _logger = logging.getLogger(__name__)
@@ -15,11 +20,24 @@ _logger = logging.getLogger(__name__)
 class DocumentRetrieverExecutor(ToolExecutor):
     """Executor for document retrieval using RAG sources."""
 
-    def __init__(self, sources: List[RAGSource], chunk_extractor: ChunkExtractor):
-        """Initialize document retriever executor."""
+    def __init__(
+        self,
+        sources: List[RAGSource],
+        chunk_extractor: ChunkExtractor,
+        passages_per_query: int = 10,
+    ):
+        """Initialize document retriever executor.
+
+        Args:
+            sources: The RAG sources that can be searched
+            chunk_extractor: Extracts the relevant chunks from the retrieved passages
+            passages_per_query: Passages retrieved for each query, merged over its sources
+        """
         self._storage = ArtefactStorage()
         self._sources = sources
         self._chunk_extractor = chunk_extractor
+        self._passages_per_query = passages_per_query
+        self._coordinator = RetrievalCoordinator(sources)
         self._folders_description = "\n".join(
             [
                 f"Folder index: {index} -> {source.get_description()}"
@@ -40,27 +58,84 @@ class DocumentRetrieverExecutor(ToolExecutor):
         """Extract retrieval query from response."""
         return get_first_text_between_tags(response, "```retrieved", "```")
 
+    def _parse_queries(self, instruction: str) -> List[Tuple[int, str]]:
+        """Read the (folder_index, query) table; a plain query searches every source."""
+        try:
+            table = mdpd.from_md(instruction)
+            queries = []
+            for _, row in table.iterrows():
+                index = int(str(row["folder_index"]).strip())
+                query = str(row["query"]).strip()
+                if 0 <= index < len(self._sources) and query:
+                    queries.append((index, query))
+            if queries:
+                return queries
+        except Exception as e:
+            _logger.debug(f"Retrieval instruction is not a folder/query table: {e}")
+        query = instruction.strip()
+        return [(index, query) for index in range(len(self._sources))] if query else []
+
+    async def _retrieve(self, queries: List[Tuple[int, str]]) -> Dict[str, List[str]]:
+        """Global top passages for each query over the sources it names, searched concurrently."""
+        query_to_sources: Dict[str, List[int]] = {}
+        for index, query in queries:
+            query_to_sources.setdefault(query, []).append(index)
+        retrieved = await asyncio.gather(
+            *(
+                self._coordinator.search(query, self._passages_per_query, indices)
+                for query, indices in query_to_sources.items()
+            )
+        )
+        return {
+            query: [passage.text for passage in passages]
+            for query, passages in zip(query_to_sources, retrieved)
+        }
+
     async def execute_operation(self, instruction: str, context: Dict[str, Any]) -> Tuple[Any, Optional[str]]:
-        """Execute document retrieval."""
+        """Retrieve passages for each query, then extract the relevant chunks from them."""
         try:
-            query = instruction.strip()
-            sources = context["sources"]
-            
-            # Extract chunks using the chunk extractor
-            chunks_text = await self._chunk_extractor.extract(query, "")
-            
-            if not chunks_text or chunks_text.strip() == "":
+            queries = self._parse_queries(instruction)
+            query_to_passages = await self._retrieve(queries)
+            query_to_passages = {
+                query: passages for query, passages in query_to_passages.items() if passages
+            }
+            if not query_to_passages:
+                return None, "No relevant documents found for the query"
+
+            extracted = await asyncio.gather(
+                *(
+                    self._chunk_extractor.extract_from_passages(passages, query)
+                    for query, passages in query_to_passages.items()
+                )
+            )
+            chunks = []
+            seen = set()
+            for items in extracted:
+                for item in items:
+                    text = str(item["relevant_chunk_text"]).strip()
+                    if text and text not in seen:
+                        seen.add(text)
+                        chunks.append(
+                            {
+                                "relevant_chunk_text": text,
+                                "position_in_document": str(item["position_in_document"]),
+                            }
+                        )
+            if not chunks:
                 return None, "No relevant documents found for the query"
-            
-            # Create retrieved document content
+
             retrieved_content = {
-                "query": query,
-                "content": chunks_text,
-                "sources_count": len(sources)
+                "query": "; ".join(query_to_passages),
+                "content": "\n\n".join(
+                    f"[{chunk['position_in_document']}] {chunk['relevant_chunk_text']}"
+                    for chunk in chunks
+                ),
+                "chunks": chunks,
+                "sources_count": len({index for index, _ in queries}),
             }
-            
+
             return retrieved_content, None
-            
+
         except Exception as e:
             error_msg = f"Error retrieving documents for '{instruction}': {str(e)}"
             _logger.error(error_msg)
@@ -79,5 +154,6 @@ class DocumentRetrieverExecutor(ToolExecutor):
             id=artifact_id,
             type="text",
             code=result["content"],  # Use 'code' field for text content
+            data=pd.DataFrame(result["chunks"]),
             description=f"Retrieved documents for query: {result['query']}"
         )
\ No newline at end of file
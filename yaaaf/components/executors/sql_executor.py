@@ -1,45 +1,133 @@
+import asyncio
 import logging
-from typing import Any, Tuple, Optional, Dict, List
+import threading
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from typing import Any, Tuple, Optional, Dict, List, Union
 
 import pandas as pd
 
 from yaaaf.components.agents.artefacts import Artefact
 from yaaaf.components.agents.tokens_utils import get_first_text_between_tags
 from yaaaf.components.data_types import Messages, Note
-from yaaaf.components.sources.sqlite_source import SqliteSource
+from yaaaf.components.sources.duckdb_source import DuckDBSource
+from yaaaf.components.sources.query_result_cache import (
+    QueryResultCache,
+    get_query_result_cache,
+)
+from yaaaf.components.sources.result_spool import ResultSpool, ResultSpoolWriter
+from yaaaf.components.sources.sqlite_source import (
+    DEFAULT_BATCH_SIZE,
+    QueryTimeoutError,
+    SqliteSource,
+)
 
 from .base import ToolExecutor
+from .sql_preflight import DEFAULT_MAX_CARTESIAN_ROWS, preflight, referenced_tables
 
 _logger = logging.getLogger(__name__)
 
+# Sources the executor can query: both provide iter_batches, count_rows,
+# get_data_version and a schema description
+SqlSource = Union[SqliteSource, DuckDBSource]
+
+DEFAULT_QUERY_TIMEOUT = 30.0
+DEFAULT_PREVIEW_ROWS = 1000
+DEFAULT_MAX_ROWS = 1_000_000
+
+
+@dataclass
+class SqlResult:
+    """Result of a query: the first rows in memory and, when larger, the full result on disk.
+
+    The spool directory is deleted when the result cache drops the result,
+    or once neither the cache nor an artefact refers to the spool.
+    """
+
+    data: pd.DataFrame
+    total_rows: Optional[int]  # None when counting the rows ran out of time
+    truncated: bool = False  # rows beyond max_rows were dropped
+    spool: Optional[ResultSpool] = None
+
+    def get_size_bytes(self) -> int:
+        """Memory held by the in-memory rows plus the disk held by the spool."""
+        size = int(self.data.memory_usage(index=True, deep=True).sum())
+        if self.spool is not None:
+            size += self.spool.size_bytes
+        return size
+
+    def release(self):
+        """Delete the spool, called by the result cache when it drops this result."""
+        if self.spool is not None:
+            self.spool.delete()
+
+    def __str__(self) -> str:
+        text = str(self.data)
+        if self.total_rows is None or self.total_rows > len(self.data):
+            total = self.total_rows if self.total_rows is not None else "more"
+            text += f"\n(first {len(self.data)} of {total} rows)"
+        return text
+
 
 class SQLExecutor(ToolExecutor):
     """Executor for SQL queries against database sources."""
 
-    def __init__(self, sources: List[SqliteSource]):
+    def __init__(
+        self,
+        sources: List[SqlSource],
+        query_timeout: float = DEFAULT_QUERY_TIMEOUT,
+        preview_rows: int = DEFAULT_PREVIEW_ROWS,
+        max_rows: int = DEFAULT_MAX_ROWS,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        result_cache: Optional[QueryResultCache] = None,
+        preflight: bool = True,
+        max_cartesian_rows: int = DEFAULT_MAX_CARTESIAN_ROWS,
+    ):
         """Initialize with database sources.
 
         Args:
-            sources: List of SqliteSource objects to query against
+            sources: List of SqliteSource or DuckDBSource objects to query against
+            query_timeout: Seconds a query may run before it is interrupted
+            preview_rows: Rows of a result kept in memory; larger results are spooled to disk
+            max_rows: Rows of a result kept at all; the result is marked truncated beyond them
+            batch_size: Rows fetched from SQLite at a time
+            result_cache: Cache of query results, by default the one shared by all executors
+            preflight: Check queries with EXPLAIN QUERY PLAN against the schema before running them
+            max_cartesian_rows: Rows of a join without join condition above which preflight rejects it
         """
         self._sources = sources
+        self._query_timeout = query_timeout
+        self._preview_rows = preview_rows
+        self._max_rows = max_rows
+        self._batch_size = batch_size
+        self._result_cache = result_cache if result_cache is not None else get_query_result_cache()
+        self._preflight = preflight
+        self._max_cartesian_rows = max_cartesian_rows
 
     async def prepare_context(
         self, messages: Messages, notes: Optional[List[Note]] = None
     ) -> Dict[str, Any]:
         """Prepare context by loading database schemas.
 
+        Schemas come from each source's cached catalog, which is only read
+        again after the database changed.
+
         Returns:
-            Dictionary containing schemas for all data sources
+            Dictionary containing schemas for all data sources, by source name
+            and as one text for the prompt
         """
         schemas = {}
         for source in self._sources:
             # Get schema description for each source
             schema = source.get_description()
             if schema:
-                schemas[source.filename] = schema
+                schemas[source.name] = schema
 
-        return {"schemas": schemas}
+        schema_text = "\n\n".join(
+            f"Source: {name}\n{schema}" for name, schema in schemas.items()
+        )
+        return {"schemas": schemas, "schema": schema_text or "No schema information available"}
 
     def extract_instruction(self, response: str) -> Optional[str]:
         """Extract SQL query from response.
@@ -59,44 +147,150 @@ class SQLExecutor(ToolExecutor):
     ) -> Tuple[Any, Optional[str]]:
         """Execute SQL query against data sources.
 
-        Tries each data source until one succeeds.
+        The query is routed to the sources whose schema catalog holds the
+        tables it reads, and checked there with EXPLAIN QUERY PLAN: unknown
+        tables or columns, ambiguous names and large cartesian products are
+        reported with hints before anything runs. When several sources
+        qualify, it runs on all of them concurrently and the first success
+        wins; the other queries are cancelled. Queries run on worker threads so the event loop keeps
+        serving other streams, and are interrupted once they exceed the
+        query timeout or when the calling task is cancelled. Rows are
+        fetched in batches, so memory stays bounded by the batch size and
+        the in-memory preview.
 
         Args:
             instruction: The SQL query to execute
             context: The prepared context (not used for SQL)
 
         Returns:
-            Tuple of (DataFrame result, error message)
+            Tuple of (SqlResult, error message)
+        """
+        sources, preflight_error = await asyncio.to_thread(self._plan_query, instruction)
+        if preflight_error is not None:
+            _logger.info(f"Preflight rejected the query: {preflight_error}")
+            return None, preflight_error
+        tasks = {
+            asyncio.create_task(self._execute_query_on_source(source, instruction)): index
+            for index, source in enumerate(sources)
+        }
+        errors = []
+        timed_out = False
+        try:
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in sorted(done, key=tasks.get):
+                    source = sources[tasks[task]]
+                    try:
+                        result = task.result()
+                    except QueryTimeoutError:
+                        _logger.warning(
+                            f"Query on {source.name} timed out after {self._query_timeout:g}s: {instruction}"
+                        )
+                        timed_out = True
+                        continue
+                    except Exception as e:
+                        _logger.error(f"Error executing on {source.name}: {e}")
+                        errors.append(f"{source.name}: {e}")
+                        continue
+                    if not self._is_error_dataframe(result.data):
+                        return result, None
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if timed_out:
+            return None, (
+                f"The query was stopped because it ran for more than "
+                f"{self._query_timeout:g} seconds. Write a cheaper query: filter "
+                f"rows early, avoid cross joins and aggregate before joining"
+            )
+        # No source could execute the query
+        return None, "Failed to execute query on any data source. " + "; ".join(errors)
+
+    def _cache_key(self, source: SqlSource, query: str) -> Tuple:
+        return self._result_cache.make_key(
+            source.db_path,
+            source.get_data_version(),
+            query,
+            self._preview_rows,
+            self._max_rows,
+        )
+
+    def _plan_query(self, query: str) -> Tuple[List[SqlSource], Optional[str]]:
+        """The sources to run the query on, or the preflight error when none accepts it.
+
+        A cached result short-cuts both routing and preflight.
+        """
+        candidates = self._route_query(query)
+        for source in candidates:
+            if self._cache_key(source, query) in self._result_cache:
+                return [source], None
+        if not self._preflight:
+            return candidates, None
+
+        accepted, errors = [], []
+        for source in candidates:
+            try:
+                error = preflight(source, query, self._max_cartesian_rows)
+            except Exception as e:
+                _logger.warning(f"Preflight failed on {source.name}, running the query anyway: {e}")
+                error = None
+            if error is None:
+                accepted.append(source)
+            else:
+                errors.append(error if len(candidates) == 1 else f"{source.name}: {error}")
+        if accepted:
+            return accepted, None
+        return [], " ".join(errors)
+
+    def _route_query(self, query: str) -> List[SqlSource]:
+        """Sources that own every table the query reads.
+
+        Falls back to the sources owning some of the tables, then to all
+        sources, when the catalogs do not settle it (e.g. no table is read).
         """
+        tables = referenced_tables(query)
+        if not tables or len(self._sources) == 1:
+            return list(self._sources)
+
+        owners, partial_owners = [], []
         for source in self._sources:
             try:
-                result_df = self._execute_query_on_source(source, instruction)
-                if result_df is not None and not self._is_error_dataframe(result_df):
-                    return result_df, None
+                names = {name.lower() for name in source.get_catalog().tables}
             except Exception as e:
-                _logger.error(f"Error executing query on {source.filename}: {str(e)}")
+                _logger.warning(f"Could not read the catalog of {source.name}: {e}")
                 continue
-
-        # No source could execute the query
-        return None, "Failed to execute query on any data source"
+            if tables <= names:
+                owners.append(source)
+            elif tables & names:
+                partial_owners.append(source)
+        candidates = owners or partial_owners or list(self._sources)
+        _logger.debug(
+            f"Routing query on {sorted(tables)} to {[source.name for source in candidates]}"
+        )
+        return candidates
 
     def validate_result(self, result: Any) -> bool:
         """Validate SQL query result.
 
         Args:
-            result: The result DataFrame
+            result: The SqlResult
 
         Returns:
-            True if valid DataFrame, False otherwise
+            True if valid SqlResult, False otherwise
         """
         if result is None:
             return False
 
-        if not isinstance(result, pd.DataFrame):
+        if not isinstance(result, SqlResult):
             return False
 
         # Check if it's an error DataFrame
-        if self._is_error_dataframe(result):
+        if self._is_error_dataframe(result.data):
             return False
 
         return True
@@ -107,7 +301,7 @@ class SQLExecutor(ToolExecutor):
         """Transform DataFrame result to table artifact.
 
         Args:
-            result: The DataFrame result
+            result: The SqlResult
             instruction: The SQL query
             artifact_id: The ID for the artifact
 
@@ -118,27 +312,115 @@ class SQLExecutor(ToolExecutor):
             type=Artefact.Types.TABLE,
             description="SQL query result",
             code=instruction,  # Store the SQL query
-            data=result,  # Store the DataFrame
+            data=result.data,  # Store the first rows; the rest stay on disk
             id=artifact_id,
+            total_rows=result.total_rows,
+            truncated=result.truncated,
+            spool=result.spool,
         )
 
-    def _execute_query_on_source(
-        self, source: SqliteSource, query: str
-    ) -> Optional[pd.DataFrame]:
-        """Execute query on a single source.
+    async def _execute_query_on_source(
+        self, source: SqlSource, query: str
+    ) -> SqlResult:
+        """Execute query on a single source in a worker thread.
+
+        Results are cached by normalized SQL and the data version of the
+        source, so a query repeated before the data changes is a lookup.
 
         Args:
             source: The data source
             query: The SQL query
 
         Returns:
-            DataFrame or None
+            SqlResult
+
+        Raises:
+            QueryTimeoutError: If the query ran past the query timeout
+            sqlite3.Error: If the query failed
         """
+        key = self._cache_key(source, query)
+        cached = self._result_cache.get(key)
+        if cached is not None:
+            _logger.debug(f"Query result cache hit on {source.name}")
+            return cached
+
+        cancel_event = threading.Event()
         try:
-            return source.read_query(query)
-        except Exception as e:
-            _logger.error(f"Error executing on {source.filename}: {e}")
-            return None
+            result = await asyncio.to_thread(
+                self._fetch_result, source, query, cancel_event
+            )
+        except asyncio.CancelledError:
+            # The thread cannot be cancelled, but SQLite stops at its next progress check
+            cancel_event.set()
+            raise
+        self._result_cache.put(key, result, result.get_size_bytes())
+        return result
+
+    def _fetch_result(
+        self, source: SqlSource, query: str, cancel_event: threading.Event
+    ) -> SqlResult:
+        """Fetch a result batch by batch.
+
+        The first preview_rows rows are kept in memory. Once a result grows
+        past them, it is written to a spool on disk, up to max_rows rows;
+        beyond that fetching stops and the total is counted by SQLite.
+        """
+        started = time.monotonic()
+        preview: List[pd.DataFrame] = []
+        preview_rows = 0
+        fetched_rows = 0
+        spool_writer: Optional[ResultSpoolWriter] = None
+        truncated = False
+        try:
+            batches = source.iter_batches(
+                query, self._batch_size, self._query_timeout, cancel_event
+            )
+            with closing(batches):
+                for batch in batches:
+                    if fetched_rows + len(batch) > self._max_rows:
+                        batch = batch.iloc[: self._max_rows - fetched_rows]
+                        truncated = True
+                    if spool_writer is None and fetched_rows + len(batch) > self._preview_rows:
+                        spool_writer = ResultSpoolWriter(list(batch.columns))
+                        for kept in preview:
+                            spool_writer.append(kept)
+                    if spool_writer is not None:
+                        spool_writer.append(batch)
+                    if preview_rows < self._preview_rows or not preview:
+                        kept = batch.iloc[: self._preview_rows - preview_rows]
+                        preview.append(kept)
+                        preview_rows += len(kept)
+                    fetched_rows += len(batch)
+                    if truncated:
+                        break
+
+            total_rows: Optional[int] = fetched_rows
+            if truncated:
+                remaining = self._query_timeout - (time.monotonic() - started)
+                try:
+                    total_rows = source.count_rows(query, max(remaining, 0.1), cancel_event)
+                except QueryTimeoutError:
+                    total_rows = None
+                _logger.info(
+                    f"Query on {source.name} returned more than {self._max_rows} rows "
+                    f"(total: {total_rows if total_rows is not None else 'unknown'}), "
+                    f"kept the first {fetched_rows}"
+                )
+
+            spool = spool_writer.close() if spool_writer is not None else None
+        except BaseException:
+            # A failed, timed out or cancelled query leaves no partial spool behind
+            if spool_writer is not None:
+                spool_writer.discard()
+            raise
+
+        data = pd.concat(preview, ignore_index=True) if len(preview) > 1 else preview[0]
+        return SqlResult(
+            data=data,
+            total_rows=total_rows,
+            truncated=truncated,
+            spool=spool,
+        )
 
     def _is_error_dataframe(self, df: pd.DataFrame) -> bool:
         """Check if DataFrame represents an error.
@@ -0,0 +1,302 @@
+import difflib
+import logging
+import math
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from yaaaf.components.sources.query_result_cache import tokenize_sql
+from yaaaf.components.sources.sqlite_catalog import SchemaCatalog, TableInfo
+
+_logger = logging.getLogger(__name__)
+
+# Rows a cartesian product of full table scans may produce before the query is rejected
+DEFAULT_MAX_CARTESIAN_ROWS = 10_000_000
+
+# Words that may follow a table name and are not its alias
+_CLAUSE_WORDS = {
+    "where", "join", "on", "using", "group", "order", "limit", "having", "window",
+    "left", "right", "inner", "outer", "full", "cross", "natural", "union",
+    "except", "intersect", "offset", "as",
+}
+
+# Clauses holding join or filter conditions, and the words that end them
+_PREDICATE_CLAUSES = {"on", "using", "where", "having"}
+_PREDICATE_END = _CLAUSE_WORDS - {"on", "using", "where", "having", "as"} | {"select", "from"}
+# Words inside conditions that are not column names
+_CONDITION_WORDS = {
+    "and", "or", "not", "between", "like", "glob", "in", "is", "null", "exists",
+    "case", "when", "then", "else", "end", "true", "false", "escape", "collate",
+}
+
+_UNKNOWN_TABLE = re.compile(r"no such table: (?:\w+\.)?(\S+)")
+_UNKNOWN_COLUMN = re.compile(r"no such column: (\S+)")
+_AMBIGUOUS_COLUMN = re.compile(r"ambiguous column name: (\S+)")
+_FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\S+)")
+
+
+def _identifier(token: Tuple[str, str]) -> Optional[str]:
+    kind, text = token
+    if kind == "word":
+        return text.lower()
+    if kind == "identifier":
+        return text[1:-1].lower()
+    return None
+
+
+def table_references(query: str) -> Tuple[Dict[str, str], Set[str]]:
+    """Tables a query reads, by the name or alias they go by, and its common table expressions.
+
+    Tables are the names after FROM (including comma-separated lists) and
+    JOIN; a schema prefix is dropped and table functions such as
+    read_csv(...) are skipped. All names are lower-cased.
+    """
+    tokens = tokenize_sql(query)
+    references: Dict[str, str] = {}
+    ctes: Set[str] = set()
+    for position, (kind, text) in enumerate(tokens):
+        word = text.lower() if kind == "word" else None
+        if word == "as" and position + 1 < len(tokens) and tokens[position + 1][1] == "(":
+            # name [(columns)] AS ( ... ) introduces a common table expression
+            before = position - 1
+            if before >= 0 and tokens[before][1] == ")":
+                while before >= 0 and tokens[before][1] != "(":
+                    before -= 1
+                before -= 1
+            if before >= 0 and _identifier(tokens[before]):
+                ctes.add(_identifier(tokens[before]))
+        if word not in ("from", "join"):
+            continue
+        cursor = position + 1
+        while cursor < len(tokens):
+            name = _identifier(tokens[cursor])
+            if name is None:
+                break
+            if cursor + 2 < len(tokens) and tokens[cursor + 1][1] == ".":
+                cursor += 2
+                name = _identifier(tokens[cursor]) or name
+            if cursor + 1 < len(tokens) and tokens[cursor + 1][1] == "(":
+                break  # table function
+            alias = name
+            cursor += 1
+            if cursor < len(tokens) and tokens[cursor][1].lower() == "as":
+                cursor += 1
+            if (
+                cursor < len(tokens)
+                and _identifier(tokens[cursor])
+                and tokens[cursor][1].lower() not in _CLAUSE_WORDS
+            ):
+                alias = _identifier(tokens[cursor])
+                cursor += 1
+            references[alias] = name
+            if word == "from" and cursor < len(tokens) and tokens[cursor][1] == ",":
+                cursor += 1
+                continue
+            break
+    return references, ctes
+
+
+def referenced_tables(query: str) -> Set[str]:
+    """Lower-cased names of the tables a query reads, common table expressions excluded."""
+    references, ctes = table_references(query)
+    return set(references.values()) - ctes
+
+
+def condition_terms(query: str) -> List[List[Tuple[Optional[str], str]]]:
+    """Columns used by each term of the query's join and filter conditions.
+
+    Terms are the parts of ON, USING, WHERE and HAVING clauses between AND
+    and OR; each column is (qualifier or None, name), lower-cased. The
+    AND of a BETWEEN splits its term too, which keeps the first half with
+    both sides of the comparison.
+    """
+    tokens = tokenize_sql(query)
+    terms: List[List[Tuple[Optional[str], str]]] = []
+    current: List[Tuple[Optional[str], str]] = []
+    inside = False
+    for position, token in enumerate(tokens):
+        word = token[1].lower() if token[0] == "word" else None
+        if word in _PREDICATE_CLAUSES or word in _PREDICATE_END or word in ("and", "or"):
+            if current:
+                terms.append(current)
+            current = []
+            if word in _PREDICATE_CLAUSES:
+                inside = True
+            elif word in _PREDICATE_END:
+                inside = False
+            continue
+        name = _identifier(token)
+        if not inside or name is None or word in _CONDITION_WORDS:
+            continue
+        following = tokens[position + 1][1] if position + 1 < len(tokens) else None
+        if following in (".", "("):
+            continue  # a qualifier, or a function
+        if position >= 2 and tokens[position - 1][1] == ".":
+            current.append((_identifier(tokens[position - 2]), name))
+        else:
+            current.append((None, name))
+    if current:
+        terms.append(current)
+    return terms
+
+
+def _unlinked_groups(
+    scans: List[Tuple[str, TableInfo]], query: str, references: Dict[str, str]
+) -> List[List[Tuple[str, TableInfo]]]:
+    """Scanned tables split into groups that no join or filter condition links."""
+    names = {name for name, _ in scans}
+    parent = {name: name for name in names}
+
+    def root(name: str) -> str:
+        while parent[name] != name:
+            name = parent[name]
+        return name
+
+    for term in condition_terms(query):
+        linked = set()
+        for qualifier, column in term:
+            for name, table in scans:
+                if qualifier is None:
+                    if any(info.name.lower() == column for info in table.columns):
+                        linked.add(name)
+                elif qualifier == name or (
+                    qualifier not in names
+                    and references.get(qualifier, qualifier) == table.name.lower()
+                ):
+                    linked.add(name)
+        linked = sorted(linked)
+        for name in linked[1:]:
+            parent[root(name)] = root(linked[0])
+
+    groups: Dict[str, List[Tuple[str, TableInfo]]] = defaultdict(list)
+    for name, table in scans:
+        groups[root(name)].append((name, table))
+    return list(groups.values())
+
+
+def _find_table(catalog: SchemaCatalog, name: str) -> Optional[TableInfo]:
+    for table_name, table in catalog.tables.items():
+        if table_name.lower() == name:
+            return table
+    return None
+
+
+def _suggest(name: str, candidates: List[str]) -> str:
+    matches = difflib.get_close_matches(name.lower(), candidates, n=3, cutoff=0.6)
+    return f" Did you mean {' or '.join(matches)}?" if matches else ""
+
+
+def describe_error(error: str, query: str, catalog: SchemaCatalog) -> str:
+    """The planner's error with hints drawn from the schema catalog."""
+    tables = {name.lower(): table for name, table in catalog.tables.items()}
+    query_tables = [
+        tables[name] for name in sorted(referenced_tables(query)) if name in tables
+    ] or list(tables.values())
+
+    match = _UNKNOWN_TABLE.search(error)
+    if match:
+        name = match.group(1)
+        return (
+            f"Table {name} does not exist.{_suggest(name, list(tables))} "
+            f"Available tables: {', '.join(sorted(tables)) or 'none'}."
+        )
+
+    match = _UNKNOWN_COLUMN.search(error)
+    if match:
+        name = match.group(1)
+        qualifier, _, column = name.rpartition(".")
+        searched = query_tables
+        if qualifier:
+            references, _ = table_references(query)
+            table = tables.get(references.get(qualifier.lower(), qualifier.lower()))
+            searched = [table] if table is not None else query_tables
+        prefix = f"{qualifier}." if qualifier else ""
+        candidates = [f"{prefix}{info.name}".lower() for table in searched for info in table.columns]
+        columns = "; ".join(
+            f"{table.name}: {', '.join(info.name for info in table.columns)}"
+            for table in searched
+        )
+        return (
+            f"Column {name} does not exist.{_suggest(f'{prefix}{column}', candidates)} "
+            f"Columns of the tables in the query: {columns}."
+        )
+
+    match = _AMBIGUOUS_COLUMN.search(error)
+    if match:
+        name = match.group(1)
+        owners = [
+            table.name
+            for table in query_tables
+            if any(info.name.lower() == name.lower() for info in table.columns)
+        ]
+        qualified = " or ".join(f"{owner}.{name}" for owner in owners)
+        return (
+            f"Column {name} is in several tables of the query ({', '.join(owners)}). "
+            f"Qualify it with the table name or alias: {qualified}."
+        )
+
+    # DuckDB errors already carry hints; drop the echo of the EXPLAIN statement
+    return error.split("\n\nLINE ")[0]
+
+
+def find_cartesian_product(
+    plan: List[Tuple[int, int, str]],
+    query: str,
+    catalog: SchemaCatalog,
+    max_rows: int = DEFAULT_MAX_CARTESIAN_ROWS,
+) -> Optional[str]:
+    """An error when the plan pairs full scans of large tables with no join condition.
+
+    SQLite plans an equality join as a SEARCH (using an index, or an
+    automatic one). Two or more SCANs in the same loop nest combine every
+    row of one table with every row of the others, which is only intended
+    when a condition relates them, as in a range join: the query is
+    rejected when no ON, USING, WHERE or HAVING term links the tables.
+    """
+    references, _ = table_references(query)
+    scans: Dict[int, List[Tuple[str, TableInfo]]] = defaultdict(list)
+    for _, parent, detail in plan:
+        match = _FULL_SCAN.match(detail)
+        if match is None:
+            continue
+        name = match.group(1).lower()
+        table = _find_table(catalog, references.get(name, name))
+        if table is not None:  # not a subquery, CTE or constant row
+            scans[parent].append((name, table))
+
+    for nest in scans.values():
+        if len(nest) < 2:
+            continue
+        groups = _unlinked_groups(nest, query, references)
+        if len(groups) < 2:
+            continue
+        rows = math.prod(table.row_count for _, table in nest)
+        if rows <= max_rows:
+            continue
+        described = " with every row of ".join(
+            " joined with ".join(
+                f"{table.name} ({table.row_count:,} rows)" for _, table in group
+            )
+            for group in groups
+        )
+        return (
+            f"The query combines every row of {described}, {rows:,} combinations, "
+            f"because no join condition links them. Join the tables on matching "
+            f"columns (JOIN ... ON a.key = b.key) or filter them first."
+        )
+    return None
+
+
+def preflight(
+    source, query: str, max_cartesian_rows: int = DEFAULT_MAX_CARTESIAN_ROWS
+) -> Optional[str]:
+    """Check a query against the source's planner and schema without running it.
+
+    Returns an error message with hints, or None when the query may run.
+    """
+    catalog = source.get_catalog()
+    try:
+        plan = source.explain_query_plan(query)
+    except Exception as e:
+        return describe_error(str(e), query, catalog)
+    return find_cartesian_product(plan, query, catalog, max_cartesian_rows)
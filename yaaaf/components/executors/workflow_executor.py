@@ -1,7 +1,9 @@
 import logging
+import time
 import yaml
 import re
 from typing import Dict, Any, List, Optional, TYPE_CHECKING
+from yaaaf.components import metrics
 from yaaaf.components.data_types import Messages, Utterance
 from yaaaf.components.agents.artefacts import Artefact, ArtefactStorage
 from yaaaf.components.executors.paused_execution import (
@@ -253,11 +255,7 @@ class WorkflowExecutor:
 
                 # Execute agent
                 _logger.info(f"Calling agent '{agent_name}' for asset '{asset_name}' (working_dir={self._working_dir})")
-                try:
-                    result = await agent.query(agent_messages, env_path=self._env_path, working_dir=self._working_dir)
-                except Exception as e:
-                    _logger.error(f"Agent '{agent_name}' failed with exception: {e}")
-                    raise
+                result = await self._query_agent(agent_name, agent, agent_messages)
                 _logger.info(f"Agent '{agent_name}' returned result (length={len(str(result))})")
                 result_string = str(result)
 
@@ -904,6 +902,25 @@ class WorkflowExecutor:
                 _logger.warning(f"Input {input_name} not found")
         return inputs
 
+    async def _query_agent(self, agent_name: str, agent, agent_messages: Messages) -> str:
+        """Run one workflow step on an agent, recording its outcome and latency."""
+        started_at = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await agent.query(
+                agent_messages, env_path=self._env_path, working_dir=self._working_dir
+            )
+            outcome = "paused" if "<taskpaused/>" in str(result) else "success"
+            return result
+        except Exception as e:
+            _logger.error(f"Agent '{agent_name}' failed with exception: {e}")
+            raise
+        finally:
+            metrics.WORKFLOW_STEPS.inc(agent=agent_name, outcome=outcome)
+            metrics.WORKFLOW_STEP_SECONDS.observe(
+                time.perf_counter() - started_at, agent=agent_name
+            )
+
     def _prepare_agent_messages(
         self, messages: Messages, inputs: Dict[str, str], asset_config: Dict
     ) -> Messages:
@@ -1425,11 +1442,7 @@ class WorkflowExecutor:
 
                 # Execute agent
                 _logger.info(f"Calling agent '{agent_name}' for resumed asset '{asset_name}'")
-                try:
-                    result = await agent.query(agent_messages, env_path=self._env_path, working_dir=self._working_dir)
-                except Exception as e:
-                    _logger.error(f"Agent '{agent_name}' failed with exception: {e}")
-                    raise
+                result = await self._query_agent(agent_name, agent, agent_messages)
                 _logger.info(f"Agent '{agent_name}' returned result (length={len(str(result))})")
                 result_string = str(result)
 
@@ -1,5 +1,7 @@
+import asyncio
 import logging
 import json
+import re
 from typing import List, Dict, Any
 
 from yaaaf.components.client import BaseClient
@@ -13,11 +15,66 @@ _logger = logging.getLogger(__name__)
 class ChunkExtractor(BaseExtractor):
     """
     ChunkExtractor extracts relevant text chunks from a document based on a query.
+
+    For large collections use `extract_from_passages` on retrieved passages: they
+    are packed into prompts of at most `max_prompt_chars` characters and the
+    prompts are sent concurrently, at most `max_concurrency` at a time.
     """
 
-    def __init__(self, client: BaseClient):
+    def __init__(
+        self, client: BaseClient, max_prompt_chars: int = 8000, max_concurrency: int = 4
+    ):
         super().__init__()
         self._client = client
+        self._max_prompt_chars = max_prompt_chars
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    def _batch_passages(self, passages: List[str]) -> List[str]:
+        """Pack passages, in order, into texts of at most max_prompt_chars characters."""
+        batches: List[str] = []
+        current: List[str] = []
+        current_size = 0
+        for passage in passages:
+            passage = passage[: self._max_prompt_chars]
+            if current and current_size + len(passage) > self._max_prompt_chars:
+                batches.append("\n\n".join(current))
+                current, current_size = [], 0
+            current.append(passage)
+            current_size += len(passage) + 2
+        if current:
+            batches.append("\n\n".join(current))
+        return batches
+
+    async def _extract_bounded(self, text: str, query: str) -> List[Dict[str, Any]]:
+        async with self._semaphore:
+            return await self.extract(text, query)
+
+    async def extract_from_passages(
+        self, passages: List[str], query: str
+    ) -> List[Dict[str, Any]]:
+        """
+        Extract relevant chunks from retrieved passages (map), then merge and deduplicate them (reduce).
+
+        Args:
+            passages: Passages retrieved for the query, most relevant first
+            query: The query to match against
+
+        Returns:
+            The chunks found in all batches, in passage order, without duplicates
+        """
+        batches = self._batch_passages(passages)
+        results = await asyncio.gather(
+            *(self._extract_bounded(batch, query) for batch in batches)
+        )
+        merged: List[Dict[str, Any]] = []
+        seen = set()
+        for batch_results in results:
+            for item in batch_results:
+                key = re.sub(r"\s+", " ", str(item["relevant_chunk_text"])).strip().lower()
+                if key and key not in seen:
+                    seen.add(key)
+                    merged.append(item)
+        return merged
 
     async def extract(self, text: str, query: str) -> List[Dict[str, Any]]:
         """
@@ -32,11 +89,14 @@ class ChunkExtractor(BaseExtractor):
             - relevant_chunk_text: Exact text from input
             - position_in_document: Position identifier (page, section, etc.)
         """
+        if not text.strip():
+            return []
+
         try:
             instructions = Messages().add_system_prompt(
                 chunk_extractor_prompt.complete(text=text, query=query)
             )
-            instructions.add_user_utterance(query)
+            instructions = instructions.add_user_utterance(query)
             response = await self._client.predict(instructions)
             result_text = response.message.strip()
 
@@ -0,0 +1,270 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+Counters, gauges and histograms are module-level singletons fed by
+instrumentation hooks in the clients, agents and workflow executor, and
+rendered by the backend's /metrics endpoint.
+"""
+
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _escape_label_value(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Sequence[str], extra: str = "") -> str:
+    pairs = [
+        f'{name}="{_escape_label_value(value)}"'
+        for name, value in zip(labelnames, labelvalues)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    _type: str = ""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Optional["MetricsRegistry"] = None,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"Metric {self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self._type}",
+        ]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class _ValueMetric(_Metric):
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Optional["MetricsRegistry"] = None,
+    ):
+        super().__init__(name, documentation, labelnames, registry)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        with self._lock:
+            items = sorted(self._values.items())
+        for labelvalues, value in items:
+            lines.append(
+                f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}"
+            )
+        return lines
+
+
+class Counter(_ValueMetric):
+    """A monotonically increasing count."""
+
+    _type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_ValueMetric):
+    """A value that can go up and down."""
+
+    _type = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram(_Metric):
+    """Observations counted in cumulative buckets, plus their sum and count."""
+
+    _type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        registry: Optional["MetricsRegistry"] = None,
+    ):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # labelvalues -> (per-bucket counts, sum, count)
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._series.get(
+                key, ([0] * len(self.buckets), 0.0, 0)
+            )
+            for index, upper_bound in enumerate(self.buckets):
+                if value <= upper_bound:
+                    counts[index] += 1
+                    break
+            self._series[key] = (counts, total + value, count + 1)
+
+    def get_count(self, **labels) -> int:
+        series = self._series.get(self._key(labels))
+        return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        with self._lock:
+            items = sorted(
+                (key, (list(counts), total, count))
+                for key, (counts, total, count) in self._series.items()
+            )
+        for labelvalues, (counts, total, count) in items:
+            cumulative = 0
+            for upper_bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(upper_bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, labelvalues, le)} {cumulative}"
+                )
+            labels = _format_labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds every metric and renders them for a scrape."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# Streams and connections (gauges refreshed by the server at scrape time)
+STREAMS = Gauge(
+    "yaaaf_streams", "Number of streams by state (queued, active, paused)", ["state"]
+)
+SSE_CONNECTIONS = Gauge(
+    "yaaaf_sse_connections", "Open /stream_utterances server-sent-event connections"
+)
+WEBSOCKET_SESSIONS = Gauge("yaaaf_websocket_sessions", "Open /session WebSocket connections")
+
+# Workflow steps, fed by WorkflowExecutor
+WORKFLOW_STEPS = Counter(
+    "yaaaf_workflow_steps_total",
+    "Workflow steps executed per agent and outcome",
+    ["agent", "outcome"],
+)
+WORKFLOW_STEP_SECONDS = Histogram(
+    "yaaaf_workflow_step_duration_seconds",
+    "Wall-clock time of a workflow step per agent",
+    ["agent"],
+)
+
+# Reflection rounds inside a ToolBasedAgent
+AGENT_ITERATIONS = Counter(
+    "yaaaf_agent_iterations_total",
+    "LLM/tool rounds executed inside an agent query",
+    ["agent"],
+)
+AGENT_OPERATION_SECONDS = Histogram(
+    "yaaaf_agent_operation_duration_seconds",
+    "Time spent executing an agent's tool operation (SQL, search, code...)",
+    ["agent", "outcome"],
+)
+
+# LLM backends, fed by BaseClient implementations
+LLM_REQUESTS = Counter(
+    "yaaaf_llm_requests_total", "LLM requests sent per backend", ["backend", "model"]
+)
+LLM_ERRORS = Counter(
+    "yaaaf_llm_errors_total", "Failed LLM requests per backend", ["backend", "model"]
+)
+LLM_REQUEST_SECONDS = Histogram(
+    "yaaaf_llm_request_duration_seconds",
+    "LLM request latency per backend",
+    ["backend", "model"],
+)
+LLM_PROMPT_TOKENS = Counter(
+    "yaaaf_llm_prompt_tokens_total", "Prompt tokens processed", ["backend", "model"]
+)
+LLM_COMPLETION_TOKENS = Counter(
+    "yaaaf_llm_completion_tokens_total",
+    "Completion tokens generated (rate() gives tokens/s)",
+    ["backend", "model"],
+)
+LLM_GENERATION_SECONDS = Counter(
+    "yaaaf_llm_generation_seconds_total",
+    "Time spent in requests that reported completion tokens",
+    ["backend", "model"],
+)
+
+# Storage and indexes (gauges refreshed by the server at scrape time)
+ARTEFACTS = Gauge("yaaaf_artefacts", "Artefacts held in ArtefactStorage")
+ARTEFACT_BYTES = Gauge(
+    "yaaaf_artefact_memory_bytes", "Estimated memory held by ArtefactStorage"
+)
+RAG_CHUNKS = Gauge("yaaaf_rag_chunks", "Chunks indexed per RAG source", ["source"])
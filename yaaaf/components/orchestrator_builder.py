@@ -1,6 +1,7 @@
-import os
 import logging
-from typing import List
+import threading
+from functools import partial
+from typing import Callable, Dict, List, Tuple, Union
 from yaaaf.components.agents.orchestrator_agent import OrchestratorAgent
 from yaaaf.components.agents.planner_agent import PlannerAgent
 from yaaaf.components.agents.reviewer_agent import ReviewerAgent
@@ -20,14 +21,39 @@ from yaaaf.components.agents.mle_agent import MleAgent
 from yaaaf.components.agents.validation_agent import ValidationAgent
 from yaaaf.components.agents.code_edit_agent import CodeEditAgent
 from yaaaf.components.client import create_client, ClientType
+from yaaaf.components.retrievers.dense_index import LocalEmbedder
+from yaaaf.components.retrievers.planner_example_retriever import PlannerExampleRetriever
+from yaaaf.components.sources.duckdb_source import DuckDBSource
+from yaaaf.components.sources.query_result_cache import get_query_result_cache
 from yaaaf.components.sources.sqlite_source import SqliteSource
 from yaaaf.components.sources.rag_source import RAGSource
-from yaaaf.components.sources.persistent_rag_source import PersistentRAGSource
+from yaaaf.components.sources.chunking import TextChunker
+from yaaaf.components.sources.document_ingestion import DocumentIngestor
+from yaaaf.components.sources.persistent_rag_source import get_persistent_rag_source
 from yaaaf.connectors.mcp_connector import MCPSseConnector, MCPStdioConnector, MCPTools
-from yaaaf.server.config import Settings, AgentSettings, ToolTransportType
+from yaaaf.server.config import (
+    Settings,
+    AgentSettings,
+    SourceSettings,
+    ToolTransportType,
+)
 
 _logger = logging.getLogger(__name__)
 
+# Text sources outlive a single build so unchanged documents are not parsed again
+_text_ingestors: Dict[Tuple, DocumentIngestor] = {}
+_text_ingestors_lock = threading.Lock()
+
+
+def get_text_rag_sources() -> List[RAGSource]:
+    """The text sources of the file and folder sources synced so far."""
+    with _text_ingestors_lock:
+        return [ingestor.rag_source for ingestor in _text_ingestors.values()]
+
+
+def _load_embedding_model(model_name: str):
+    LocalEmbedder(model_name).load()
+
 
 class OrchestratorBuilder:
     def __init__(self, config: Settings):
@@ -51,15 +77,42 @@ class OrchestratorBuilder:
             "code_edit": CodeEditAgent,
         }
 
-    def _load_text_from_file(self, file_path: str) -> str:
-        """Load text content from a file."""
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                return f.read()
-        except UnicodeDecodeError:
-            # Try with different encoding if UTF-8 fails
-            with open(file_path, "r", encoding="latin-1") as f:
-                return f.read()
+    def _create_chunker(self) -> TextChunker:
+        return TextChunker(
+            chunk_size=self.config.chunking.chunk_size,
+            chunk_overlap=self.config.chunking.chunk_overlap,
+        )
+
+    def _sync_text_source(self, source_config: SourceSettings) -> RAGSource:
+        """Return the text source for a file or folder, re-indexing only files changed since the last build."""
+        description = getattr(source_config, "description", None) or source_config.name
+        key = (
+            source_config.path,
+            description,
+            source_config.embedding_model,
+            self.config.chunking.chunk_size,
+            self.config.chunking.chunk_overlap,
+            self.config.deduplication.near_duplicate_threshold,
+        )
+        with _text_ingestors_lock:
+            ingestor = _text_ingestors.get(key)
+            if ingestor is None:
+                rag_source = RAGSource(
+                    description=description,
+                    source_path=source_config.path,
+                    embedding_model=source_config.embedding_model,
+                    chunker=self._create_chunker(),
+                    near_duplicate_threshold=self.config.deduplication.near_duplicate_threshold,
+                )
+                ingestor = DocumentIngestor(
+                    rag_source,
+                    source_config.path,
+                    max_workers=self.config.ingestion_processes,
+                )
+                _text_ingestors[key] = ingestor
+        # Outside the registry lock, so different folders sync in parallel
+        ingestor.sync()
+        return ingestor.rag_source
 
     def _create_rag_sources(self) -> List[RAGSource]:
         """Create document sources from text-type sources in config."""
@@ -84,79 +137,37 @@ class OrchestratorBuilder:
 
         for source_config in self.config.sources:
             if source_config.type == "rag":
-                # Use the same persistent RAG source instance from routes
-                try:
-                    from yaaaf.server.routes import _get_persistent_rag_source
-
-                    rag_source = _get_persistent_rag_source()
-                    if rag_source:
-                        rag_sources.append(rag_source)
-                        _logger.info(
-                            f"Using shared persistent RAG source: {source_config.name} at {source_config.path}"
-                        )
-                    else:
-                        _logger.warning(
-                            "Could not get persistent RAG source from routes"
-                        )
-                except ImportError:
-                    # Fallback: create new instance if routes not available
-                    description = getattr(
-                        source_config, "description", source_config.name
-                    )
-                    rag_source = PersistentRAGSource(
-                        description=description,
-                        source_path=source_config.name or "persistent_rag",
-                        pickle_path=source_config.path,
-                    )
+                # The same instance the upload routes index into
+                rag_source = get_persistent_rag_source(self.config)
+                if rag_source:
                     rag_sources.append(rag_source)
                     _logger.info(
-                        f"Created new persistent RAG source: {source_config.name} at {source_config.path}"
+                        f"Using shared persistent RAG source: {source_config.name} at {source_config.path}"
                     )
 
             elif source_config.type == "text":
-                description = getattr(source_config, "description", source_config.name)
-                rag_source = RAGSource(
-                    description=description, source_path=source_config.path
-                )
-
-                # Load text content from file or directory
-                if os.path.isfile(source_config.path):
-                    # Single file
-                    if source_config.path.lower().endswith(".pdf"):
-                        # Handle single PDF file with configurable chunking (default: 1 page per chunk)
-                        with open(source_config.path, "rb") as pdf_file:
-                            pdf_content = pdf_file.read()
-                            filename = os.path.basename(source_config.path)
-                            # Use default chunking of no chunking (-1), can be made configurable later
-                            rag_source.add_pdf(
-                                pdf_content, filename, pages_per_chunk=-1
-                            )
-                    else:
-                        # Handle text files
-                        text_content = self._load_text_from_file(source_config.path)
-                        rag_source.add_text(text_content)
-                elif os.path.isdir(source_config.path):
-                    # Directory of files
-                    for filename in os.listdir(source_config.path):
-                        file_path = os.path.join(source_config.path, filename)
-                        if os.path.isfile(file_path):
-                            if filename.lower().endswith(
-                                (".txt", ".md", ".html", ".htm")
-                            ):
-                                text_content = self._load_text_from_file(file_path)
-                                rag_source.add_text(text_content)
-                            elif filename.lower().endswith(".pdf"):
-                                # Handle PDF files with configurable chunking (default: no chunking)
-                                with open(file_path, "rb") as pdf_file:
-                                    pdf_content = pdf_file.read()
-                                    # Use default chunking of no chunking (-1), can be made configurable later
-                                    rag_source.add_pdf(
-                                        pdf_content, filename, pages_per_chunk=-1
-                                    )
-
-                rag_sources.append(rag_source)
+                rag_sources.append(self._sync_text_source(source_config))
         return rag_sources
 
+    def get_warmup_tasks(self) -> Dict[str, Callable[[], object]]:
+        """Loaders of the shared resources that build() would otherwise load on the first query."""
+        tasks: Dict[str, Callable[[], object]] = {
+            "planner_examples": PlannerExampleRetriever.load_index
+        }
+        for source_config in self.config.sources:
+            name = source_config.name or source_config.path
+            if source_config.type == "rag":
+                tasks[f"rag:{name}"] = partial(get_persistent_rag_source, self.config)
+            elif source_config.type == "text":
+                tasks[f"text:{name}"] = partial(self._sync_text_source, source_config)
+
+        embedding_models = {
+            source.embedding_model for source in self.config.sources if source.embedding_model
+        }
+        for model_name in sorted(embedding_models):
+            tasks[f"embedding_model:{model_name}"] = partial(_load_embedding_model, model_name)
+        return tasks
+
     async def _create_mcp_tools(self) -> List[MCPTools]:
         """Create MCP tools from configuration."""
         mcp_tools = []
@@ -198,8 +209,8 @@ class OrchestratorBuilder:
 
         return mcp_tools
 
-    def _create_sql_sources(self) -> List[SqliteSource]:
-        """Create SQL sources from sqlite-type sources in config."""
+    def _create_sql_sources(self) -> List[Union[SqliteSource, DuckDBSource]]:
+        """Create SQL sources from sqlite- and duckdb-type sources in config."""
         sql_sources = []
 
         for source_config in self.config.sources:
@@ -232,6 +243,13 @@ class OrchestratorBuilder:
                     db_path=source_config.path,
                 )
                 sql_sources.append(sql_source)
+            elif source_config.type == "duckdb":
+                try:
+                    sql_sources.append(
+                        DuckDBSource(name=source_config.name, path=source_config.path)
+                    )
+                except ImportError as e:
+                    _logger.error(f"Skipping DuckDB source {source_config.name}: {e}")
 
         return sql_sources
 
@@ -404,7 +422,13 @@ class OrchestratorBuilder:
         """Helper method to create an agent with appropriate dependencies."""
         if agent_name == "sql" and sql_sources:
             return self._agents_map[agent_name](
-                client=agent_client, sources=sql_sources
+                client=agent_client,
+                sources=sql_sources,
+                query_timeout=self.config.sql_query_timeout,
+                preview_rows=self.config.sql_preview_rows,
+                max_rows=self.config.sql_max_rows,
+                result_cache=get_query_result_cache(self.config.sql_result_cache_bytes),
+                preflight=self.config.sql_preflight,
             )
         elif agent_name == "document_retriever" and rag_sources:
             return self._agents_map[agent_name](
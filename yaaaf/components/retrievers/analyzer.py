@@ -0,0 +1,91 @@
+import hashlib
+import re
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+from nltk.stem.porter import PorterStemmer
+
+# NLTK's English stopword list, embedded so that no corpus has to be downloaded
+ENGLISH_STOPWORDS: FrozenSet[str] = frozenset(
+    """
+    a about above after again against ain all am an and any are aren aren't as at
+    be because been before being below between both but by can couldn couldn't
+    d did didn didn't do does doesn doesn't doing don don't down during each few
+    for from further had hadn hadn't has hasn hasn't have haven haven't having he
+    her here hers herself him himself his how i if in into is isn isn't it it's
+    its itself just ll m ma me mightn mightn't more most mustn mustn't my myself
+    needn needn't no nor not now o of off on once only or other our ours
+    ourselves out over own re s same shan shan't she she's should should've
+    shouldn shouldn't so some such t than that that'll the their theirs them
+    themselves then there these they this those through to too under until up ve
+    very was wasn wasn't we were weren weren't what when where which while who
+    whom why will with won won't wouldn wouldn't y you you'd you'll you're you've
+    your yours yourself yourselves
+    """.split()
+)
+
+_TOKEN = re.compile(r"\w+(?:'\w+)*")
+_STOPWORD = object()
+
+
+class Analyzer:
+    """Turns text into BM25 terms.
+
+    Text is split with a compiled regex (runs of word characters, keeping
+    in-word apostrophes), lowercased, stripped of stopwords and optionally
+    stemmed with the Porter stemmer. The term produced for each distinct token
+    is memoized, so a large corpus only pays for stemming its vocabulary once.
+    Nothing needs to be downloaded at runtime.
+    """
+
+    def __init__(
+        self,
+        lowercase: bool = True,
+        stopwords: Optional[Iterable[str]] = ENGLISH_STOPWORDS,
+        stem: bool = False,
+        max_cached_tokens: int = 1_000_000,
+    ):
+        self._lowercase = lowercase
+        self._stopwords = frozenset(stopwords or ())
+        self._stemmer = PorterStemmer() if stem else None
+        self._max_cached_tokens = max_cached_tokens
+        self._token_to_term: Dict[str, object] = {}
+
+    @property
+    def name(self) -> str:
+        """Identifies the analysis: indices built with different names have incompatible terms."""
+        parts = ["regex-v1"]
+        if self._lowercase:
+            parts.append("lower")
+        if self._stopwords:
+            digest = hashlib.sha1(" ".join(sorted(self._stopwords)).encode()).hexdigest()
+            parts.append(f"stop-{digest[:8]}")
+        if self._stemmer is not None:
+            parts.append("porter")
+        return "+".join(parts)
+
+    def _analyze_token(self, token: str) -> object:
+        if token in self._stopwords:
+            return _STOPWORD
+        if self._stemmer is not None:
+            return self._stemmer.stem(token, to_lowercase=False)
+        return token
+
+    def analyze(self, text: str) -> List[str]:
+        if self._lowercase:
+            text = text.lower()
+        token_to_term = self._token_to_term
+        terms = []
+        for token in _TOKEN.findall(text):
+            term = token_to_term.get(token)
+            if term is None:
+                term = self._analyze_token(token)
+                if len(token_to_term) < self._max_cached_tokens:
+                    token_to_term[token] = term
+            if term is not _STOPWORD:
+                terms.append(term)
+        return terms
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state["_token_to_term"] = {}
+        return state
@@ -0,0 +1,216 @@
+import logging
+import math
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+_logger = logging.getLogger(__name__)
+
+try:
+    from sentence_transformers import SentenceTransformer
+
+    EMBEDDINGS_SUPPORT = True
+except ImportError:
+    EMBEDDINGS_SUPPORT = False
+
+_models: Dict[str, "SentenceTransformer"] = {}
+_models_lock = threading.Lock()
+
+
+class LocalEmbedder:
+    """Encodes text with a small sentence-transformers model on the CPU.
+
+    Models are loaded once per name and shared by every source using them.
+    """
+
+    def __init__(self, model_name: str, batch_size: int = 32):
+        if not EMBEDDINGS_SUPPORT:
+            raise ImportError(
+                "sentence-transformers is required for embedding retrieval. "
+                "Install with: pip install yaaaf[embeddings]"
+            )
+        self.model_name = model_name
+        self._batch_size = batch_size
+
+    def _get_model(self) -> "SentenceTransformer":
+        with _models_lock:
+            if self.model_name not in _models:
+                _logger.info(f"Loading embedding model {self.model_name} on CPU")
+                _models[self.model_name] = SentenceTransformer(self.model_name, device="cpu")
+            return _models[self.model_name]
+
+    def load(self):
+        """Load the model now rather than on the first call to encode."""
+        self._get_model()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Return one L2-normalized float32 row per text."""
+        embeddings = self._get_model().encode(
+            texts,
+            batch_size=self._batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        return np.asarray(embeddings, dtype=np.float32)
+
+
+class DenseIndex:
+    """Nearest-neighbour index over normalized embeddings (inner product).
+
+    Small indices are searched exhaustively. From `ann_min_vectors` vectors
+    on, an inverted-file index is trained with k-means: each vector is
+    listed under its nearest centroid and a query only scans the lists of
+    its `n_probe` nearest centroids. Vectors added after training are
+    assigned to the existing centroids; the quantizer is retrained when the
+    index has grown fourfold since.
+    """
+
+    def __init__(self, n_probe: int = 8, ann_min_vectors: int = 20000):
+        self._n_probe = n_probe
+        self._ann_min_vectors = ann_min_vectors
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._count = 0
+        self._index_to_slot: Dict[str, int] = {}
+        self._slot_to_index: List[Optional[str]] = []
+
+        self._centroids: Optional[np.ndarray] = None
+        self._trained_count = 0
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._lists: Optional[List[np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return len(self._index_to_slot)
+
+    @property
+    def dimension(self) -> Optional[int]:
+        return self._vectors.shape[1] if self._count else None
+
+    def _reserve(self, count: int, dimension: int):
+        if self._count == 0 and self._vectors.shape[1] != dimension:
+            self._vectors = np.zeros((0, dimension), dtype=np.float32)
+        elif self._vectors.shape[1] != dimension:
+            raise ValueError(
+                f"Embedding dimension {dimension} does not match the index ({self._vectors.shape[1]})"
+            )
+        needed = self._count + count
+        if needed <= len(self._vectors):
+            return
+        capacity = max(needed, 2 * len(self._vectors), 1024)
+        for name, dtype, shape in (
+            ("_vectors", np.float32, (capacity, dimension)),
+            ("_alive", bool, (capacity,)),
+            ("_assignments", np.int32, (capacity,)),
+        ):
+            grown = np.zeros(shape, dtype=dtype)
+            grown[: self._count] = getattr(self, name)[: self._count]
+            setattr(self, name, grown)
+
+    def add_vectors(self, indices: List[str], vectors: np.ndarray):
+        """Index `vectors` (one row per index), replacing indices already present."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not indices:
+            return
+        for index in indices:
+            self.delete_index(index)
+        self._reserve(len(indices), vectors.shape[1])
+
+        start = self._count
+        self._vectors[start : start + len(indices)] = vectors
+        self._alive[start : start + len(indices)] = True
+        if self._centroids is not None:
+            self._assignments[start : start + len(indices)] = self._assign(vectors)
+        for offset, index in enumerate(indices):
+            self._index_to_slot[index] = start + offset
+            self._slot_to_index.append(index)
+        self._count += len(indices)
+        self._lists = None
+
+    def delete_index(self, index: str) -> bool:
+        slot = self._index_to_slot.pop(index, None)
+        if slot is None:
+            return False
+        self._alive[slot] = False
+        self._slot_to_index[slot] = None
+        return True
+
+    def get_vectors(self, indices: List[str]) -> np.ndarray:
+        slots = [self._index_to_slot[index] for index in indices]
+        return self._vectors[slots]
+
+    def get_centroids(self) -> Optional[np.ndarray]:
+        return self._centroids
+
+    def set_centroids(self, centroids: np.ndarray):
+        """Use a previously trained quantizer instead of training a new one."""
+        self._centroids = np.asarray(centroids, dtype=np.float32)
+        self._trained_count = max(self._count, self._ann_min_vectors)
+        if self._count:
+            self._assignments[: self._count] = self._assign(self._vectors[: self._count])
+        self._lists = None
+
+    def _assign(self, vectors: np.ndarray, block: int = 65536) -> np.ndarray:
+        assignments = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), block):
+            scores = vectors[start : start + block] @ self._centroids.T
+            assignments[start : start + block] = np.argmax(scores, axis=1)
+        return assignments
+
+    def _train(self):
+        from sklearn.cluster import MiniBatchKMeans
+
+        alive = np.flatnonzero(self._alive[: self._count])
+        n_clusters = min(len(alive), int(4 * math.sqrt(len(alive))))
+        sample = np.random.default_rng(0).choice(alive, size=min(len(alive), 100 * n_clusters), replace=False)
+        _logger.info(f"Training a {n_clusters}-list dense index on {len(sample)} of {len(alive)} vectors")
+        kmeans = MiniBatchKMeans(n_clusters=n_clusters, random_state=0, n_init=3, batch_size=4096)
+        kmeans.fit(self._vectors[sample])
+        centroids = kmeans.cluster_centers_.astype(np.float32)
+        centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+        self.set_centroids(centroids)
+        self._trained_count = self._count
+
+    def _get_lists(self) -> List[np.ndarray]:
+        if self._lists is None:
+            alive = np.flatnonzero(self._alive[: self._count])
+            order = alive[np.argsort(self._assignments[alive], kind="stable")]
+            bounds = np.searchsorted(
+                self._assignments[order], np.arange(len(self._centroids) + 1)
+            )
+            self._lists = [order[bounds[i] : bounds[i + 1]] for i in range(len(self._centroids))]
+        return self._lists
+
+    def search(self, query_vector: np.ndarray, topn: int) -> Tuple[List[str], List[float]]:
+        """Return the `topn` most similar indices and their inner products, best first."""
+        if not self._index_to_slot or topn <= 0:
+            return [], []
+        query_vector = np.asarray(query_vector, dtype=np.float32).reshape(-1)
+
+        live_count = len(self._index_to_slot)
+        if live_count >= self._ann_min_vectors and (
+            self._centroids is None or self._count > 4 * self._trained_count
+        ):
+            self._train()
+
+        if self._centroids is None or live_count < self._ann_min_vectors:
+            candidates = np.flatnonzero(self._alive[: self._count])
+        else:
+            probes = np.argsort(-(self._centroids @ query_vector))[: self._n_probe]
+            lists = self._get_lists()
+            candidates = np.concatenate([lists[probe] for probe in probes])
+            candidates = candidates[self._alive[candidates]]  # deleted since the lists were built
+        if len(candidates) == 0:
+            return [], []
+
+        scores = self._vectors[candidates] @ query_vector
+        if len(candidates) > topn:
+            best = np.argpartition(-scores, topn - 1)[:topn]
+        else:
+            best = np.arange(len(candidates))
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return (
+            [self._slot_to_index[slot] for slot in candidates[best]],
+            [float(score) for score in scores[best]],
+        )
@@ -1,50 +1,409 @@
 import numpy as np
 
-from nltk import download
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from typing import List, Tuple
-from rank_bm25 import BM25Okapi
+from array import array
+from collections import Counter
+from scipy.sparse import coo_matrix, csr_matrix
+from typing import Dict, Iterable, List, Optional, Tuple
 
+from yaaaf.components.retrievers.analyzer import Analyzer
 
-def _ensure_nltk_data():
-    """Ensure NLTK data is downloaded (called lazily on first use)."""
-    try:
-        stopwords.words("english")
-    except LookupError:
-        download("stopwords", quiet=True)
-    try:
-        word_tokenize("test")
-    except LookupError:
-        download("punkt_tab", quiet=True)
+# Pending documents are merged into the compiled matrix once they exceed
+# this many documents or this fraction of the compiled ones
+_MIN_PENDING_BEFORE_COMPILE = 1024
+_PENDING_FRACTION_BEFORE_COMPILE = 0.1
+# Deleted documents keep their slot until the next merge, which is forced
+# once they exceed this many slots or this fraction of all slots
+_MIN_DELETED_BEFORE_COMPILE = 1024
+_DELETED_FRACTION_BEFORE_COMPILE = 0.25
 
 
 class BM25LocalDB:
-    def __init__(self):
-        _ensure_nltk_data()  # Download only when actually needed
-        self._indices = []
-        self._texts = []
-        self._bm25 = None
-        self._stopwords = stopwords.words("english")
+    """Incremental Okapi BM25 index scored with sparse matrix products.
+
+    Term frequencies live in a term-major CSR matrix (terms x document
+    slots). Documents added since the last compilation sit in a compact
+    pending segment and are merged into the matrix lazily, at query time,
+    once the segment grows past a fraction of the corpus; deleted documents
+    are masked out and their slots are reclaimed at the next merge, which
+    also runs once they make up a fraction of the slots. Document frequencies and
+    lengths are kept exact on every add/delete, so there is never a full
+    rebuild to wait for.
+
+    A query gathers the CSR rows of its terms, turns their frequencies into
+    BM25 weights and scores every document with one sparse matrix-vector
+    product against the query IDFs. The top-k is selected with
+    a partial partition (np.partition) instead of sorting all scores.
+
+    The IDF is log(1 + (N - df + 0.5) / (df + 0.5)), which stays positive
+    for terms present in most documents without needing a corpus-wide
+    average IDF like BM25Okapi's epsilon floor.
+
+    Texts and queries are turned into terms by `analyzer` (default: regex
+    tokenization, lowercasing and English stopword removal).
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, analyzer: Optional[Analyzer] = None):
+        self._k1 = k1
+        self._b = b
+        self._analyzer = analyzer or Analyzer()
+
+        self._term_to_id: Dict[str, int] = {}
+        self._terms: List[str] = []  # term id -> term
+        self._document_frequency: List[int] = []  # term id -> number of live documents
+        self._index_to_slot: Dict[str, int] = {}
+        self._slot_to_index: List[Optional[str]] = []
+        self._lengths = array("d")  # slot -> document length
+        self._alive = bytearray()  # slot -> 1 while the document is indexed
+        self._num_documents = 0
+        self._total_length = 0
+
+        # Compiled segment: slots [0, _compiled_slots)
+        self._matrix = csr_matrix((0, 0), dtype=np.float32)
+        self._matrix_by_document = self._matrix.tocsc()
+        self._compiled_slots = 0
+
+        # Pending segment: slots [_compiled_slots, len(_slot_to_index))
+        self._pending_term_ids = array("i")
+        self._pending_frequencies = array("f")
+        self._pending_offsets = array("q", [0])
+        self._pending_matrix: Optional[csr_matrix] = None
+
+    def __len__(self) -> int:
+        return self._num_documents
+
+    @property
+    def analyzer(self) -> Analyzer:
+        return self._analyzer
+
+    def _tokenize(self, text: str) -> List[str]:
+        return self._analyzer.analyze(text)
 
     def add_text_and_index(self, text: str, index: str):
-        self._indices.append(index)
-        self._texts.append(word_tokenize(text))
+        """Index `text` under `index`, replacing any document already stored there."""
+        self.add_tokens_and_index(self._tokenize(text), index)
+
+    def _new_term(self, term: str) -> int:
+        term_id = len(self._terms)
+        self._term_to_id[term] = term_id
+        self._terms.append(term)
+        self._document_frequency.append(0)
+        return term_id
+
+    def add_tokens_and_index(self, tokens: Iterable[str], index: str):
+        """Index already tokenized text under `index`."""
+        if index in self._index_to_slot:
+            self.delete_index(index)
+
+        term_frequencies = Counter(tokens)
+        slot = len(self._slot_to_index)
+        length = 0
+        for term, frequency in term_frequencies.items():
+            term_id = self._term_to_id.get(term)
+            if term_id is None:
+                term_id = self._new_term(term)
+            self._document_frequency[term_id] += 1
+            self._pending_term_ids.append(term_id)
+            self._pending_frequencies.append(frequency)
+            length += frequency
+        self._pending_offsets.append(len(self._pending_term_ids))
+        self._pending_matrix = None
+
+        self._slot_to_index.append(index)
+        self._index_to_slot[index] = slot
+        self._lengths.append(length)
+        self._alive.append(1)
+        self._num_documents += 1
+        self._total_length += length
+
+    def add_term_frequencies(
+        self,
+        indices: List[str],
+        terms: List[str],
+        offsets: np.ndarray,
+        term_ids: np.ndarray,
+        frequencies: np.ndarray,
+    ):
+        """Bulk-index documents given as doc-major term frequencies.
+
+        Document i of `indices` has the terms `terms[term_ids[offsets[i]:offsets[i + 1]]]`
+        with the matching `frequencies`, the layout returned by get_term_frequencies.
+        Indices must be unique; those already indexed are replaced.
+        """
+        for index in indices:
+            if index in self._index_to_slot:
+                self.delete_index(index)
+
+        mapping = np.empty(len(terms), dtype=np.int32)
+        for local_id, term in enumerate(terms):
+            term_id = self._term_to_id.get(term)
+            mapping[local_id] = self._new_term(term) if term_id is None else term_id
+        global_ids = mapping[np.asarray(term_ids, dtype=np.int64)]
+        frequencies = np.asarray(frequencies, dtype=np.float32)
+        offsets = np.asarray(offsets, dtype=np.int64)
+
+        counts = np.bincount(global_ids, minlength=len(self._terms))
+        for term_id in np.flatnonzero(counts).tolist():
+            self._document_frequency[term_id] += int(counts[term_id])
+        documents = np.repeat(np.arange(len(indices)), np.diff(offsets))
+        lengths = np.bincount(documents, weights=frequencies, minlength=len(indices))
+
+        base = len(self._pending_term_ids)
+        self._pending_term_ids.frombytes(global_ids.astype(np.int32).tobytes())
+        self._pending_frequencies.frombytes(frequencies.tobytes())
+        self._pending_offsets.frombytes((offsets[1:] - offsets[0] + base).tobytes())
+        self._pending_matrix = None
+
+        for index in indices:
+            self._index_to_slot[index] = len(self._slot_to_index)
+            self._slot_to_index.append(index)
+        self._lengths.frombytes(lengths.astype(np.float64).tobytes())
+        self._alive.extend(b"\x01" * len(indices))
+        self._num_documents += len(indices)
+        self._total_length += float(lengths.sum())
+
+    def get_term_frequencies(
+        self, indices: List[str]
+    ) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+        """Export indexed documents as (terms, offsets, term_ids, frequencies).
+
+        The inverse of add_term_frequencies; `term_ids` point into `terms`.
+        """
+        row_term_ids = []
+        row_frequencies = []
+        for index in indices:
+            slot = self._index_to_slot[index]
+            if slot < self._compiled_slots:
+                start, end = self._matrix_by_document.indptr[slot : slot + 2]
+                row_term_ids.append(self._matrix_by_document.indices[start:end])
+                row_frequencies.append(self._matrix_by_document.data[start:end])
+            else:
+                pending_position = slot - self._compiled_slots
+                start = self._pending_offsets[pending_position]
+                end = self._pending_offsets[pending_position + 1]
+                row_term_ids.append(np.array(self._pending_term_ids[start:end], dtype=np.int32))
+                row_frequencies.append(np.array(self._pending_frequencies[start:end], dtype=np.float32))
+
+        offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(row) for row in row_term_ids])
+        if not row_term_ids or offsets[-1] == 0:
+            return [], offsets, np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+
+        global_ids, term_ids = np.unique(np.concatenate(row_term_ids), return_inverse=True)
+        return (
+            [self._terms[term_id] for term_id in global_ids.tolist()],
+            offsets,
+            term_ids.astype(np.int32),
+            np.concatenate(row_frequencies).astype(np.float32),
+        )
+
+    def delete_index(self, index: str) -> bool:
+        """Remove the document stored under `index`. Returns False if it was not indexed."""
+        slot = self._index_to_slot.pop(index, None)
+        if slot is None:
+            return False
+
+        if slot < self._compiled_slots:
+            start, end = self._matrix_by_document.indptr[slot : slot + 2]
+            term_ids = self._matrix_by_document.indices[start:end]
+        else:
+            pending_position = slot - self._compiled_slots
+            start = self._pending_offsets[pending_position]
+            end = self._pending_offsets[pending_position + 1]
+            term_ids = self._pending_term_ids[start:end]
+        for term_id in term_ids:
+            self._document_frequency[term_id] -= 1
+
+        self._slot_to_index[slot] = None
+        self._alive[slot] = 0
+        self._num_documents -= 1
+        self._total_length -= self._lengths[slot]
+        return True
+
+    def _num_pending(self) -> int:
+        return len(self._slot_to_index) - self._compiled_slots
+
+    def _num_deleted(self) -> int:
+        return len(self._slot_to_index) - self._num_documents
+
+    def _should_compile(self) -> bool:
+        num_slots = len(self._slot_to_index)
+        return self._num_pending() > max(
+            _MIN_PENDING_BEFORE_COMPILE,
+            _PENDING_FRACTION_BEFORE_COMPILE * self._compiled_slots,
+        ) or self._num_deleted() > max(
+            _MIN_DELETED_BEFORE_COMPILE, _DELETED_FRACTION_BEFORE_COMPILE * num_slots
+        )
+
+    def _compile(self):
+        """Merge the pending segment into the CSR matrix and compact away deleted documents.
+
+        Live documents keep their order but move to consecutive slots, so the
+        per-slot arrays shrink back to the number of indexed documents.
+        """
+        num_slots = len(self._slot_to_index)
+        num_terms = len(self._document_frequency)
+        alive = np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+        live_slots = np.flatnonzero(alive)
+        new_slots = np.full(num_slots, -1, dtype=np.int64)
+        new_slots[live_slots] = np.arange(len(live_slots))
+
+        compiled = self._matrix.tocoo()
+        keep = alive[compiled.col] if compiled.nnz else np.zeros(0, dtype=bool)
+
+        pending_counts = np.diff(np.frombuffer(self._pending_offsets, dtype=np.int64))
+        pending_slots = np.repeat(
+            np.arange(self._compiled_slots, num_slots, dtype=np.int64), pending_counts
+        )
+        pending_term_ids = np.frombuffer(self._pending_term_ids, dtype=np.int32)
+        pending_frequencies = np.frombuffer(self._pending_frequencies, dtype=np.float32)
+        pending_keep = alive[pending_slots] if len(pending_slots) else np.zeros(0, dtype=bool)
+
+        rows = np.concatenate([compiled.row[keep], pending_term_ids[pending_keep]])
+        cols = new_slots[np.concatenate([compiled.col[keep], pending_slots[pending_keep]])]
+        data = np.concatenate([compiled.data[keep], pending_frequencies[pending_keep]])
+        self._matrix = coo_matrix(
+            (data, (rows, cols)), shape=(num_terms, len(live_slots))
+        ).tocsr()
+        self._matrix_by_document = self._matrix.tocsc()
+        self._compiled_slots = len(live_slots)
+
+        if len(live_slots) < num_slots:
+            lengths = np.frombuffer(self._lengths, dtype=np.float64)[live_slots]
+            self._lengths = array("d", lengths.tobytes())
+            self._alive = bytearray(b"\x01" * len(live_slots))
+            self._slot_to_index = [self._slot_to_index[slot] for slot in live_slots.tolist()]
+            self._index_to_slot = {index: slot for slot, index in enumerate(self._slot_to_index)}
+
+        self._pending_term_ids = array("i")
+        self._pending_frequencies = array("f")
+        self._pending_offsets = array("q", [0])
+        self._pending_matrix = None
+
+    def _get_pending_matrix(self) -> csr_matrix:
+        """Term-major CSR matrix of the pending segment (terms x pending documents)."""
+        if self._pending_matrix is None:
+            offsets = np.frombuffer(self._pending_offsets, dtype=np.int64)
+            columns = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+            self._pending_matrix = coo_matrix(
+                (
+                    np.frombuffer(self._pending_frequencies, dtype=np.float32),
+                    (np.frombuffer(self._pending_term_ids, dtype=np.int32), columns),
+                ),
+                shape=(len(self._document_frequency), len(offsets) - 1),
+            ).tocsr()
+        return self._pending_matrix
+
+    def _score_segment(
+        self,
+        matrix: csr_matrix,
+        term_ids: np.ndarray,
+        idf: np.ndarray,
+        length_norm: np.ndarray,
+    ) -> np.ndarray:
+        """BM25 scores of every document in a segment as one sparse product."""
+        in_segment = term_ids < matrix.shape[0]
+        rows = matrix[term_ids[in_segment]]
+        frequencies = rows.data
+        weights = frequencies * (self._k1 + 1.0) / (frequencies + length_norm[rows.indices])
+        weighted = csr_matrix((weights, rows.indices, rows.indptr), shape=rows.shape)
+        return weighted.T @ idf[in_segment]
+
+    def _get_query_term_ids(self, text: str) -> np.ndarray:
+        return np.array(
+            sorted(
+                {
+                    self._term_to_id[term]
+                    for term in self._tokenize(text)
+                    if term in self._term_to_id
+                }
+            ),
+            dtype=np.int64,
+        )
+
+    def get_score_upper_bound(self, text: str) -> float:
+        """The highest score any document could get for `text` in this index.
+
+        Each query term contributes at most idf * (k1 + 1), reached as its term
+        frequency grows; terms missing from the index count with the idf of an
+        unseen term, so an index lacking part of the query scores lower.
+        Dividing scores by this bound makes them comparable across indices with
+        different vocabularies and sizes.
+        """
+        if self._num_documents == 0:
+            return 0.0
+        document_frequency = np.array(
+            [
+                self._document_frequency[self._term_to_id[term]] if term in self._term_to_id else 0
+                for term in set(self._tokenize(text))
+            ],
+            dtype=np.float64,
+        )
+        idf = np.log1p(
+            (self._num_documents - document_frequency + 0.5) / (document_frequency + 0.5)
+        )
+        return float(idf.sum() * (self._k1 + 1.0))
 
     def get_indices_from_text(
         self, text: str, topn: int
-    ) -> Tuple[List[str], List[str]]:
-        if self._bm25 is None:
+    ) -> Tuple[List[str], List[float]]:
+        """Return the `topn` best matching indices and their scores, best first."""
+        if self._num_documents == 0 or topn <= 0:
+            return [], []
+
+        term_ids = self._get_query_term_ids(text)
+        if len(term_ids) == 0:
             return [], []
-        scores = self._bm25.get_scores(word_tokenize(text))
-        best_n = np.argsort(-scores)[:topn]
-        return [self._indices[i] for i in best_n], scores[:topn]
+
+        if self._should_compile():
+            self._compile()
+
+        document_frequency = np.array(
+            [self._document_frequency[term_id] for term_id in term_ids], dtype=np.float64
+        )
+        idf = np.log1p(
+            (self._num_documents - document_frequency + 0.5) / (document_frequency + 0.5)
+        )
+        average_length = self._total_length / self._num_documents or 1.0
+        lengths = np.frombuffer(self._lengths, dtype=np.float64)
+        length_norm = self._k1 * (1.0 - self._b + self._b * lengths / average_length)
+
+        scores = np.zeros(len(self._slot_to_index), dtype=np.float64)
+        if self._compiled_slots:
+            scores[: self._compiled_slots] = self._score_segment(
+                self._matrix, term_ids, idf, length_norm[: self._compiled_slots]
+            )
+        if self._num_pending():
+            scores[self._compiled_slots :] = self._score_segment(
+                self._get_pending_matrix(),
+                term_ids,
+                idf,
+                length_norm[self._compiled_slots :],
+            )
+        scores[np.frombuffer(self._alive, dtype=np.uint8) == 0] = 0.0
+
+        candidates = np.flatnonzero(scores > 0.0)
+        if len(candidates) > topn:
+            # Keep everything tied with the k-th score so ties resolve deterministically
+            kth_score = -np.partition(-scores[candidates], topn - 1)[topn - 1]
+            candidates = candidates[scores[candidates] >= kth_score]
+        # Best score first, earlier documents first on ties
+        best = candidates[np.lexsort((candidates, -scores[candidates]))][:topn]
+        return (
+            [self._slot_to_index[slot] for slot in best],
+            [float(score) for score in scores[best]],
+        )
 
     def build(self):
-        if self._bm25 is None:
-            del self._bm25
-        try:
-            self._bm25 = BM25Okapi(self._texts)
-        except ZeroDivisionError:
-            # Handle empty corpus gracefully
-            self._bm25 = None
+        """Merge pending documents into the matrix and reclaim deleted slots ahead of the next query."""
+        if self._num_pending() or self._num_deleted():
+            self._compile()
+
+    def __setstate__(self, state: dict):
+        if "_texts" in state:
+            # Pickles from the BM25Okapi implementation store the tokenized texts
+            self.__init__()
+            for index, tokens in zip(state["_indices"], state["_texts"]):
+                self.add_text_and_index(" ".join(tokens), index)
+            return
+
+        self.__dict__.update(state)
@@ -0,0 +1,135 @@
+import re
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+_WORD = re.compile(r"\w+")
+# A chunk header such as "[report.pdf - Page 3]" names the copy, not the content
+_CHUNK_HEADER = re.compile(r"^\[[^\]\n]*\]\n\n")
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+@dataclass
+class DeduplicationReport:
+    """Chunks dropped at ingest because an equal or similar chunk was already indexed."""
+
+    chunks_seen: int = 0
+    exact_duplicates: int = 0
+    near_duplicates: int = 0
+    # (source of the dropped chunk, id of the chunk kept instead, estimated similarity)
+    examples: List[Tuple[str, str, float]] = field(default_factory=list)
+    max_examples: int = 20
+
+    @property
+    def chunks_dropped(self) -> int:
+        return self.exact_duplicates + self.near_duplicates
+
+    def add_near_duplicate(self, source: str, kept_id: str, similarity: float):
+        self.near_duplicates += 1
+        if len(self.examples) < self.max_examples:
+            self.examples.append((source, kept_id, round(similarity, 3)))
+
+
+def _choose_bands(num_permutations: int, threshold: float) -> Tuple[int, int]:
+    """Pick (bands, rows) whose LSH S-curve rises closest to `threshold`."""
+    best = None
+    for rows in range(1, num_permutations + 1):
+        if num_permutations % rows:
+            continue
+        bands = num_permutations // rows
+        # Similarity at which a pair becomes a candidate with probability 1/2
+        midpoint = (1 - 0.5 ** (1 / bands)) ** (1 / rows)
+        # Prefer the curve just below the threshold, so few true duplicates are missed
+        error = abs(midpoint - (threshold - 0.05))
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+
+class NearDuplicateIndex:
+    """MinHash signatures of word shingles, bucketed with locality-sensitive hashing.
+
+    Each chunk is reduced to `num_permutations` MinHash values of its word
+    `shingle_size`-grams; the fraction of equal values estimates the Jaccard
+    similarity of two chunks. Signatures are split into bands and a chunk is
+    only compared with the chunks sharing at least one band, so a lookup does
+    not depend on the size of the index.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        num_permutations: int = 128,
+        shingle_size: int = 3,
+        seed: int = 1,
+    ):
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = threshold
+        self.num_permutations = num_permutations
+        self._shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 31, num_permutations, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 31, num_permutations, dtype=np.uint64)
+        self._bands, self._rows = _choose_bands(num_permutations, threshold)
+        self._buckets: List[Dict[bytes, List[str]]] = [{} for _ in range(self._bands)]
+        self._signatures: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def signature(self, text: str) -> np.ndarray:
+        words = _WORD.findall(_CHUNK_HEADER.sub("", text, count=1).lower())
+        size = min(self._shingle_size, len(words)) or 1
+        shingles = {" ".join(words[i : i + size]) for i in range(max(1, len(words) - size + 1))}
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+            dtype=np.uint64,
+            count=len(shingles),
+        )
+        permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % _PRIME
+        return (permuted & _MAX_HASH).min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [
+            signature[band * self._rows : (band + 1) * self._rows].tobytes()
+            for band in range(self._bands)
+        ]
+
+    def find(self, signature: np.ndarray) -> Optional[Tuple[str, float]]:
+        """The indexed chunk most similar to `signature`, if at least as similar as the threshold."""
+        candidates = set()
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(bucket.get(key, ()))
+        best = None
+        for candidate in candidates:
+            similarity = float(np.mean(self._signatures[candidate] == signature))
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (candidate, similarity)
+        return best
+
+    def add(self, index: str, signature: np.ndarray):
+        if index in self._signatures:
+            self.remove(index)
+        self._signatures[index] = signature
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            bucket.setdefault(key, []).append(index)
+
+    def remove(self, index: str) -> bool:
+        signature = self._signatures.pop(index, None)
+        if signature is None:
+            return False
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            members = bucket[key]
+            members.remove(index)
+            if not members:
+                del bucket[key]
+        return True
+
+    def get_signatures(self, indices: List[str]) -> np.ndarray:
+        if not indices:
+            return np.zeros((0, self.num_permutations), dtype=np.uint32)
+        return np.stack([self._signatures[index] for index in indices])
@@ -0,0 +1,280 @@
+"""A prebuilt BM25 index of the planner examples, memory-mapped when opened.
+
+Layout of an index directory::
+
+    manifest.json       # {"version", "source_sha256", "analyzer", "k1", "b", "agents", "num_examples"}
+    terms.json          # vocabulary, term id -> term
+    term_offsets.npy    # term-major postings: term t owns entries term_offsets[t]:term_offsets[t + 1]
+    example_ids.npy     # example of each posting
+    frequencies.npy     # term frequency of each posting
+    lengths.npy         # number of terms per example
+    agent_masks.npy     # uint64 per example, bit i set when the example uses agents[i]
+    text.bin            # UTF-8 scenario and workflow of every example, concatenated
+    text_offsets.npy    # scenario i is text[2i]:text[2i + 1], its workflow text[2i + 1]:text[2i + 2]
+
+The index is built once from the dataset CSV and shared by every set of
+available agents: examples using an agent that is not available are masked
+out at query time instead of being left out of a separate index.
+"""
+
+import ast
+import csv
+import hashlib
+import json
+import logging
+import mmap
+import os
+import shutil
+import uuid
+from typing import Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from scipy.sparse import coo_matrix
+
+from yaaaf.components.retrievers.analyzer import Analyzer
+
+_logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+_MAX_AGENTS = 64
+
+
+def parse_agents_used(agents_str: str) -> Set[str]:
+    """Parse the agents_used column of the dataset.
+
+    The column can be in format: "['Agent1', 'Agent2']" or "Agent1,Agent2"
+    """
+    if not agents_str:
+        return set()
+
+    agents_str = agents_str.strip()
+
+    # Try to parse as Python list literal
+    if agents_str.startswith("["):
+        try:
+            return set(ast.literal_eval(agents_str))
+        except (ValueError, SyntaxError):
+            pass
+
+    # Fallback: split by comma
+    return set(a.strip().strip("'\"") for a in agents_str.split(","))
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PlannerExampleIndex:
+    """BM25 over the scenarios of the planner examples, with agent bitmask filtering.
+
+    Scores use the same formula as BM25LocalDB, with statistics over the whole
+    dataset. `search` takes a mask from `get_agent_mask` and only returns
+    examples whose agents all belong to it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, MANIFEST_NAME)) as f:
+            self.manifest = json.load(f)
+        with open(os.path.join(path, "terms.json")) as f:
+            self._term_to_id = {term: term_id for term_id, term in enumerate(json.load(f))}
+        self._analyzer = Analyzer()
+        self._k1 = self.manifest["k1"]
+        self._b = self.manifest["b"]
+        self._agent_bits = {agent: 1 << bit for bit, agent in enumerate(self.manifest["agents"])}
+
+        def load(name: str) -> np.ndarray:
+            return np.load(os.path.join(path, name), mmap_mode="r")
+
+        self._term_offsets = load("term_offsets.npy")
+        self._example_ids = load("example_ids.npy")
+        self._frequencies = load("frequencies.npy")
+        self._lengths = load("lengths.npy")
+        self._agent_masks = load("agent_masks.npy")
+        self._text_offsets = load("text_offsets.npy")
+        self._text_file = open(os.path.join(path, "text.bin"), "rb")
+        self._text = (
+            mmap.mmap(self._text_file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self._text_offsets[-1] > 0
+            else b""
+        )
+        self._average_length = float(np.mean(self._lengths)) if len(self._lengths) else 1.0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    @staticmethod
+    def is_current(path: str, source_sha256: str) -> bool:
+        """Whether `path` holds an index of this version built from the given dataset."""
+        try:
+            with open(os.path.join(path, MANIFEST_NAME)) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return (
+            manifest.get("version") == INDEX_VERSION
+            and manifest.get("source_sha256") == source_sha256
+            and manifest.get("analyzer") == Analyzer().name
+        )
+
+    @classmethod
+    def build(
+        cls, csv_path: str, path: str, k1: float = 1.5, b: float = 0.75
+    ) -> "PlannerExampleIndex":
+        """Index the dataset at `csv_path` into the directory `path`, replacing any index there."""
+        analyzer = Analyzer()
+        texts: List[str] = []
+        agent_sets: List[Set[str]] = []
+        posting_terms: List[int] = []
+        posting_examples: List[int] = []
+        frequencies: List[int] = []
+        term_to_id: dict = {}
+
+        with open(csv_path, "r", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                scenario = row.get("scenario", "").strip()
+                workflow_yaml = row.get("workflow_yaml", "").strip()
+                if not scenario or not workflow_yaml:
+                    continue
+                example_id = len(agent_sets)
+                terms, counts = np.unique(analyzer.analyze(scenario), return_counts=True)
+                for term, count in zip(terms.tolist(), counts.tolist()):
+                    posting_terms.append(term_to_id.setdefault(term, len(term_to_id)))
+                    posting_examples.append(example_id)
+                    frequencies.append(count)
+                texts.extend([scenario, workflow_yaml])
+                agent_sets.append(parse_agents_used(row.get("agents_used", "")))
+
+        agents = sorted(set().union(*agent_sets))
+        if len(agents) > _MAX_AGENTS:
+            raise ValueError(
+                f"The planner dataset uses {len(agents)} agents, at most {_MAX_AGENTS} are supported"
+            )
+        bits = {agent: 1 << bit for bit, agent in enumerate(agents)}
+        agent_masks = np.array(
+            [sum(bits[agent] for agent in agent_set) for agent_set in agent_sets], dtype=np.uint64
+        )
+
+        posting_examples = np.array(posting_examples, dtype=np.int64)
+        postings = coo_matrix(
+            (
+                np.array(frequencies, dtype=np.float32),
+                (np.array(posting_terms, dtype=np.int64), posting_examples),
+            ),
+            shape=(len(term_to_id), len(agent_sets)),
+        ).tocsr()
+        postings.sort_indices()
+        lengths = np.bincount(posting_examples, weights=frequencies, minlength=len(agent_sets))
+
+        encoded = [text.encode("utf-8") for text in texts]
+        text_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        text_offsets[1:] = np.cumsum([len(text) for text in encoded])
+
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        temporary_path = f"{path}.tmp-{uuid.uuid4().hex}"
+        os.makedirs(temporary_path)
+        with open(os.path.join(temporary_path, "text.bin"), "wb") as f:
+            for text in encoded:
+                f.write(text)
+        np.save(os.path.join(temporary_path, "text_offsets.npy"), text_offsets)
+        np.save(os.path.join(temporary_path, "term_offsets.npy"), postings.indptr.astype(np.int64))
+        np.save(os.path.join(temporary_path, "example_ids.npy"), postings.indices.astype(np.int32))
+        np.save(os.path.join(temporary_path, "frequencies.npy"), postings.data.astype(np.float32))
+        np.save(os.path.join(temporary_path, "lengths.npy"), lengths.astype(np.float32))
+        np.save(os.path.join(temporary_path, "agent_masks.npy"), agent_masks)
+        with open(os.path.join(temporary_path, "terms.json"), "w") as f:
+            json.dump(sorted(term_to_id, key=term_to_id.get), f)
+        # The manifest is written last: a directory without one is never loaded
+        with open(os.path.join(temporary_path, MANIFEST_NAME), "w") as f:
+            json.dump(
+                {
+                    "version": INDEX_VERSION,
+                    "source_sha256": file_sha256(csv_path),
+                    "analyzer": analyzer.name,
+                    "k1": k1,
+                    "b": b,
+                    "agents": agents,
+                    "num_examples": len(agent_sets),
+                },
+                f,
+            )
+
+        if os.path.exists(path):
+            shutil.rmtree(path, ignore_errors=True)
+        try:
+            os.rename(temporary_path, path)
+        except OSError:
+            # Another process built the same index first
+            shutil.rmtree(temporary_path, ignore_errors=True)
+        _logger.info(f"Built planner example index of {len(agent_sets)} examples at {path}")
+        return cls(path)
+
+    def get_agent_mask(self, available_agents: Optional[Iterable[str]]) -> Optional[int]:
+        """Bitmask of the available agents, or None to allow every example."""
+        if available_agents is None:
+            return None
+        return sum(self._agent_bits.get(agent, 0) for agent in set(available_agents))
+
+    def _is_allowed(self, agent_mask: int) -> np.ndarray:
+        """Per example: whether every agent it uses is in `agent_mask`."""
+        unavailable = np.uint64(~agent_mask & ((1 << _MAX_AGENTS) - 1))
+        return (self._agent_masks & unavailable) == 0
+
+    def count_allowed(self, agent_mask: Optional[int]) -> int:
+        if agent_mask is None:
+            return len(self)
+        return int(np.count_nonzero(self._is_allowed(agent_mask)))
+
+    def search(self, query: str, topn: int, agent_mask: Optional[int] = None) -> List[int]:
+        """Positions of the `topn` best examples for `query` using only agents in `agent_mask`."""
+        if len(self) == 0 or topn <= 0:
+            return []
+        term_ids = sorted(
+            {
+                self._term_to_id[term]
+                for term in self._analyzer.analyze(query)
+                if term in self._term_to_id
+            }
+        )
+        if not term_ids:
+            return []
+
+        length_norm = self._k1 * (1.0 - self._b + self._b * self._lengths / self._average_length)
+        scores = np.zeros(len(self), dtype=np.float64)
+        for term_id in term_ids:
+            start, end = self._term_offsets[term_id : term_id + 2]
+            examples = self._example_ids[start:end]
+            frequencies = self._frequencies[start:end]
+            idf = np.log1p((len(self) - (end - start) + 0.5) / ((end - start) + 0.5))
+            # Postings of a term are unique per example, so fancy-index addition is safe
+            scores[examples] += (
+                idf * frequencies * (self._k1 + 1.0) / (frequencies + length_norm[examples])
+            )
+        if agent_mask is not None:
+            scores[~self._is_allowed(agent_mask)] = 0.0
+
+        candidates = np.flatnonzero(scores > 0.0)
+        if len(candidates) > topn:
+            kth_score = -np.partition(-scores[candidates], topn - 1)[topn - 1]
+            candidates = candidates[scores[candidates] >= kth_score]
+        # Best score first, earlier examples first on ties
+        return candidates[np.lexsort((candidates, -scores[candidates]))][:topn].tolist()
+
+    def get_example(self, position: int) -> Tuple[str, str]:
+        """The (scenario, workflow_yaml) of the example at `position`."""
+        start, middle, end = self._text_offsets[2 * position : 2 * position + 3]
+        return (
+            self._text[start:middle].decode("utf-8"),
+            self._text[middle:end].decode("utf-8"),
+        )
+
+    def close(self):
+        if isinstance(self._text, mmap.mmap):
+            self._text.close()
+        self._text_file.close()
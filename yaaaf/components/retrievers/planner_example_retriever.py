@@ -1,41 +1,37 @@
-import ast
-import csv
-import hashlib
 import logging
+import os
+import threading
 from importlib.resources import files
 from typing import List, Optional, Set, Tuple
 
-from yaaaf.components.retrievers.local_vector_db import BM25LocalDB
+from yaaaf.components.retrievers.planner_example_index import (
+    PlannerExampleIndex,
+    file_sha256,
+)
 
 _logger = logging.getLogger(__name__)
 
+# Index written next to the dataset when the package is built (scripts/planner_dataset/build_index.py)
+PREBUILT_INDEX_NAME = "planner_examples.index"
+
+
+def get_cache_directory() -> str:
+    """Directory for indices built on first run: $YAAAF_CACHE_DIR, default ~/.cache/yaaaf."""
+    return os.environ.get("YAAAF_CACHE_DIR") or os.path.join(
+        os.path.expanduser("~"), ".cache", "yaaaf"
+    )
+
 
 class PlannerExampleRetriever:
     """Retrieves relevant planner examples from the dataset using BM25.
 
     Supports filtering examples by available agents - only examples that use
-    a subset of the available agents will be indexed and returned.
+    a subset of the available agents are returned. All retrievers share one
+    memory-mapped index; the agent filter is a bitmask applied at query time.
     """
 
-    # Cache instances by available_agents hash to avoid reloading
-    _instances: dict[str, "PlannerExampleRetriever"] = {}
-
-    def __new__(cls, available_agents: Optional[List[str]] = None):
-        """Cache instances by available_agents to avoid reloading the dataset."""
-        cache_key = cls._compute_cache_key(available_agents)
-        if cache_key not in cls._instances:
-            instance = super().__new__(cls)
-            instance._initialized = False
-            cls._instances[cache_key] = instance
-        return cls._instances[cache_key]
-
-    @staticmethod
-    def _compute_cache_key(available_agents: Optional[List[str]]) -> str:
-        """Compute a cache key based on available agents."""
-        if available_agents is None:
-            return "all"
-        sorted_agents = sorted(available_agents)
-        return hashlib.md5(",".join(sorted_agents).encode()).hexdigest()
+    _index: Optional[PlannerExampleIndex] = None
+    _index_lock = threading.Lock()
 
     def __init__(self, available_agents: Optional[List[str]] = None):
         """Initialize the retriever with optional agent filtering.
@@ -44,91 +40,51 @@ class PlannerExampleRetriever:
             available_agents: List of available agent class names (e.g., ["BashAgent", "CodeEditAgent"]).
                             If None, all examples are included.
         """
-        if getattr(self, "_initialized", False):
-            return
-
         self._available_agents: Optional[Set[str]] = (
             set(available_agents) if available_agents else None
         )
-        self._vector_db = BM25LocalDB()
-        self._id_to_example: dict[str, Tuple[str, str]] = {}  # id -> (scenario, workflow_yaml)
-        self._load_dataset()
-        self._initialized = True
-
-    def _parse_agents_used(self, agents_str: str) -> Set[str]:
-        """Parse the agents_used column from CSV.
-
-        The column can be in format: "['Agent1', 'Agent2']" or "Agent1,Agent2"
-        """
-        if not agents_str:
-            return set()
-
-        agents_str = agents_str.strip()
-
-        # Try to parse as Python list literal
-        if agents_str.startswith("["):
-            try:
-                agents_list = ast.literal_eval(agents_str)
-                return set(agents_list)
-            except (ValueError, SyntaxError):
-                pass
-
-        # Fallback: split by comma
-        return set(a.strip().strip("'\"") for a in agents_str.split(","))
+        self._example_index = self._get_index()
+        self._agent_mask = self._example_index.get_agent_mask(self._available_agents)
+
+        count = self._example_index.count_allowed(self._agent_mask)
+        if self._available_agents:
+            _logger.info(
+                f"Using {count} of {len(self._example_index)} planner examples "
+                f"(available: {sorted(self._available_agents)})"
+            )
+        else:
+            _logger.info(f"Using {count} planner examples (no filtering)")
 
-    def _is_example_allowed(self, agents_used: Set[str]) -> bool:
-        """Check if an example should be included based on available agents."""
-        if self._available_agents is None:
-            return True
+    @classmethod
+    def load_index(cls):
+        """Open the shared example index ahead of the first retriever."""
+        cls._get_index()
 
-        # Example is allowed if all its agents are in the available set
-        return agents_used.issubset(self._available_agents)
+    @classmethod
+    def _get_index(cls) -> PlannerExampleIndex:
+        with cls._index_lock:
+            if cls._index is None:
+                cls._index = cls._load_index()
+            return cls._index
 
-    def _load_dataset(self):
-        """Load the planner dataset CSV and index scenarios filtered by available agents."""
+    @staticmethod
+    def _load_index() -> PlannerExampleIndex:
+        """Open the prebuilt index, or the one built on first run from the dataset CSV."""
         try:
-            csv_path = files("yaaaf.data").joinpath("planner_dataset.csv")
-
-            with csv_path.open("r", encoding="utf-8") as f:
-                reader = csv.DictReader(f)
-                count = 0
-                skipped = 0
-
-                for row in reader:
-                    scenario = row.get("scenario", "").strip()
-                    workflow_yaml = row.get("workflow_yaml", "").strip()
-                    agents_used_str = row.get("agents_used", "")
-
-                    if not scenario or not workflow_yaml:
-                        continue
-
-                    # Parse and filter by available agents
-                    agents_used = self._parse_agents_used(agents_used_str)
-                    if not self._is_example_allowed(agents_used):
-                        skipped += 1
-                        continue
+            data = files("yaaaf.data")
+            csv_path = str(data.joinpath("planner_dataset.csv"))
+            source_sha256 = file_sha256(csv_path)
 
-                    # Use row index as ID
-                    example_id = str(count)
+            prebuilt_path = str(data.joinpath(PREBUILT_INDEX_NAME))
+            if PlannerExampleIndex.is_current(prebuilt_path, source_sha256):
+                return PlannerExampleIndex(prebuilt_path)
 
-                    # Index the scenario for retrieval
-                    self._vector_db.add_text_and_index(scenario, example_id)
-
-                    # Store the full example
-                    self._id_to_example[example_id] = (scenario, workflow_yaml)
-                    count += 1
-
-                # Build the BM25 index
-                self._vector_db.build()
-
-                if self._available_agents:
-                    _logger.info(
-                        f"Loaded {count} planner examples into BM25 index "
-                        f"(skipped {skipped} due to agent filtering, "
-                        f"available: {sorted(self._available_agents)})"
-                    )
-                else:
-                    _logger.info(f"Loaded {count} planner examples into BM25 index (no filtering)")
+            cached_path = os.path.join(
+                get_cache_directory(), f"planner_examples-{source_sha256[:16]}"
+            )
+            if PlannerExampleIndex.is_current(cached_path, source_sha256):
+                return PlannerExampleIndex(cached_path)
+            return PlannerExampleIndex.build(csv_path, cached_path)
 
         except Exception as e:
             _logger.error(f"Failed to load planner dataset: {e}")
@@ -144,14 +100,8 @@ class PlannerExampleRetriever:
         Returns:
             List of tuples (scenario, workflow_yaml) for the most relevant examples
         """
-        example_ids, _ = self._vector_db.get_indices_from_text(query, topn=topn)
-
-        examples = []
-        for example_id in example_ids:
-            if example_id in self._id_to_example:
-                examples.append(self._id_to_example[example_id])
-
-        return examples
+        positions = self._example_index.search(query, topn, self._agent_mask)
+        return [self._example_index.get_example(position) for position in positions]
 
     def format_examples_for_prompt(self, query: str, topn: int = 3) -> str:
         """Retrieve and format examples for inclusion in a prompt.
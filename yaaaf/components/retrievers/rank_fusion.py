@@ -0,0 +1,18 @@
+from typing import Dict, List, Tuple
+
+
+def reciprocal_rank_fusion(
+    rankings: List[List[str]], k: int = 60
+) -> List[Tuple[str, float]]:
+    """Fuse ranked lists of ids with reciprocal rank fusion.
+
+    Each list contributes 1 / (k + rank) to the ids it contains (rank starts
+    at 1), so ids ranked well by several retrievers rise to the top without
+    having to compare their raw scores. Returns (id, fused score), best first;
+    ties keep the order in which ids were first seen.
+    """
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, 1):
+            fused[item] = fused.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+from yaaaf.components.sources.rag_source import RAGSource
+
+_logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RetrievedPassage:
+    """A chunk returned by a multi-source search."""
+
+    text: str
+    score: float  # normalized by its source, comparable across sources
+    source_index: int
+    chunk_id: str
+
+
+class RetrievalCoordinator:
+    """Searches several RAG sources at once and merges them into one ranking.
+
+    Every source is queried concurrently on a shared thread pool. The results
+    of each source are cached under (source, source version, query, topn), so
+    repeated questions are answered from memory until that source changes,
+    while the other sources keep their cached results. Sources return
+    normalized scores, which are merged into a single global top-k.
+    """
+
+    def __init__(
+        self, sources: Sequence[RAGSource], max_workers: int = 8, cache_size: int = 512
+    ):
+        self._sources = list(sources)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, min(max_workers, len(self._sources))),
+            thread_name_prefix="yaaaf-retrieval",
+        )
+        self._cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[int, int, str, int], List[Tuple[str, str, float]]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def _search_source(self, source_index: int, query: str, topn: int) -> List[Tuple[str, str, float]]:
+        source = self._sources[source_index]
+        key = (source_index, source.get_version(), query, topn)
+        with self._cache_lock:
+            results = self._cache.get(key)
+            if results is not None:
+                self._cache.move_to_end(key)
+                return results
+
+        results = source.get_scored_data(query, topn)
+        with self._cache_lock:
+            self._cache[key] = results
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return results
+
+    async def search(
+        self, query: str, topn: int = 10, source_indices: Optional[Sequence[int]] = None
+    ) -> List[RetrievedPassage]:
+        """Return the `topn` best passages for `query` over the given sources (default: all).
+
+        Passages stored in several sources are returned once, with their best score.
+        """
+        if source_indices is None:
+            source_indices = range(len(self._sources))
+        source_indices = sorted(set(source_indices))
+        loop = asyncio.get_running_loop()
+        per_source = await asyncio.gather(
+            *(
+                loop.run_in_executor(self._executor, self._search_source, index, query, topn)
+                for index in source_indices
+            ),
+            return_exceptions=True,
+        )
+
+        passages: List[RetrievedPassage] = []
+        for source_index, results in zip(source_indices, per_source):
+            if isinstance(results, BaseException):
+                _logger.warning(f"Retrieval from source {source_index} failed: {results}")
+                continue
+            passages.extend(
+                RetrievedPassage(text=text, score=score, source_index=source_index, chunk_id=chunk_id)
+                for chunk_id, text, score in results
+            )
+
+        # Best score first; the order of the sources breaks ties
+        passages.sort(key=lambda passage: -passage.score)
+        merged: List[RetrievedPassage] = []
+        seen = set()
+        for passage in passages:
+            if passage.chunk_id in seen:
+                continue
+            seen.add(passage.chunk_id)
+            merged.append(passage)
+            if len(merged) == topn:
+                break
+        return merged
@@ -0,0 +1,136 @@
+import re
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+_WORD = re.compile(r"\S+")
+_HEADING = re.compile(r"^[ \t]*#{1,6}[ \t]+\S.*$", re.MULTILINE)
+_PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n")
+_SENTENCE_END = re.compile(r"[.!?][\"')\]]*$")
+
+# Break strength after a word: a window prefers to end where the strength is highest
+_NO_BREAK = 0
+_SENTENCE_BREAK = 1
+_PARAGRAPH_BREAK_STRENGTH = 2
+
+
+@dataclass
+class TextChunk:
+    """A passage of a document and where it came from.
+
+    `char_start`/`char_end` are offsets into the page text (or into the whole
+    text for documents without pages); `token_count` counts whitespace-separated
+    words of the passage.
+    """
+
+    text: str
+    source: str
+    chunk_index: int
+    page: Optional[int]
+    heading: Optional[str]
+    char_start: int
+    char_end: int
+    token_count: int
+
+    def get_metadata(self) -> Dict[str, Any]:
+        metadata = asdict(self)
+        del metadata["text"]
+        return metadata
+
+
+class TextChunker:
+    """Splits documents into overlapping windows of at most `chunk_size` words.
+
+    Markdown headings and page breaks always start a new chunk. Inside a
+    section a window ends at the last paragraph break in its second half,
+    or failing that the last sentence end, so passages rarely stop mid-
+    sentence. Consecutive windows of a section share `chunk_overlap` words.
+    """
+
+    def __init__(self, chunk_size: int = 256, chunk_overlap: int = 32):
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        if not 0 <= chunk_overlap < chunk_size:
+            raise ValueError("chunk_overlap must be between 0 and chunk_size - 1")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+
+    def chunk_text(self, text: str, source: str = "") -> List[TextChunk]:
+        return self.chunk_pages([(None, text)], source)
+
+    def chunk_pages(
+        self, pages: List[Tuple[Optional[int], str]], source: str = ""
+    ) -> List[TextChunk]:
+        """Chunk (page number, page text) pairs; use None as page number for unpaged text."""
+        chunks: List[TextChunk] = []
+        heading: Optional[str] = None
+        for page, page_text in pages:
+            for section_start, section_end, section_heading in self._split_sections(page_text):
+                heading = section_heading or heading
+                for start, end, token_count in self._windows(page_text, section_start, section_end):
+                    body = page_text[start:end]
+                    if heading and not body.lstrip().startswith(heading):
+                        body = f"{heading}\n{body}"
+                    chunks.append(
+                        TextChunk(
+                            text=f"{self._header(source, page)}{body}",
+                            source=source,
+                            chunk_index=len(chunks),
+                            page=page,
+                            heading=heading,
+                            char_start=start,
+                            char_end=end,
+                            token_count=token_count,
+                        )
+                    )
+        return chunks
+
+    @staticmethod
+    def _header(source: str, page: Optional[int]) -> str:
+        if not source:
+            return ""
+        if page is None:
+            return f"[{source}]\n\n"
+        return f"[{source} - Page {page}]\n\n"
+
+    @staticmethod
+    def _split_sections(text: str) -> List[Tuple[int, int, Optional[str]]]:
+        """Return (start, end, heading) spans; each heading opens a new section."""
+        sections = []
+        start, heading = 0, None
+        for match in _HEADING.finditer(text):
+            if text[start : match.start()].strip():
+                sections.append((start, match.start(), heading))
+            start, heading = match.start(), match.group().strip()
+        if text[start:].strip():
+            sections.append((start, len(text), heading))
+        return sections
+
+    def _windows(self, text: str, start: int, end: int) -> List[Tuple[int, int, int]]:
+        """Return (char_start, char_end, word_count) windows covering text[start:end]."""
+        words = [(match.start() + start, match.end() + start) for match in _WORD.finditer(text[start:end])]
+        if not words:
+            return []
+
+        breaks = []
+        for i, (word_start, word_end) in enumerate(words):
+            if i + 1 < len(words) and _PARAGRAPH_BREAK.search(text, word_end, words[i + 1][0]):
+                breaks.append(_PARAGRAPH_BREAK_STRENGTH)
+            elif _SENTENCE_END.search(text[word_start:word_end]):
+                breaks.append(_SENTENCE_BREAK)
+            else:
+                breaks.append(_NO_BREAK)
+
+        windows = []
+        first = 0
+        while True:
+            last = min(first + self.chunk_size, len(words))
+            if last < len(words):
+                # End after the strongest break in the second half of the window
+                earliest = first + max(1, self.chunk_size // 2)
+                best = max(range(earliest, last + 1), key=lambda i: (breaks[i - 1], i))
+                if breaks[best - 1] > _NO_BREAK:
+                    last = best
+            windows.append((words[first][0], words[last - 1][1], last - first))
+            if last == len(words):
+                return windows
+            first = max(last - self.chunk_overlap, first + 1)
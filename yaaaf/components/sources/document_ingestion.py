@@ -0,0 +1,267 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from yaaaf.components.sources.rag_source import PDF_SUPPORT, RAGSource
+
+if PDF_SUPPORT:
+    import PyPDF2
+
+_logger = logging.getLogger(__name__)
+
+TEXT_EXTENSIONS = (".txt", ".md", ".html", ".htm")
+PDF_EXTENSIONS = (".pdf",)
+
+# Pages extracted by one worker task: large PDFs are fanned out in ranges of this size
+DEFAULT_PAGES_PER_TASK = 16
+
+
+@dataclass
+class IngestionReport:
+    """Outcome of one synchronisation of a document folder with its RAG source."""
+
+    files_seen: int = 0
+    files_indexed: int = 0
+    files_skipped: int = 0
+    files_removed: int = 0
+    files_failed: int = 0
+    pages: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.pages / self.seconds if self.seconds > 0 else 0.0
+
+
+@dataclass
+class _FileState:
+    mtime_ns: int
+    size: int
+    sha256: str
+    chunk_ids: List[str] = field(default_factory=list)
+
+
+@dataclass
+class _PendingFile:
+    path: str
+    stat: os.stat_result
+    sha256: str
+    pages: List[Tuple[Optional[int], str]] = field(default_factory=list)
+    outstanding: int = 0
+    failed: bool = False
+
+
+def _read_text_file(path: str) -> Tuple[int, List[Tuple[Optional[int], str]]]:
+    """Worker task: the whole text file as a single unpaged page."""
+    with open(path, "rb") as f:
+        content = f.read()
+    try:
+        text = content.decode("utf-8")
+    except UnicodeDecodeError:
+        text = content.decode("latin-1")
+    return 1, [(None, text)]
+
+
+def _read_pdf_pages(
+    path: str, first_page: int, last_page: int
+) -> Tuple[int, List[Tuple[Optional[int], str]]]:
+    """Worker task: the total page count and the non-empty pages first_page..last_page (1-based)."""
+    reader = PyPDF2.PdfReader(path)
+    total_pages = len(reader.pages)
+    pages = []
+    for page_number in range(first_page, min(last_page, total_pages) + 1):
+        page_text = reader.pages[page_number - 1].extract_text()
+        if page_text.strip():
+            pages.append((page_number, page_text))
+    return total_pages, pages
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def list_documents(path: str) -> List[str]:
+    """The supported documents at `path`: the file itself, or the files directly inside the directory."""
+    if os.path.isfile(path):
+        return [path]
+    if not os.path.isdir(path):
+        return []
+    return sorted(
+        os.path.join(path, filename)
+        for filename in os.listdir(path)
+        if filename.lower().endswith(TEXT_EXTENSIONS + PDF_EXTENSIONS)
+        and os.path.isfile(os.path.join(path, filename))
+    )
+
+
+class DocumentIngestor:
+    """Keeps a RAG source in sync with a file or folder of documents.
+
+    Text extraction (PDF parsing above all) runs on a pool of worker
+    processes; large PDFs are split into page ranges so a single big file
+    also uses every core. Each file is chunked and indexed on the calling
+    thread as soon as all of its pages are back. Files whose size and mtime
+    are unchanged since the last sync are skipped without being read, and
+    touched files whose content hash is unchanged are not parsed again.
+    """
+
+    def __init__(
+        self,
+        rag_source: RAGSource,
+        path: str,
+        max_workers: Optional[int] = None,
+        pages_per_task: int = DEFAULT_PAGES_PER_TASK,
+    ):
+        self.rag_source = rag_source
+        self.path = path
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.pages_per_task = pages_per_task
+        self._file_states: Dict[str, _FileState] = {}
+        self._chunk_references: Dict[str, int] = {}
+        self._sync_lock = threading.Lock()  # one sync of this folder at a time
+
+    def sync(self) -> IngestionReport:
+        """Index new and changed documents and drop the chunks of deleted ones.
+
+        Concurrent calls run one after the other, so the second one finds
+        the files the first one indexed unchanged.
+        """
+        with self._sync_lock:
+            return self._sync()
+
+    def _sync(self) -> IngestionReport:
+        started = time.perf_counter()
+        report = IngestionReport()
+        paths = list_documents(self.path)
+        report.files_seen = len(paths)
+
+        for removed_path in set(self._file_states) - set(paths):
+            self._forget(removed_path)
+            report.files_removed += 1
+
+        pending: List[_PendingFile] = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                state = self._file_states.get(path)
+                if state and (state.mtime_ns, state.size) == (stat.st_mtime_ns, stat.st_size):
+                    report.files_skipped += 1
+                    continue
+                sha256 = _hash_file(path)
+            except OSError as e:
+                _logger.warning(f"Cannot read {path}: {e}")
+                report.files_failed += 1
+                continue
+            if state and state.sha256 == sha256:
+                state.mtime_ns, state.size = stat.st_mtime_ns, stat.st_size
+                report.files_skipped += 1
+                continue
+            if path.lower().endswith(PDF_EXTENSIONS) and not PDF_SUPPORT:
+                _logger.warning(f"Skipping {path}: PyPDF2 is required for PDF processing")
+                report.files_failed += 1
+                continue
+            pending.append(_PendingFile(path=path, stat=stat, sha256=sha256))
+
+        if pending:
+            self._extract_and_index(pending, report)
+
+        report.seconds = time.perf_counter() - started
+        if pending or report.files_removed:
+            _logger.info(
+                f"Ingested {self.path}: {report.files_indexed} files indexed, "
+                f"{report.files_skipped} unchanged, {report.files_removed} removed, "
+                f"{report.files_failed} failed; {report.pages} pages and {report.chunks} chunks "
+                f"in {report.seconds:.2f}s ({report.pages_per_second:.1f} pages/s)"
+            )
+        return report
+
+    def _create_executor(self, pending: List[_PendingFile]) -> Executor:
+        if self.max_workers == 1 or (
+            len(pending) == 1 and not pending[0].path.lower().endswith(PDF_EXTENSIONS)
+        ):
+            # Not worth starting processes for
+            return ThreadPoolExecutor(max_workers=1)
+        return ProcessPoolExecutor(max_workers=self.max_workers)
+
+    def _extract_and_index(self, pending: List[_PendingFile], report: IngestionReport):
+        futures: Dict[Future, Tuple[_PendingFile, bool]] = {}
+        with self._create_executor(pending) as executor:
+
+            def submit(document: _PendingFile, function, *args, first: bool = False):
+                document.outstanding += 1
+                futures[executor.submit(function, *args)] = (document, first)
+
+            for document in pending:
+                if document.path.lower().endswith(PDF_EXTENSIONS):
+                    submit(document, _read_pdf_pages, document.path, 1, self.pages_per_task, first=True)
+                else:
+                    submit(document, _read_text_file, document.path)
+
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    document, first = futures.pop(future)
+                    document.outstanding -= 1
+                    if document.failed:
+                        continue
+                    try:
+                        total_pages, pages = future.result()
+                    except Exception as e:
+                        _logger.warning(f"Failed to extract {document.path}: {e}")
+                        document.failed = True
+                        report.files_failed += 1
+                        continue
+                    document.pages.extend(pages)
+                    if first:
+                        # The first range tells how many pages there are: fan out the rest
+                        report.pages += total_pages
+                        for start in range(self.pages_per_task + 1, total_pages + 1, self.pages_per_task):
+                            submit(document, _read_pdf_pages, document.path, start, start + self.pages_per_task - 1)
+                    elif not document.path.lower().endswith(PDF_EXTENSIONS):
+                        report.pages += total_pages
+                    if document.outstanding == 0:
+                        report.chunks += self._index(document)
+                        report.files_indexed += 1
+
+    def _index(self, document: _PendingFile) -> int:
+        self._forget(document.path)
+        document.pages.sort(key=lambda page: page[0] or 0)
+        chunk_ids = self.rag_source.add_pages(document.pages, os.path.basename(document.path))
+        for chunk_id in chunk_ids:
+            self._chunk_references[chunk_id] = self._chunk_references.get(chunk_id, 0) + 1
+        self._file_states[document.path] = _FileState(
+            mtime_ns=document.stat.st_mtime_ns,
+            size=document.stat.st_size,
+            sha256=document.sha256,
+            chunk_ids=chunk_ids,
+        )
+        return len(chunk_ids)
+
+    def _forget(self, path: str):
+        state = self._file_states.pop(path, None)
+        if state is None:
+            return
+        unreferenced: Set[str] = set()
+        for chunk_id in state.chunk_ids:
+            self._chunk_references[chunk_id] -= 1
+            if self._chunk_references[chunk_id] == 0:
+                del self._chunk_references[chunk_id]
+                unreferenced.add(chunk_id)
+        self.rag_source.remove_chunks(unreferenced)
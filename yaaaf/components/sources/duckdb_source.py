@@ -0,0 +1,365 @@
+import glob
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import closing
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from yaaaf.components.sources.base_source import BaseSource
+from yaaaf.components.sources.query_result_cache import strip_sql_terminator
+from yaaaf.components.sources.sqlite_catalog import ColumnInfo, SchemaCatalog, TableInfo
+from yaaaf.components.sources.sqlite_source import (
+    DEFAULT_BATCH_SIZE,
+    QueryCancelledError,
+    QueryTimeoutError,
+)
+
+_logger = logging.getLogger(__name__)
+
+try:
+    import duckdb
+
+    DUCKDB_SUPPORT = True
+except ImportError:
+    DUCKDB_SUPPORT = False
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+
+    ARROW_SUPPORT = True
+except ImportError:
+    ARROW_SUPPORT = False
+
+# Rows of a DuckDB data chunk; results are fetched a whole number of chunks at a time
+_VECTOR_SIZE = 2048
+# Seconds between two checks of the deadline and cancel event of a running query
+_WATCH_INTERVAL = 0.05
+_SAMPLE_ROWS = 100
+_MAX_SAMPLES = 3
+_MAX_SAMPLE_CHARS = 40
+
+_READERS = {
+    ".csv": "read_csv_auto",
+    ".tsv": "read_csv_auto",
+    ".parquet": "read_parquet",
+}
+_ARROW_EXTENSIONS = {".arrow", ".feather", ".ipc"}
+
+
+def _table_name(path: str) -> str:
+    stem = os.path.splitext(os.path.basename(path))[0]
+    name = re.sub(r"\W+", "_", stem).strip("_").lower() or "data"
+    return f"t_{name}" if name[0].isdigit() else name
+
+
+def _quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _quote_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _data_directory(path: str) -> str:
+    """The directory holding every file `path` may match, with a trailing separator."""
+    path = os.path.abspath(path)
+    if not os.path.isdir(path):
+        # Up to the first path component with a wildcard, then its parent
+        while glob.has_magic(path) or not os.path.isdir(path):
+            parent = os.path.dirname(path)
+            if parent == path:
+                break
+            path = parent
+    return os.path.join(path, "")
+
+
+def _format_sample(value) -> str:
+    text = str(value).replace("|", "/").replace("\n", " ")
+    return text if len(text) <= _MAX_SAMPLE_CHARS else text[: _MAX_SAMPLE_CHARS - 3] + "..."
+
+
+class DuckDBSource(BaseSource):
+    """CSV, Parquet and Arrow files queried in place with DuckDB.
+
+    `path` is a file, a directory or a glob pattern. Every matching file is
+    exposed as a view named after the file, so no data is copied: CSV and
+    Parquet files are scanned by DuckDB's vectorized, multi-threaded
+    readers at query time, and Arrow IPC files are memory-mapped. Views
+    follow the files; added, removed or rewritten files are picked up by
+    the next query. Only SELECT statements are accepted, and queries can
+    only read files below the source's directory: external access is
+    disabled and the configuration locked, so table functions such as
+    read_text('/etc/passwd') or glob('/root/*') fail.
+    """
+
+    def __init__(self, name: str, path: str, threads: Optional[int] = None):
+        if not DUCKDB_SUPPORT:
+            raise ImportError(
+                "duckdb is required for duckdb sources. "
+                "Install with: pip install yaaaf[duckdb]"
+            )
+        super().__init__(name)
+        self.path = path
+        # Identifies the source in the query result cache, like the database file of a SqliteSource
+        self.db_path = os.path.abspath(path)
+        self._connection = duckdb.connect(database=":memory:")
+        if threads is not None:
+            self._connection.execute(f"SET threads TO {int(threads)}")
+        self._restrict_file_access()
+        self._views: Dict[str, str] = {}  # view name -> file
+        # Registered objects are local to a cursor, so Arrow tables are registered on each one
+        self._arrow_tables: Dict[str, "pyarrow.Table"] = {}
+        self._views_version: Optional[Tuple] = None
+        self._catalog: Optional[SchemaCatalog] = None
+        self._lock = threading.Lock()
+
+    def _restrict_file_access(self):
+        """Limit the connection to the source's files; queries cannot lift the limit."""
+        directory = _quote_literal(_data_directory(self.path))
+        self._connection.execute(f"SET allowed_directories = [{directory}]")
+        self._connection.execute("SET enable_external_access = false")
+        self._connection.execute("SET lock_configuration = true")
+
+    def _list_files(self) -> List[str]:
+        if os.path.isdir(self.path):
+            candidates = [os.path.join(self.path, name) for name in os.listdir(self.path)]
+        else:
+            candidates = glob.glob(self.path)
+        supported = set(_READERS) | _ARROW_EXTENSIONS
+        return sorted(
+            path
+            for path in candidates
+            if os.path.isfile(path) and os.path.splitext(path)[1].lower() in supported
+        )
+
+    def get_data_version(self) -> Tuple:
+        """Changes whenever a file is added, removed or rewritten."""
+        version = []
+        for path in self._list_files():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            version.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(version)
+
+    def _create_view(self, name: str, path: str):
+        extension = os.path.splitext(path)[1].lower()
+        if extension in _ARROW_EXTENSIONS:
+            if not ARROW_SUPPORT:
+                _logger.warning(f"Skipping {path}: pyarrow is required for Arrow files")
+                return
+            # Memory-mapped, so the table is paged in by the OS rather than copied;
+            # the table's buffers keep the mapping open
+            source = pyarrow.memory_map(path, "r")
+            self._arrow_tables[name] = pyarrow.ipc.open_file(source).read_all()
+        else:
+            self._connection.execute(
+                f"CREATE OR REPLACE VIEW {_quote_identifier(name)} AS "
+                f"SELECT * FROM {_READERS[extension]}({_quote_literal(path)})"
+            )
+        self._views[name] = path
+
+    def _drop_view(self, name: str):
+        if name in self._arrow_tables:
+            del self._arrow_tables[name]
+        else:
+            self._connection.execute(f"DROP VIEW IF EXISTS {_quote_identifier(name)}")
+        del self._views[name]
+
+    def _sync_views(self) -> Tuple:
+        """Create, replace or drop views so they match the files; returns the data version."""
+        version = self.get_data_version()
+        with self._lock:
+            if version == self._views_version:
+                return version
+            files = {}
+            for path, _, _ in version:
+                name = _table_name(path)
+                if name in files:
+                    _logger.warning(f"Skipping {path}: another file is already exposed as {name}")
+                    continue
+                files[name] = path
+            for name in list(self._views):
+                if files.get(name) != self._views[name]:
+                    self._drop_view(name)
+            previous = {path: (mtime, size) for path, mtime, size in self._views_version or ()}
+            for path, mtime, size in version:
+                name = _table_name(path)
+                if files[name] != path:
+                    continue
+                if name in self._views and previous.get(path) == (mtime, size):
+                    continue
+                try:
+                    if name in self._views:
+                        self._drop_view(name)
+                    self._create_view(name, path)
+                except Exception as e:
+                    _logger.error(f"Could not expose {path} as {name}: {e}")
+            self._views_version = version
+            return version
+
+    def _cursor(self) -> "duckdb.DuckDBPyConnection":
+        """A new cursor, a connection to the same database usable from the calling thread."""
+        cursor = self._connection.cursor()
+        with self._lock:
+            arrow_tables = dict(self._arrow_tables)
+        for name, table in arrow_tables.items():
+            cursor.register(name, table)
+        return cursor
+
+    def _check_read_only(self, cursor, query: str):
+        for statement in cursor.extract_statements(query):
+            if statement.type != duckdb.StatementType.SELECT:
+                raise ValueError(
+                    f"Only SELECT queries are allowed on {self.name}, got {statement.type.name}"
+                )
+
+    def iter_batches(
+        self,
+        query: str,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        timeout: Optional[float] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """Run a SELECT query and yield its rows in dataframes of about batch_size rows.
+
+        Same contract as SqliteSource.iter_batches: QueryTimeoutError past
+        the deadline, QueryCancelledError once cancel_event is set, and an
+        empty dataframe with the result's columns for an empty result.
+        """
+        self._sync_views()
+        cursor = self._cursor()
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        finished = threading.Event()
+        interrupted: List[str] = []
+
+        def watch():
+            while not finished.wait(_WATCH_INTERVAL):
+                if cancel_event is not None and cancel_event.is_set():
+                    interrupted.append("cancelled")
+                elif deadline is not None and time.monotonic() > deadline:
+                    interrupted.append("timeout")
+                else:
+                    continue
+                cursor.interrupt()
+                return
+
+        watcher = threading.Thread(target=watch, daemon=True)
+        watcher.start()
+        try:
+            self._check_read_only(cursor, query)
+            cursor.execute(query)
+            vectors = max(1, batch_size // _VECTOR_SIZE)
+            yielded = False
+            while True:
+                batch = cursor.fetch_df_chunk(vectors)
+                if batch.empty and yielded:
+                    break
+                yielded = True
+                yield batch
+                if batch.empty:
+                    break
+        except duckdb.InterruptException as e:
+            if interrupted and interrupted[0] == "cancelled":
+                raise QueryCancelledError("Query cancelled") from e
+            raise QueryTimeoutError(
+                f"Query exceeded the time limit of {timeout:g} seconds"
+            ) from e
+        finally:
+            finished.set()
+            watcher.join()
+            cursor.close()
+
+    def get_data(
+        self,
+        query: str,
+        timeout: Optional[float] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> pd.DataFrame:
+        """Run a SELECT query; SQL errors are returned as a dataframe describing the error."""
+        try:
+            return pd.concat(
+                list(self.iter_batches(query, DEFAULT_BATCH_SIZE, timeout, cancel_event)),
+                ignore_index=True,
+            )
+        except (ValueError, duckdb.Error) as e:
+            return pd.DataFrame.from_dict(
+                {
+                    "Errors": [f"Error in executing SQL query: {e}"],
+                    "Results": ["There are no results"],
+                }
+            )
+
+    def count_rows(
+        self,
+        query: str,
+        timeout: Optional[float] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> int:
+        """Number of rows a SELECT query returns, counted inside DuckDB."""
+        subquery = strip_sql_terminator(query)
+        batches = self.iter_batches(
+            f"SELECT COUNT(*) FROM ({subquery})", 1, timeout, cancel_event
+        )
+        with closing(batches):
+            return int(next(batches).iloc[0, 0])
+
+    def explain_query_plan(self, query: str) -> List[Tuple[int, int, str]]:
+        """Bind and plan a SELECT query without running it.
+
+        Raises duckdb.Error for unknown tables or columns, ambiguous names
+        and syntax errors. The plan itself is not returned, so cartesian
+        products are only detected on SQLite sources.
+        """
+        self._sync_views()
+        cursor = self._cursor()
+        try:
+            self._check_read_only(cursor, query)
+            cursor.execute(f"EXPLAIN {strip_sql_terminator(query)}").fetchall()
+        finally:
+            cursor.close()
+        return []
+
+    def get_catalog(self) -> SchemaCatalog:
+        """Views with column types, row counts and sample values, read again only after a file changed."""
+        version = self._sync_views()
+        catalog = self._catalog
+        if catalog is not None and catalog.version == version:
+            return catalog
+
+        started = time.perf_counter()
+        cursor = self._cursor()
+        try:
+            tables = {}
+            for name in sorted(self._views):
+                quoted = _quote_identifier(name)
+                columns = [
+                    ColumnInfo(name=row[0], type=row[1])
+                    for row in cursor.execute(f"DESCRIBE {quoted}").fetchall()
+                ]
+                row_count = cursor.execute(f"SELECT COUNT(*) FROM {quoted}").fetchone()[0]
+                for row in cursor.execute(f"SELECT * FROM {quoted} LIMIT {_SAMPLE_ROWS}").fetchall():
+                    for column, value in zip(columns, row):
+                        if value is None or len(column.sample_values) >= _MAX_SAMPLES:
+                            continue
+                        sample = _format_sample(value)
+                        if sample not in column.sample_values:
+                            column.sample_values.append(sample)
+                tables[name] = TableInfo(name=name, row_count=row_count, columns=columns)
+        finally:
+            cursor.close()
+        _logger.info(
+            f"Read the schema of {len(tables)} files in {self.path} "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+        self._catalog = SchemaCatalog(tables=tables, version=version)
+        return self._catalog
+
+    def get_description(self) -> str:
+        return "SQL dialect: DuckDB\n\n" + self.get_catalog().to_markdown()
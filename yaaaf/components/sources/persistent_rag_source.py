@@ -1,103 +1,417 @@
 import pickle
 import os
 import logging
-from typing import Dict, List
+import threading
+from collections.abc import MutableMapping
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from yaaaf.components.retrievers.dense_index import DenseIndex
+from yaaaf.components.retrievers.near_duplicates import NearDuplicateIndex
+from yaaaf.components.sources.chunking import TextChunker
 from yaaaf.components.sources.rag_source import RAGSource
+from yaaaf.components.sources.rag_segments import Segment, SegmentStore, merge_segments
+from yaaaf.server.config import Settings
 
 _logger = logging.getLogger(__name__)
 
 
+class _ChunkStore(MutableMapping):
+    """Chunk texts by id: persisted chunks are read from their segment, new ones stay in memory until flushed."""
+
+    def __init__(self):
+        self._locations: Dict[str, Tuple[Segment, int]] = {}
+        self._unflushed: Dict[str, str] = {}
+
+    def __getitem__(self, chunk_id: str) -> str:
+        if chunk_id in self._unflushed:
+            return self._unflushed[chunk_id]
+        segment, position = self._locations[chunk_id]
+        return segment.get_chunk(position)
+
+    def __setitem__(self, chunk_id: str, text: str):
+        # Chunk ids are content hashes: a persisted id already holds this text
+        if chunk_id not in self._locations:
+            self._unflushed[chunk_id] = text
+
+    def __delitem__(self, chunk_id: str):
+        found = self._unflushed.pop(chunk_id, None) is not None
+        found = self._locations.pop(chunk_id, None) is not None or found
+        if not found:
+            raise KeyError(chunk_id)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._locations
+        yield from self._unflushed
+
+    def __len__(self) -> int:
+        return len(self._locations) + len(self._unflushed)
+
+    def __contains__(self, chunk_id) -> bool:
+        return chunk_id in self._unflushed or chunk_id in self._locations
+
+    def clear(self):
+        self._locations.clear()
+        self._unflushed.clear()
+
+    def get_unflushed(self) -> Dict[str, str]:
+        return dict(self._unflushed)
+
+    def mark_flushed(self, segment: Segment):
+        """Serve the chunks of `segment` from disk from now on."""
+        for position, chunk_id in enumerate(segment.chunk_ids()):
+            self._locations[chunk_id] = (segment, position)
+            self._unflushed.pop(chunk_id, None)
+
+
 class PersistentRAGSource(RAGSource):
-    """A RAG source that can persist to disk using pickle."""
+    """A RAG source persisted to disk as append-only segments.
+
+    Every add writes only the new chunks, as a new immutable segment, and
+    swaps the manifest atomically. Once there are more than `max_segments`
+    segments they are merged into one by a background thread. At startup
+    the segments are memory-mapped: term frequencies are bulk-loaded into
+    the index without re-tokenizing and chunk texts are read from disk on
+    demand. A pickle written by earlier versions is migrated on first load.
 
-    def __init__(self, description: str, source_path: str, pickle_path: str):
+    With an embedding model, segments also store the chunk embeddings and
+    the trained quantizer of the embedding index is kept next to them.
+    """
+
+    _CENTROIDS_NAME = "dense_centroids"
+
+    def __init__(
+        self,
+        description: str,
+        source_path: str,
+        pickle_path: str,
+        max_segments: int = 8,
+        embedding_model: Optional[str] = None,
+        chunker: Optional[TextChunker] = None,
+        near_duplicate_threshold: Optional[float] = None,
+    ):
         """Initialize persistent RAG source.
 
         Args:
             description: Description of the source
             source_path: Source path identifier
-            pickle_path: Path to pickle file for persistence
+            pickle_path: Configured path of the index. Segments are stored in a
+                directory next to it (``index.pkl`` -> ``index.segments/``), or in
+                the path itself when it does not name a ``.pkl`` file.
+            max_segments: Number of segments above which they are compacted
+            embedding_model: Optional sentence-transformers model for hybrid retrieval
+            chunker: Splits added documents into passages (default: TextChunker())
+            near_duplicate_threshold: Similarity above which new chunks are dropped as near duplicates
         """
-        super().__init__(description, source_path)
+        super().__init__(
+            description,
+            source_path,
+            embedding_model=embedding_model,
+            chunker=chunker,
+            near_duplicate_threshold=near_duplicate_threshold,
+        )
+        self._embedding_model = embedding_model
+        self._saved_centroids = None
         self.pickle_path = pickle_path
-        self._load_from_pickle()
+        self._id_to_chunk = _ChunkStore()
+        self._store = SegmentStore(self._get_store_path(pickle_path))
+        self._max_segments = max_segments
+        self._compaction_lock = threading.Lock()
+        self._compaction_thread: Optional[threading.Thread] = None
+        self._load()
 
-    def _load_from_pickle(self):
-        """Load the RAG source state from pickle file if it exists."""
-        if os.path.exists(self.pickle_path):
+    @staticmethod
+    def _get_store_path(pickle_path: str) -> str:
+        if pickle_path.endswith(".pkl") or os.path.isfile(pickle_path):
+            return os.path.splitext(pickle_path)[0] + ".segments"
+        return pickle_path
+
+    def _load(self):
+        """Load the segments listed in the manifest, or migrate a legacy pickle."""
+        if self._store.exists():
             try:
-                with open(self.pickle_path, "rb") as f:
-                    data = pickle.load(f)
-                    self._vector_db = data.get("vector_db", self._vector_db)
-                    self._id_to_chunk = data.get("id_to_chunk", self._id_to_chunk)
-                    _logger.info(
-                        f"Loaded persistent RAG source from {self.pickle_path} with {len(self._id_to_chunk)} chunks"
-                    )
+                self._load_segments()
             except Exception as e:
                 _logger.warning(
-                    f"Failed to load persistent RAG source from {self.pickle_path}: {e}"
+                    f"Failed to load persistent RAG source from {self._store.path}: {e}"
                 )
                 _logger.info("Starting with empty RAG source")
+        elif os.path.isfile(self.pickle_path):
+            self._migrate_pickle()
         else:
             _logger.info(
-                f"No existing persistent RAG source found at {self.pickle_path}, starting fresh"
+                f"No existing persistent RAG source found at {self._store.path}, starting fresh"
+            )
+
+    def _load_segments(self):
+        reembed = False
+        with self._lock:
+            self._store.open()
+            # Terms written by another analyzer are recomputed from the stored texts
+            reanalyze = self._store.analyzer != self._vector_db.analyzer.name
+            same_model = self._store.embedding_model == self._embedding_model
+            if self._dense_index is not None and same_model:
+                centroids = self._store.load_array(self._CENTROIDS_NAME)
+                if centroids is not None:
+                    self._dense_index.set_centroids(centroids)
+                    self._saved_centroids = self._dense_index.get_centroids()
+            for segment in self._store.segments:
+                chunk_ids = segment.chunk_ids()
+                if reanalyze:
+                    for position, chunk_id in enumerate(chunk_ids):
+                        self._vector_db.add_text_and_index(segment.get_chunk(position), chunk_id)
+                else:
+                    self._vector_db.add_term_frequencies(chunk_ids, *segment.load_term_frequencies())
+                self._id_to_chunk.mark_flushed(segment)
+                for chunk_id, metadata in zip(chunk_ids, segment.load_metadata()):
+                    if metadata is not None:
+                        self._id_to_metadata[chunk_id] = metadata
+                if self._near_duplicates is not None:
+                    self._load_signatures(segment, chunk_ids)
+                if self._dense_index is None:
+                    continue
+                embeddings = segment.load_embeddings()
+                if same_model and embeddings is not None:
+                    self._dense_index.add_vectors(chunk_ids, embeddings)
+                else:
+                    for chunk_id in chunk_ids:
+                        self._chunks_to_embed[chunk_id] = self._id_to_chunk[chunk_id]
+                    reembed = True
+            self._vector_db.build()
+        _logger.info(
+            f"Loaded persistent RAG source from {self._store.path} with "
+            f"{len(self._id_to_chunk)} chunks in {len(self._store.segments)} segments"
+        )
+
+        if reembed:
+            _logger.info(
+                f"Embedding {len(self._chunks_to_embed)} stored chunks with {self._embedding_model}"
+            )
+            self._embed_pending_chunks()
+        if reembed or (reanalyze and self._store.segments):
+            # Rewrite the segments so the embeddings and terms are stored next time
+            self.compact(min_segments=1, terms_from_index=reanalyze)
+
+    def _load_signatures(self, segment: Segment, chunk_ids: List[str]):
+        signatures = segment.load_signatures()
+        if signatures is None or signatures.shape[1] != self._near_duplicates.num_permutations:
+            # Written before signatures were stored, or with other MinHash settings
+            signatures = [
+                self._near_duplicates.signature(segment.get_chunk(position))
+                for position in range(len(segment))
+            ]
+        for chunk_id, signature in zip(chunk_ids, signatures):
+            self._near_duplicates.add(chunk_id, np.array(signature))
+
+    def _migrate_pickle(self):
+        try:
+            with open(self.pickle_path, "rb") as f:
+                data = pickle.load(f)
+            with self._lock:
+                self._vector_db = data.get("vector_db", self._vector_db)
+                for chunk_id, text in data.get("id_to_chunk", {}).items():
+                    self._id_to_chunk[chunk_id] = text
+                    if self._embedder is not None:
+                        self._chunks_to_embed[chunk_id] = text
+        except Exception as e:
+            _logger.warning(
+                f"Failed to load persistent RAG source from {self.pickle_path}: {e}"
             )
+            _logger.info("Starting with empty RAG source")
+            return
+
+        self._flush()
+        _logger.info(
+            f"Migrated persistent RAG source from {self.pickle_path} to {self._store.path} "
+            f"with {len(self._id_to_chunk)} chunks"
+        )
 
-    def _save_to_pickle(self):
-        """Save the current RAG source state to pickle file."""
+    def _flush(self):
+        """Write the chunks added since the last flush as a new segment."""
         try:
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(self.pickle_path), exist_ok=True)
-
-            data = {
-                "vector_db": self._vector_db,
-                "id_to_chunk": self._id_to_chunk,
-                "description": self._description,
-                "source_path": self.source_path,
-            }
-
-            with open(self.pickle_path, "wb") as f:
-                pickle.dump(data, f)
+            self._embed_pending_chunks()
+            with self._lock:
+                unflushed = self._id_to_chunk.get_unflushed()
+                if not unflushed:
+                    return
+                chunk_ids = list(unflushed)
+                segment = self._store.write_segment(
+                    chunk_ids,
+                    [unflushed[chunk_id] for chunk_id in chunk_ids],
+                    self._vector_db.get_term_frequencies(chunk_ids),
+                    self._get_embeddings(chunk_ids),
+                    self._get_metadata(chunk_ids),
+                    self._get_signatures(chunk_ids),
+                )
+                self._store.commit(
+                    self._store.segments + [segment],
+                    embedding_model=self._embedding_model,
+                    analyzer=self._vector_db.analyzer.name,
+                )
+                self._id_to_chunk.mark_flushed(segment)
+                self._save_centroids()
             _logger.info(
-                f"Saved persistent RAG source to {self.pickle_path} with {len(self._id_to_chunk)} chunks"
+                f"Saved {len(chunk_ids)} chunks to {segment.path} "
+                f"({len(self._id_to_chunk)} chunks in {len(self._store.segments)} segments)"
             )
         except Exception as e:
             _logger.error(
-                f"Failed to save persistent RAG source to {self.pickle_path}: {e}"
+                f"Failed to save persistent RAG source to {self._store.path}: {e}"
             )
+            return
+
+        self._maybe_compact()
+
+    def _get_embeddings(self, chunk_ids: List[str]):
+        if self._dense_index is None:
+            return None
+        return self._dense_index.get_vectors(chunk_ids)
+
+    def _get_signatures(self, chunk_ids: List[str]) -> Optional[np.ndarray]:
+        if self._near_duplicates is None:
+            return None
+        return self._near_duplicates.get_signatures(chunk_ids)
+
+    def _get_metadata(self, chunk_ids: List[str]) -> List[Optional[dict]]:
+        return [self._id_to_metadata.get(chunk_id) for chunk_id in chunk_ids]
+
+    def _save_centroids(self):
+        """Store the quantizer of the embedding index when it was (re)trained."""
+        if self._dense_index is None:
+            return
+        centroids = self._dense_index.get_centroids()
+        if centroids is not None and centroids is not self._saved_centroids:
+            self._store.save_array(self._CENTROIDS_NAME, centroids)
+            self._saved_centroids = centroids
+
+    def _maybe_compact(self):
+        """Start a background compaction when there are too many segments."""
+        if len(self._store.segments) <= self._max_segments:
+            return
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+        self._compaction_thread = threading.Thread(
+            target=self.compact, name="rag-compaction", daemon=True
+        )
+        self._compaction_thread.start()
 
-    def add_text(self, text: str):
-        """Add text and save to pickle."""
-        super().add_text(text)
-        self._save_to_pickle()
+    def compact(self, min_segments: int = 2, terms_from_index: bool = False):
+        """Merge all current segments into one.
+
+        Queries and adds keep running while the merged segment is written;
+        only the final manifest swap takes the source lock. With
+        `terms_from_index` the term frequencies are taken from the in-memory
+        index instead of the segments, after the analyzer changed.
+        """
+        with self._compaction_lock:
+            with self._lock:
+                segments = list(self._store.segments)
+            if len(segments) < min_segments:
+                return
+
+            try:
+                chunk_ids, texts, term_frequencies = merge_segments(segments)
+                with self._lock:
+                    embeddings = self._get_embeddings(chunk_ids)
+                    metadata = self._get_metadata(chunk_ids)
+                    signatures = self._get_signatures(chunk_ids)
+                    if terms_from_index:
+                        term_frequencies = self._vector_db.get_term_frequencies(chunk_ids)
+                merged = (
+                    self._store.write_segment(
+                        chunk_ids, texts, term_frequencies, embeddings, metadata, signatures
+                    )
+                    if chunk_ids
+                    else None
+                )
+                with self._lock:
+                    live = self._store.segments
+                    if any(segment not in live for segment in segments):
+                        # Cleared while merging; the next open removes the orphan
+                        return
+                    newer = [segment for segment in live if segment not in segments]
+                    self._store.commit(
+                        ([merged] if merged else []) + newer,
+                        embedding_model=self._embedding_model,
+                        analyzer=self._vector_db.analyzer.name,
+                    )
+                    if merged:
+                        self._id_to_chunk.mark_flushed(merged)
+                        for segment in newer:
+                            self._id_to_chunk.mark_flushed(segment)
+                    self._save_centroids()
+                _logger.info(
+                    f"Compacted {len(segments)} segments of {self._store.path} into one "
+                    f"with {len(chunk_ids)} chunks"
+                )
+            except Exception as e:
+                _logger.error(f"Failed to compact persistent RAG source at {self._store.path}: {e}")
+
+    def add_text(
+        self,
+        text: str,
+        progress_callback: Optional[Callable[[int, int, int], None]] = None,
+        filename: Optional[str] = None,
+    ):
+        """Add text and persist it as a new segment."""
+        super().add_text(text, progress_callback=progress_callback, filename=filename)
+        self._flush()
 
     def add_pdf(
         self,
         pdf_content: bytes,
         filename: str = "uploaded.pdf",
-        pages_per_chunk: int = 1,
+        pages_per_chunk: Optional[int] = None,
+        progress_callback: Optional[Callable[[int, int, int], None]] = None,
     ):
-        """Add PDF and save to pickle."""
-        super().add_pdf(pdf_content, filename, pages_per_chunk)
-        self._save_to_pickle()
+        """Add PDF and persist its chunks as a new segment."""
+        super().add_pdf(
+            pdf_content, filename, pages_per_chunk, progress_callback=progress_callback
+        )
+        self._flush()
+
+    def set_description(self, description: str):
+        """Update the description and save it in the manifest."""
+        with self._lock:
+            self._description = description
+            self._store.commit(self._store.segments, description=description)
 
     def get_document_count(self) -> int:
         """Get the number of documents/chunks in the source."""
         return len(self._id_to_chunk)
 
+    def get_segment_count(self) -> int:
+        """Get the number of segments on disk."""
+        return len(self._store.segments)
+
     def clear(self):
         """Clear all documents and save."""
-        self._vector_db = self.__class__.__bases__[
-            0
-        ]._vector_db.__class__()  # Reset vector db
-        self._id_to_chunk.clear()
-        self._save_to_pickle()
-        _logger.info(f"Cleared persistent RAG source at {self.pickle_path}")
+        try:
+            with self._lock:
+                self._vector_db = self._vector_db.__class__()  # Reset vector db
+                self._id_to_chunk.clear()
+                self._id_to_metadata.clear()
+                if self._dense_index is not None:
+                    self._dense_index = DenseIndex()
+                    self._chunks_to_embed.clear()
+                if self._near_duplicates is not None:
+                    self._near_duplicates = NearDuplicateIndex(self._near_duplicates.threshold)
+                self._store.commit([])
+                self._store.save_array(self._CENTROIDS_NAME, None)
+                self._saved_centroids = None
+                self._version += 1
+        except Exception as e:
+            _logger.error(f"Failed to clear persistent RAG source at {self._store.path}: {e}")
+            return
+        _logger.info(f"Cleared persistent RAG source at {self._store.path}")
 
     def get_all_documents(self) -> List[Dict[str, str]]:
         """Get all documents with their IDs and content."""
         documents = []
-        for doc_id, content in self._id_to_chunk.items():
+        with self._lock:  # Compaction may retire the segments being read
+            chunks = list(self._id_to_chunk.items())
+        for doc_id, content in chunks:
             # Try to extract filename/title from content
             title = "Untitled Document"
             preview = content[:200] + "..." if len(content) > 200 else content
@@ -119,3 +433,42 @@ class PersistentRAGSource(RAGSource):
             )
 
         return documents
+
+
+_shared_sources: Dict[str, PersistentRAGSource] = {}
+_shared_sources_lock = threading.Lock()
+
+
+def get_persistent_rag_source(config: Settings) -> Optional[PersistentRAGSource]:
+    """The persistent RAG source configured in `config.sources`, or None.
+
+    Each index is opened once per process and shared, so documents uploaded
+    through the server are visible to every orchestrator. Warm-up and the
+    first request may ask at the same time; the index is still opened once.
+    """
+    for source_config in config.sources:
+        if source_config.type != "rag":
+            continue
+        key = os.path.abspath(source_config.path)
+        with _shared_sources_lock:
+            source = _shared_sources.get(key)
+            if source is None:
+                source = PersistentRAGSource(
+                    description=source_config.description
+                    or source_config.name
+                    or "Persistent RAG Source",
+                    source_path=source_config.name or "persistent_rag",
+                    pickle_path=source_config.path,
+                    embedding_model=source_config.embedding_model,
+                    chunker=TextChunker(
+                        chunk_size=config.chunking.chunk_size,
+                        chunk_overlap=config.chunking.chunk_overlap,
+                    ),
+                    near_duplicate_threshold=config.deduplication.near_duplicate_threshold,
+                )
+                _shared_sources[key] = source
+                _logger.info(
+                    f"Initialized persistent RAG source: {source_config.name} at {source_config.path}"
+                )
+            return source
+    return None
@@ -0,0 +1,192 @@
+import logging
+import os
+import re
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Hashable, List, Optional, Tuple
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_TOKEN_PATTERN = re.compile(
+    r"""
+      (?P<comment>--[^\n]*|/\*.*?(?:\*/|$))
+    | (?P<string>'(?:[^']|'')*')
+    | (?P<identifier>"(?:[^"]|"")*"|`(?:[^`]|``)*`|\[[^\]]*\])
+    | (?P<number>0[xX][0-9a-fA-F]+|(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+    | (?P<word>[A-Za-z_][A-Za-z0-9_$]*)
+    | (?P<parameter>[?:@$][A-Za-z0-9_]*)
+    | (?P<operator>\|\||<<|>>|<=|>=|==|!=|<>|\S)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+
+def _normalize_number(token: str) -> str:
+    if token[:2].lower() == "0x":
+        return hex(int(token, 16))
+    if re.fullmatch(r"\d+", token):
+        return str(int(token))
+    # A real stays a real: 1.50, 1.5 and 15e-1 are the same value, 1 and 1.0 are not
+    return repr(float(token))
+
+
+def tokenize_sql(query: str) -> List[Tuple[str, str]]:
+    """(kind, text) of each token of a query, comments dropped.
+
+    Kinds: string, identifier (quoted), number, word, parameter and operator.
+    """
+    return [
+        (match.lastgroup, match.group())
+        for match in _TOKEN_PATTERN.finditer(query)
+        if match.lastgroup != "comment"
+    ]
+
+
+def strip_sql_terminator(query: str) -> str:
+    """The query without trailing semicolons and comments, so it can be wrapped in another statement."""
+    end = 0
+    for match in _TOKEN_PATTERN.finditer(query):
+        if match.lastgroup != "comment" and match.group() != ";":
+            end = match.end()
+    return query[:end].strip()
+
+
+def normalize_sql(query: str) -> str:
+    """Canonical text of a query, equal for queries that differ only in formatting.
+
+    Comments and a trailing semicolon are dropped, tokens are separated by a
+    single space, keywords and unquoted identifiers (case-insensitive in
+    SQLite) are lower-cased and numeric literals are written in one form.
+    String literals and quoted identifiers are kept verbatim.
+    """
+    tokens = []
+    for kind, token in tokenize_sql(query):
+        if kind == "word":
+            token = token.lower()
+        elif kind == "number":
+            token = _normalize_number(token)
+        tokens.append(token)
+    while tokens and tokens[-1] == ";":
+        tokens.pop()
+    return " ".join(tokens)
+
+
+def _release(values: List[Any]):
+    # Outside the cache lock: releasing may delete files
+    for value in values:
+        release = getattr(value, "release", None)
+        if release is None:
+            continue
+        try:
+            release()
+        except Exception as e:
+            _logger.warning(f"Could not release a dropped query result: {e}")
+
+
+class QueryResultCache:
+    """Results of read-only queries, evicted least recently used first by size.
+
+    Entries are keyed by database, data version and normalized SQL, so a
+    write makes the entries of the previous version unreachable; `invalidate`
+    additionally frees them at once. Values with a `release()` method, such as
+    results spooled to disk, are released when their entry is evicted,
+    invalidated or replaced, so their size must include what release frees.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        _all_caches.add(self)
+
+    @staticmethod
+    def make_key(db_path: str, data_version: Hashable, query: str, *options: Hashable) -> Tuple:
+        return (os.path.abspath(db_path), data_version, normalize_sql(query), *options)
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Tuple, value: Any, size: int):
+        with self._lock:
+            if size > self.max_bytes:
+                return
+            dropped = []
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+                if previous[0] is not value:
+                    dropped.append(previous[0])
+            self._entries[key] = (value, size)
+            self._bytes += size
+            dropped += self._evict()
+        _release(dropped)
+
+    def _evict(self) -> List[Any]:
+        dropped = []
+        while self._bytes > self.max_bytes and self._entries:
+            _, (value, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            dropped.append(value)
+        return dropped
+
+    def invalidate(self, db_path: str):
+        """Drop every entry of a database."""
+        db_path = os.path.abspath(db_path)
+        dropped = []
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == db_path]:
+                value, size = self._entries.pop(key)
+                self._bytes -= size
+                dropped.append(value)
+        _release(dropped)
+
+    def set_max_bytes(self, max_bytes: int):
+        with self._lock:
+            self.max_bytes = max_bytes
+            dropped = self._evict()
+        _release(dropped)
+
+    def get_size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Tuple) -> bool:
+        with self._lock:
+            return key in self._entries
+
+
+_all_caches: "weakref.WeakSet[QueryResultCache]" = weakref.WeakSet()
+_cache: Optional[QueryResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_query_result_cache(max_bytes: Optional[int] = None) -> QueryResultCache:
+    """The process-wide cache, shared by every SQL executor; resized when max_bytes is given."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = QueryResultCache(max_bytes if max_bytes is not None else DEFAULT_MAX_BYTES)
+        elif max_bytes is not None and max_bytes != _cache.max_bytes:
+            _cache.set_max_bytes(max_bytes)
+        return _cache
+
+
+def invalidate_query_results(db_path: str):
+    """Drop the cached results of a database from every cache, called after each write."""
+    for cache in list(_all_caches):
+        cache.invalidate(db_path)
@@ -0,0 +1,317 @@
+"""On-disk storage for PersistentRAGSource: immutable segments plus a manifest.
+
+Layout of a store directory::
+
+    manifest.json       # {"version", "next_segment_id", "description", "embedding_model", "analyzer", "segments": [...]}
+    seg-000001/
+        ids.npy         # chunk ids (sha256 hex, fixed width)
+        text.bin        # UTF-8 chunk texts, concatenated
+        text_offsets.npy
+        terms.json      # segment vocabulary
+        offsets.npy     # doc-major term frequencies: chunk i owns entries offsets[i]:offsets[i + 1]
+        term_ids.npy    # index into terms.json
+        frequencies.npy
+        embeddings.npy  # optional, one row per chunk when an embedding model is configured
+        metadata.json   # optional, position metadata per chunk (null when unknown)
+        minhash.npy     # optional, near-duplicate signatures, one row per chunk
+    dense_centroids.npy # optional, the trained quantizer of the embedding index
+
+Segments are written to a temporary directory and renamed into place, and the
+manifest is replaced atomically, so a crash leaves either the old or the new
+manifest and never a half-written segment in use. Directories that the
+manifest does not list are leftovers and are removed when the store opens.
+Arrays and chunk text are memory-mapped when a segment is opened.
+"""
+
+import json
+import logging
+import mmap
+import os
+import shutil
+import threading
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+_logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+_ID_DTYPE = "S64"
+
+
+def _fsync_directory(path: str):
+    try:
+        descriptor = os.open(path, os.O_RDONLY)
+    except OSError:
+        return  # Not supported on this platform
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+def _save_array(path: str, array: np.ndarray):
+    with open(path, "wb") as f:
+        np.save(f, array)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class Segment:
+    """A read-only, memory-mapped segment of chunks and their term frequencies."""
+
+    def __init__(self, name: str, path: str):
+        self.name = name
+        self.path = path
+        self.ids: np.ndarray = np.load(os.path.join(path, "ids.npy"), mmap_mode="r")
+        self._text_offsets = np.load(os.path.join(path, "text_offsets.npy"), mmap_mode="r")
+        self._text_file = open(os.path.join(path, "text.bin"), "rb")
+        self._text = (
+            mmap.mmap(self._text_file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self._text_offsets[-1] > 0
+            else b""
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def chunk_ids(self) -> List[str]:
+        return [chunk_id.decode("ascii") for chunk_id in self.ids]
+
+    def get_chunk(self, position: int) -> str:
+        start, end = self._text_offsets[position : position + 2]
+        return self._text[start:end].decode("utf-8")
+
+    def load_term_frequencies(self) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+        """Return (terms, offsets, term_ids, frequencies) in the layout of BM25LocalDB.add_term_frequencies."""
+        with open(os.path.join(self.path, "terms.json")) as f:
+            terms = json.load(f)
+        return (
+            terms,
+            np.load(os.path.join(self.path, "offsets.npy"), mmap_mode="r"),
+            np.load(os.path.join(self.path, "term_ids.npy"), mmap_mode="r"),
+            np.load(os.path.join(self.path, "frequencies.npy"), mmap_mode="r"),
+        )
+
+    def load_embeddings(self) -> Optional[np.ndarray]:
+        path = os.path.join(self.path, "embeddings.npy")
+        return np.load(path, mmap_mode="r") if os.path.exists(path) else None
+
+    def load_signatures(self) -> Optional[np.ndarray]:
+        path = os.path.join(self.path, "minhash.npy")
+        return np.load(path, mmap_mode="r") if os.path.exists(path) else None
+
+    def load_metadata(self) -> List[Optional[dict]]:
+        path = os.path.join(self.path, "metadata.json")
+        if not os.path.exists(path):
+            return [None] * len(self)
+        with open(path) as f:
+            return json.load(f)
+
+    def close(self):
+        if isinstance(self._text, mmap.mmap):
+            self._text.close()
+        self._text_file.close()
+
+
+class SegmentStore:
+    """A directory of segments and the manifest listing the live ones."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.description: Optional[str] = None
+        self.embedding_model: Optional[str] = None
+        self.analyzer: Optional[str] = None  # name of the Analyzer that produced the stored terms
+        self._next_segment_id = 1
+        self._name_lock = threading.Lock()  # compaction writes alongside regular appends
+        self.segments: List[Segment] = []
+
+    def exists(self) -> bool:
+        return os.path.exists(os.path.join(self.path, MANIFEST_NAME))
+
+    def open(self):
+        """Read the manifest, open its segments and remove unreferenced directories."""
+        with open(os.path.join(self.path, MANIFEST_NAME)) as f:
+            manifest = json.load(f)
+        if manifest.get("version") != MANIFEST_VERSION:
+            raise ValueError(
+                f"Unsupported RAG manifest version {manifest.get('version')} in {self.path}"
+            )
+        self.description = manifest.get("description")
+        self.embedding_model = manifest.get("embedding_model")
+        self.analyzer = manifest.get("analyzer")
+        self._next_segment_id = manifest["next_segment_id"]
+        self.segments = [
+            Segment(name, os.path.join(self.path, name)) for name in manifest["segments"]
+        ]
+        self._remove_unreferenced()
+
+    def _remove_unreferenced(self):
+        live = {segment.name for segment in self.segments}
+        for entry in os.listdir(self.path):
+            entry_path = os.path.join(self.path, entry)
+            if os.path.isdir(entry_path) and entry not in live:
+                _logger.info(f"Removing unreferenced RAG segment directory {entry_path}")
+                shutil.rmtree(entry_path, ignore_errors=True)
+            elif ".tmp-" in entry:
+                os.remove(entry_path)
+
+    def write_segment(
+        self,
+        chunk_ids: List[str],
+        texts: List[str],
+        term_frequencies: Tuple[List[str], np.ndarray, np.ndarray, np.ndarray],
+        embeddings: Optional[np.ndarray] = None,
+        metadata: Optional[List[Optional[dict]]] = None,
+        signatures: Optional[np.ndarray] = None,
+    ) -> Segment:
+        """Write a new immutable segment. It becomes live only once it is in a committed manifest."""
+        os.makedirs(self.path, exist_ok=True)
+        with self._name_lock:
+            name = f"seg-{self._next_segment_id:06d}"
+            self._next_segment_id += 1
+        temporary_path = os.path.join(self.path, f"{name}.tmp-{uuid.uuid4().hex}")
+        os.makedirs(temporary_path)
+
+        encoded = [text.encode("utf-8") for text in texts]
+        text_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        text_offsets[1:] = np.cumsum([len(text) for text in encoded])
+        with open(os.path.join(temporary_path, "text.bin"), "wb") as f:
+            for text in encoded:
+                f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        _save_array(os.path.join(temporary_path, "text_offsets.npy"), text_offsets)
+        _save_array(os.path.join(temporary_path, "ids.npy"), np.array(chunk_ids, dtype=_ID_DTYPE))
+
+        terms, offsets, term_ids, frequencies = term_frequencies
+        with open(os.path.join(temporary_path, "terms.json"), "w") as f:
+            json.dump(terms, f)
+            f.flush()
+            os.fsync(f.fileno())
+        _save_array(os.path.join(temporary_path, "offsets.npy"), np.asarray(offsets, dtype=np.int64))
+        _save_array(os.path.join(temporary_path, "term_ids.npy"), np.asarray(term_ids, dtype=np.int32))
+        _save_array(
+            os.path.join(temporary_path, "frequencies.npy"), np.asarray(frequencies, dtype=np.float32)
+        )
+        if metadata is not None and any(item is not None for item in metadata):
+            with open(os.path.join(temporary_path, "metadata.json"), "w") as f:
+                json.dump(metadata, f)
+                f.flush()
+                os.fsync(f.fileno())
+        if embeddings is not None:
+            _save_array(
+                os.path.join(temporary_path, "embeddings.npy"), np.asarray(embeddings, dtype=np.float32)
+            )
+        if signatures is not None:
+            _save_array(
+                os.path.join(temporary_path, "minhash.npy"), np.asarray(signatures, dtype=np.uint32)
+            )
+        _fsync_directory(temporary_path)
+
+        final_path = os.path.join(self.path, name)
+        os.rename(temporary_path, final_path)
+        _fsync_directory(self.path)
+        return Segment(name, final_path)
+
+    def commit(
+        self,
+        segments: List[Segment],
+        description: Optional[str] = None,
+        embedding_model: Optional[str] = None,
+        analyzer: Optional[str] = None,
+    ):
+        """Atomically replace the manifest so that `segments` are the live ones."""
+        os.makedirs(self.path, exist_ok=True)
+        if description is not None:
+            self.description = description
+        if embedding_model is not None:
+            self.embedding_model = embedding_model
+        if analyzer is not None:
+            self.analyzer = analyzer
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "next_segment_id": self._next_segment_id,
+            "description": self.description,
+            "embedding_model": self.embedding_model,
+            "analyzer": self.analyzer,
+            "segments": [segment.name for segment in segments],
+        }
+        temporary_path = os.path.join(self.path, f"{MANIFEST_NAME}.tmp-{uuid.uuid4().hex}")
+        with open(temporary_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary_path, os.path.join(self.path, MANIFEST_NAME))
+        _fsync_directory(self.path)
+
+        retired = [segment for segment in self.segments if segment not in segments]
+        self.segments = list(segments)
+        for segment in retired:
+            segment.close()
+            shutil.rmtree(segment.path, ignore_errors=True)
+
+    def save_array(self, name: str, array: Optional[np.ndarray]):
+        """Atomically store a store-level array, or remove it when `array` is None."""
+        path = os.path.join(self.path, f"{name}.npy")
+        if array is None:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        os.makedirs(self.path, exist_ok=True)
+        temporary_path = f"{path}.tmp-{uuid.uuid4().hex}"
+        _save_array(temporary_path, array)
+        os.replace(temporary_path, path)
+        _fsync_directory(self.path)
+
+    def load_array(self, name: str) -> Optional[np.ndarray]:
+        path = os.path.join(self.path, f"{name}.npy")
+        return np.load(path) if os.path.exists(path) else None
+
+
+def merge_segments(
+    segments: List[Segment],
+) -> Tuple[List[str], List[str], Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]]:
+    """Combine segments into (chunk_ids, texts, term_frequencies) for a single new segment.
+
+    A chunk id stored in several segments is kept once, from the newest segment.
+    """
+    latest: Dict[str, Tuple[int, int]] = {}
+    for segment_number, segment in enumerate(segments):
+        for position, chunk_id in enumerate(segment.chunk_ids()):
+            latest[chunk_id] = (segment_number, position)
+
+    chunk_ids: List[str] = []
+    texts: List[str] = []
+    vocabulary: Dict[str, int] = {}
+    row_term_ids: List[np.ndarray] = []
+    row_frequencies: List[np.ndarray] = []
+    for segment_number, segment in enumerate(segments):
+        terms, offsets, term_ids, frequencies = segment.load_term_frequencies()
+        mapping = np.array(
+            [vocabulary.setdefault(term, len(vocabulary)) for term in terms], dtype=np.int32
+        )
+        for position, chunk_id in enumerate(segment.chunk_ids()):
+            if latest[chunk_id] != (segment_number, position):
+                continue
+            start, end = offsets[position : position + 2]
+            chunk_ids.append(chunk_id)
+            texts.append(segment.get_chunk(position))
+            row_term_ids.append(mapping[term_ids[start:end]])
+            row_frequencies.append(np.asarray(frequencies[start:end], dtype=np.float32))
+
+    merged_offsets = np.zeros(len(chunk_ids) + 1, dtype=np.int64)
+    merged_offsets[1:] = np.cumsum([len(row) for row in row_term_ids])
+    return (
+        chunk_ids,
+        texts,
+        (
+            list(vocabulary),
+            merged_offsets,
+            np.concatenate(row_term_ids) if row_term_ids else np.zeros(0, np.int32),
+            np.concatenate(row_frequencies) if row_frequencies else np.zeros(0, np.float32),
+        ),
+    )
+
@@ -1,8 +1,13 @@
 import hashlib
-from typing import List, Dict
+import threading
+from typing import Any, Callable, Iterable, List, Dict, Optional, Tuple
 
+from yaaaf.components.retrievers.dense_index import DenseIndex, LocalEmbedder
 from yaaaf.components.retrievers.local_vector_db import BM25LocalDB
+from yaaaf.components.retrievers.near_duplicates import DeduplicationReport, NearDuplicateIndex
+from yaaaf.components.retrievers.rank_fusion import reciprocal_rank_fusion
 from yaaaf.components.sources.base_source import BaseSource
+from yaaaf.components.sources.chunking import TextChunker
 
 try:
     import PyPDF2
@@ -13,29 +18,155 @@ except ImportError:
 
 
 class RAGSource(BaseSource):
-    def __init__(self, description: str, source_path: str):
+    # Each retriever contributes this many candidates per requested result to the fusion
+    _FUSION_CANDIDATES_PER_RESULT = 4
+    _RRF_K = 60
+
+    def __init__(
+        self,
+        description: str,
+        source_path: str,
+        embedding_model: Optional[str] = None,
+        chunker: Optional[TextChunker] = None,
+        near_duplicate_threshold: Optional[float] = None,
+    ):
+        """Initialize a RAG source.
+
+        Args:
+            description: Description of the source
+            source_path: Source path identifier
+            embedding_model: Optional sentence-transformers model name. When set, chunks
+                are also embedded locally and results fuse BM25 and embedding rankings.
+            chunker: Splits added documents into passages (default: TextChunker())
+            near_duplicate_threshold: When set, a chunk whose estimated Jaccard similarity
+                to an indexed chunk reaches this value (e.g. 0.9) is not indexed again
+        """
         self._vector_db = BM25LocalDB()
         self._id_to_chunk: Dict[str, str] = {}
+        self._id_to_metadata: Dict[str, Dict[str, Any]] = {}
+        self._chunker = chunker or TextChunker()
         self._description = description
         self.source_path = source_path
+        # Uploads are indexed from background workers: serialize index mutations
+        self._lock = threading.RLock()
+        self._embedder: Optional[LocalEmbedder] = (
+            LocalEmbedder(embedding_model) if embedding_model else None
+        )
+        self._dense_index: Optional[DenseIndex] = DenseIndex() if embedding_model else None
+        self._chunks_to_embed: Dict[str, str] = {}
+        self._version = 0
+        self._near_duplicates: Optional[NearDuplicateIndex] = (
+            NearDuplicateIndex(near_duplicate_threshold) if near_duplicate_threshold else None
+        )
+        self._deduplication_report = DeduplicationReport()
 
-    def add_text(self, text: str):
+    def _add_chunk(self, text: str, metadata: Optional[Dict[str, Any]] = None) -> str:
+        """Index a chunk and return its id, or the id of the copy already indexed."""
         node_id: str = hashlib.sha256(text.encode("utf-8")).hexdigest()
-        self._vector_db.add_text_and_index(text, node_id)
-        self._id_to_chunk[node_id] = text
+        signature = (
+            self._near_duplicates.signature(text) if self._near_duplicates is not None else None
+        )
+        with self._lock:
+            self._deduplication_report.chunks_seen += 1
+            if node_id in self._id_to_chunk:
+                self._deduplication_report.exact_duplicates += 1
+                return node_id
+            if signature is not None:
+                match = self._near_duplicates.find(signature)
+                if match is not None:
+                    source = (metadata or {}).get("source") or text[:80]
+                    self._deduplication_report.add_near_duplicate(source, *match)
+                    return match[0]
+                self._near_duplicates.add(node_id, signature)
+            self._vector_db.add_text_and_index(text, node_id)
+            self._id_to_chunk[node_id] = text
+            if metadata is not None:
+                self._id_to_metadata[node_id] = metadata
+            if self._embedder is not None:
+                self._chunks_to_embed[node_id] = text
+            self._version += 1
+        return node_id
+
+    def _embed_pending_chunks(self):
+        """Encode the chunks added since the last call in batches and index them."""
+        if self._embedder is None:
+            return
+        with self._lock:
+            chunks = self._chunks_to_embed
+            self._chunks_to_embed = {}
+        if not chunks:
+            return
+        chunk_ids = list(chunks)
+        vectors = self._embedder.encode([chunks[chunk_id] for chunk_id in chunk_ids])
+        with self._lock:
+            self._dense_index.add_vectors(chunk_ids, vectors)
+            self._version += 1
+
+    def add_text(
+        self,
+        text: str,
+        progress_callback: Optional[Callable[[int, int, int], None]] = None,
+        filename: Optional[str] = None,
+    ):
+        """Add a text document, split into overlapping passages.
+
+        Args:
+            text: The text to index
+            progress_callback: Optional callable receiving (pages_parsed, total_pages, chunks_indexed)
+            filename: Optional name of the document, shown at the top of each passage
+        """
+        chunks = self._chunker.chunk_text(text, filename or "")
+        for chunk in chunks:
+            self._add_chunk(chunk.text, chunk.get_metadata())
+        self._embed_pending_chunks()
+        if progress_callback:
+            progress_callback(1, 1, len(chunks))
+
+    def add_pages(
+        self, pages: List[Tuple[Optional[int], str]], filename: str = ""
+    ) -> List[str]:
+        """Add already extracted (page number, text) pairs, split into overlapping passages.
+
+        Use None as page number for unpaged text. Returns the ids of the added chunks.
+        """
+        chunk_ids = [
+            self._add_chunk(chunk.text, chunk.get_metadata())
+            for chunk in self._chunker.chunk_pages(pages, filename)
+        ]
+        self._embed_pending_chunks()
+        return chunk_ids
+
+    def remove_chunks(self, chunk_ids: Iterable[str]):
+        """Remove chunks from the lexical and dense indices."""
+        with self._lock:
+            for chunk_id in chunk_ids:
+                if self._id_to_chunk.pop(chunk_id, None) is None:
+                    continue
+                self._vector_db.delete_index(chunk_id)
+                self._id_to_metadata.pop(chunk_id, None)
+                self._chunks_to_embed.pop(chunk_id, None)
+                if self._dense_index is not None:
+                    self._dense_index.delete_index(chunk_id)
+                if self._near_duplicates is not None:
+                    self._near_duplicates.remove(chunk_id)
+                self._version += 1
 
     def add_pdf(
         self,
         pdf_content: bytes,
         filename: str = "uploaded.pdf",
-        pages_per_chunk: int = 1,
+        pages_per_chunk: Optional[int] = None,
+        progress_callback: Optional[Callable[[int, int, int], None]] = None,
     ):
-        """Add PDF content by extracting text with configurable chunking.
+        """Add PDF content by extracting text and splitting it into chunks.
 
         Args:
             pdf_content: PDF file content as bytes
             filename: Name of the PDF file
-            pages_per_chunk: Number of pages per chunk. -1 means all pages in one chunk.
+            pages_per_chunk: None (default) splits pages into overlapping passages with the
+                source's chunker. A number groups that many whole pages per chunk; -1 means
+                all pages in one chunk.
+            progress_callback: Optional callable receiving (pages_parsed, total_pages, chunks_indexed)
         """
         if not PDF_SUPPORT:
             raise ImportError(
@@ -51,16 +182,27 @@ class RAGSource(BaseSource):
             # Read PDF and extract text from all pages
             pdf_reader = PyPDF2.PdfReader(pdf_stream)
             pages_text = []
+            total_pages = len(pdf_reader.pages)
+            chunks_indexed = 0
 
             for page_num, page in enumerate(pdf_reader.pages, 1):
                 page_text = page.extract_text()
                 if page_text.strip():  # Only include non-empty pages
                     pages_text.append((page_num, page_text))
+                if progress_callback:
+                    progress_callback(page_num, total_pages, chunks_indexed)
 
             if not pages_text:
                 return  # No content to add
 
-            if pages_per_chunk == -1:
+            if pages_per_chunk is None:
+                for chunk in self._chunker.chunk_pages(pages_text, filename):
+                    self._add_chunk(chunk.text, chunk.get_metadata())
+                    chunks_indexed += 1
+                if progress_callback:
+                    progress_callback(total_pages, total_pages, chunks_indexed)
+
+            elif pages_per_chunk == -1:
                 # All pages in one chunk
                 all_text_parts = []
                 page_numbers = []
@@ -74,11 +216,10 @@ class RAGSource(BaseSource):
                 )
 
                 # Add as single chunk
-                node_id: str = hashlib.sha256(
-                    combined_content.encode("utf-8")
-                ).hexdigest()
-                self._vector_db.add_text_and_index(combined_content, node_id)
-                self._id_to_chunk[node_id] = combined_content
+                self._add_chunk(combined_content)
+                chunks_indexed += 1
+                if progress_callback:
+                    progress_callback(total_pages, total_pages, chunks_indexed)
 
             else:
                 # Group pages into chunks
@@ -106,28 +247,63 @@ class RAGSource(BaseSource):
                     )
 
                     # Add chunk
-                    node_id: str = hashlib.sha256(
-                        chunk_content.encode("utf-8")
-                    ).hexdigest()
-                    self._vector_db.add_text_and_index(chunk_content, node_id)
-                    self._id_to_chunk[node_id] = chunk_content
+                    self._add_chunk(chunk_content)
+                    chunks_indexed += 1
+                    if progress_callback:
+                        progress_callback(total_pages, total_pages, chunks_indexed)
+
+            self._embed_pending_chunks()
 
         except Exception as e:
             raise Exception(f"Error processing PDF {filename}: {str(e)}")
 
     def get_data(self, query: str, topn: int = 10) -> List[str]:
-        text_ids_and_thresholds = self._vector_db.get_indices_from_text(
-            query, topn=topn
-        )
-        to_return: List[str] = []
-        for index in text_ids_and_thresholds[0]:
-            to_return.append(self._id_to_chunk[index])
-        return to_return
+        return [text for _, text, _ in self.get_scored_data(query, topn)]
+
+    def get_scored_data(self, query: str, topn: int = 10) -> List[Tuple[str, str, float]]:
+        """Return (chunk id, chunk text, score) for the best chunks, best first.
+
+        Scores are normalized to [0, 1] so that results of different sources can
+        be merged: BM25 scores are divided by the best score the query could get
+        in this source, fused scores by the score of a chunk ranked first by
+        both retrievers.
+        """
+        if self._embedder is None:
+            with self._lock:
+                indices, scores = self._vector_db.get_indices_from_text(query, topn=topn)
+                upper_bound = self._vector_db.get_score_upper_bound(query) or 1.0
+                return [
+                    (index, self._id_to_chunk[index], score / upper_bound)
+                    for index, score in zip(indices, scores)
+                ]
+
+        candidates = topn * self._FUSION_CANDIDATES_PER_RESULT
+        query_vector = self._embedder.encode([query])[0]
+        with self._lock:
+            lexical_ids, _ = self._vector_db.get_indices_from_text(query, topn=candidates)
+            dense_ids, _ = self._dense_index.search(query_vector, topn=candidates)
+            fused = reciprocal_rank_fusion([lexical_ids, dense_ids], k=self._RRF_K)[:topn]
+            best_fused_score = 2.0 / (self._RRF_K + 1)
+            return [
+                (index, self._id_to_chunk[index], score / best_fused_score)
+                for index, score in fused
+            ]
+
+    def get_deduplication_report(self) -> DeduplicationReport:
+        """Counts of the chunks that were not indexed because a copy was already there."""
+        return self._deduplication_report
+
+    def get_version(self) -> int:
+        """A number that changes whenever the indexed chunks change, to key caches of results."""
+        return self._version
 
     def get_description(self) -> str:
-        self._vector_db.build()
         return self._description
 
+    def get_chunk_metadata(self, chunk_id: str) -> Optional[Dict[str, Any]]:
+        """Source, page, heading and character span of a chunk, when it was chunked by passages."""
+        return self._id_to_metadata.get(chunk_id)
+
     def get_document_count(self) -> int:
         """Get the number of documents/chunks in the source."""
         return len(self._id_to_chunk)
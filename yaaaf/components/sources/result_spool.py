@@ -0,0 +1,160 @@
+"""Columnar on-disk storage for large SQL results.
+
+Layout of a spool directory::
+
+    manifest.json         # {"columns": [...], "row_groups": [rows, ...]}
+    group-000000.npz      # one row group per fetched batch, one array per column
+
+Numeric and boolean columns are stored as typed arrays under their position
+("0", "1", ...). Other columns are stored as UTF-8 text: "<i>.text" holds the
+concatenated values, "<i>.offsets" where each value starts and "<i>.null"
+which values are NULL. Each row group keeps its own types, since SQLite
+values of a column may change type from row to row. Pages are read by
+loading only the row groups they overlap.
+
+A spool directory lives as long as the ResultSpool returned by the writer:
+it is deleted once nothing (a cached result, an artefact) refers to it, or
+at exit. The result cache deletes it earlier, when it evicts or invalidates
+the result. A writer that fails or is abandoned deletes its directory too.
+"""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+import weakref
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+_logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+
+def _encode_column(values: pd.Series, key: str, arrays: Dict[str, np.ndarray]):
+    if values.dtype.kind in "biuf":
+        arrays[key] = values.to_numpy()
+        return
+    null = values.isna().to_numpy()
+    encoded = [
+        b"" if is_null else str(value).encode("utf-8")
+        for value, is_null in zip(values, null)
+    ]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    arrays[f"{key}.offsets"] = offsets
+    arrays[f"{key}.text"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    arrays[f"{key}.null"] = null
+
+
+def _decode_column(group, key: str, rows: int):
+    if key in group.files:
+        return group[key]
+    offsets = group[f"{key}.offsets"]
+    text = group[f"{key}.text"].tobytes()
+    null = group[f"{key}.null"]
+    return [
+        None if null[i] else text[offsets[i] : offsets[i + 1]].decode("utf-8")
+        for i in range(rows)
+    ]
+
+
+class ResultSpoolWriter:
+    """Appends batches of a result to a new spool directory."""
+
+    def __init__(self, columns: List[str], directory: Optional[str] = None):
+        self.columns = [str(column) for column in columns]
+        self.path = tempfile.mkdtemp(prefix="yaaaf-sql-result-", dir=directory)
+        self._row_groups: List[int] = []
+        self._remove = weakref.finalize(self, shutil.rmtree, self.path, ignore_errors=True)
+
+    def append(self, batch: pd.DataFrame):
+        if batch.empty:
+            return
+        arrays: Dict[str, np.ndarray] = {}
+        for position in range(batch.shape[1]):
+            _encode_column(batch.iloc[:, position], str(position), arrays)
+        name = f"group-{len(self._row_groups):06d}.npz"
+        np.savez_compressed(os.path.join(self.path, name), **arrays)
+        self._row_groups.append(len(batch))
+
+    def discard(self):
+        """Delete the partly written spool, e.g. after the query failed."""
+        self._remove()
+
+    def close(self) -> "ResultSpool":
+        """Finish the spool; the returned ResultSpool owns the directory from now on."""
+        try:
+            with open(os.path.join(self.path, MANIFEST_NAME), "w") as f:
+                json.dump({"columns": self.columns, "row_groups": self._row_groups}, f)
+            spool = ResultSpool(self.path, owned=True)
+        except BaseException:
+            self.discard()
+            raise
+        self._remove.detach()
+        _logger.debug(
+            f"Spooled {sum(self._row_groups)} rows in {len(self._row_groups)} row groups to {self.path}"
+        )
+        return spool
+
+
+class ResultSpool:
+    """Read access to a spooled result, one page at a time.
+
+    An owned spool deletes its directory once it is garbage collected, or
+    earlier through `delete`.
+    """
+
+    def __init__(self, path: str, owned: bool = False):
+        self.path = path
+        with open(os.path.join(path, MANIFEST_NAME)) as f:
+            manifest = json.load(f)
+        self.columns: List[str] = manifest["columns"]
+        self._group_starts = np.zeros(len(manifest["row_groups"]) + 1, dtype=np.int64)
+        np.cumsum(manifest["row_groups"], out=self._group_starts[1:])
+        with os.scandir(path) as entries:
+            self.size_bytes = sum(entry.stat().st_size for entry in entries if entry.is_file())
+        self._remove = (
+            weakref.finalize(self, shutil.rmtree, path, ignore_errors=True) if owned else None
+        )
+        self.deleted = False
+
+    def __len__(self) -> int:
+        return int(self._group_starts[-1])
+
+    def delete(self):
+        """Delete the directory of an owned spool now; later reads raise FileNotFoundError."""
+        if self._remove is not None:
+            self._remove()
+            self.deleted = True
+
+    def _read_group(self, index: int) -> pd.DataFrame:
+        rows = int(self._group_starts[index + 1] - self._group_starts[index])
+        with np.load(os.path.join(self.path, f"group-{index:06d}.npz")) as group:
+            data = {
+                position: _decode_column(group, str(position), rows)
+                for position in range(len(self.columns))
+            }
+        df = pd.DataFrame(data)
+        df.columns = self.columns
+        return df
+
+    def read_rows(self, offset: int = 0, limit: int = 100) -> pd.DataFrame:
+        """Rows offset to offset + limit, loading only the row groups they span."""
+        if self.deleted:
+            raise FileNotFoundError(
+                f"The spooled result in {self.path} was deleted when it left the result cache"
+            )
+        end = min(offset + limit, len(self))
+        if offset >= end:
+            return pd.DataFrame(columns=self.columns)
+        first = int(np.searchsorted(self._group_starts, offset, side="right")) - 1
+        last = int(np.searchsorted(self._group_starts, end, side="left"))
+        page = pd.concat(
+            [self._read_group(index) for index in range(first, last)], ignore_index=True
+        )
+        start = offset - int(self._group_starts[first])
+        return page.iloc[start : start + end - offset].reset_index(drop=True)
@@ -0,0 +1,113 @@
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from yaaaf.components.sources.sqlite_ingestion import quote_identifier
+from yaaaf.components.sources.sqlite_pool import SqliteConnectionPool
+
+_logger = logging.getLogger(__name__)
+
+# Rows read per table to pick the sample values of its columns
+_SAMPLE_ROWS = 100
+_MAX_SAMPLE_CHARS = 40
+
+
+@dataclass
+class ColumnInfo:
+    name: str
+    type: str  # declared type, empty when the column has none
+    sample_values: List[str] = field(default_factory=list)
+
+
+@dataclass
+class TableInfo:
+    name: str
+    row_count: int
+    columns: List[ColumnInfo] = field(default_factory=list)
+
+
+@dataclass
+class SchemaCatalog:
+    """Tables of a database with column types, row counts and sample values."""
+
+    tables: Dict[str, TableInfo]
+    version: Tuple  # (PRAGMA schema_version, data version of the pool)
+
+    def to_markdown(self) -> str:
+        parts = []
+        for table in self.tables.values():
+            lines = [
+                f"# Table {table.name} ({table.row_count} rows)",
+                "| column | type | examples |",
+                "|---|---|---|",
+            ]
+            for column in table.columns:
+                examples = ", ".join(column.sample_values)
+                lines.append(f"| {column.name} | {column.type or 'ANY'} | {examples} |")
+            parts.append("\n".join(lines))
+        return "\n\n".join(parts)
+
+
+def _format_sample(value) -> str:
+    text = str(value).replace("|", "/").replace("\n", " ")
+    return text if len(text) <= _MAX_SAMPLE_CHARS else text[: _MAX_SAMPLE_CHARS - 3] + "..."
+
+
+def read_catalog(conn: sqlite3.Connection, version: Tuple, max_samples: int = 3) -> SchemaCatalog:
+    """Introspect every table with three queries each: columns, row count and sample rows."""
+    tables = {}
+    names = [
+        row[0]
+        for row in conn.execute(
+            "SELECT name FROM sqlite_master "
+            "WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        )
+    ]
+    for name in names:
+        quoted = quote_identifier(name)
+        columns = [
+            ColumnInfo(name=row[1], type=row[2])
+            for row in conn.execute(f"PRAGMA table_info({quoted})")
+        ]
+        row_count = conn.execute(f"SELECT COUNT(*) FROM {quoted}").fetchone()[0]
+        for row in conn.execute(f"SELECT * FROM {quoted} LIMIT {_SAMPLE_ROWS}"):
+            for column, value in zip(columns, row):
+                if value is None or len(column.sample_values) >= max_samples:
+                    continue
+                sample = _format_sample(value)
+                if sample not in column.sample_values:
+                    column.sample_values.append(sample)
+        tables[name] = TableInfo(name=name, row_count=row_count, columns=columns)
+    return SchemaCatalog(tables=tables, version=version)
+
+
+_catalogs: Dict[str, SchemaCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(pool: SqliteConnectionPool) -> SchemaCatalog:
+    """The catalog of the pool's database, introspected again only after a change.
+
+    A change is detected through PRAGMA schema_version (tables created,
+    altered or dropped) and the pool's data version (rows written by this
+    process or any other), so the check costs one PRAGMA and two stat calls.
+    """
+    with pool.reader() as conn:
+        version = (conn.execute("PRAGMA schema_version").fetchone()[0], pool.get_data_version())
+        with _catalogs_lock:
+            catalog: Optional[SchemaCatalog] = _catalogs.get(pool.db_path)
+        if catalog is not None and catalog.version == version:
+            return catalog
+
+        started = time.perf_counter()
+        catalog = read_catalog(conn, version)
+    _logger.info(
+        f"Read the schema of {len(catalog.tables)} tables in {pool.db_path} "
+        f"in {time.perf_counter() - started:.2f}s"
+    )
+    with _catalogs_lock:
+        _catalogs[pool.db_path] = catalog
+    return catalog
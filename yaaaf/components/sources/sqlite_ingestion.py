@@ -0,0 +1,227 @@
+import io
+import logging
+import re
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from typing import BinaryIO, Dict, Iterable, Iterator, List
+
+import pandas as pd
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+
+@dataclass
+class IngestionStats:
+    """Outcome of a bulk load into a SQLite table."""
+
+    table_name: str
+    rows_inserted: int = 0
+    seconds: float = 0.0
+    columns: Dict[str, str] = field(default_factory=dict)  # column -> SQLite type
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_inserted / self.seconds if self.seconds > 0 else 0.0
+
+
+def clean_column_names(columns: Iterable) -> List[str]:
+    """Make column names SQL friendly: no spaces, no special characters."""
+    cleaned = []
+    for column in columns:
+        name = re.sub(r"[^a-zA-Z0-9_]", "", str(column).strip().replace(" ", "_"))
+        cleaned.append(name or f"column_{len(cleaned)}")
+    return cleaned
+
+
+def quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def infer_sqlite_schema(sample: pd.DataFrame) -> Dict[str, str]:
+    """Infer a stable SQLite column type for each column of a sample chunk."""
+    schema = {}
+    for column in sample.columns:
+        dtype = sample[column].dtype
+        if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+            schema[column] = "INTEGER"
+        elif pd.api.types.is_float_dtype(dtype):
+            schema[column] = "REAL"
+        else:
+            schema[column] = "TEXT"
+    return schema
+
+
+def iter_csv_chunks(
+    file: BinaryIO, encoding: str, chunksize: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[pd.DataFrame]:
+    """Read a CSV file object in bounded chunks."""
+    text_stream = io.TextIOWrapper(file, encoding=encoding, newline="")
+    try:
+        yield from pd.read_csv(text_stream, chunksize=chunksize)
+    finally:
+        # Leave the underlying file open so the caller can rewind it
+        text_stream.detach()
+
+
+def iter_excel_chunks(
+    file: BinaryIO, file_extension: str, chunksize: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[pd.DataFrame]:
+    """Read the first sheet of an Excel file object in bounded chunks.
+
+    .xlsx files are streamed row by row with openpyxl in read-only mode.
+    Legacy .xls files cannot be streamed and are loaded whole, then chunked.
+    """
+    if file_extension != "xlsx":
+        df = pd.read_excel(file)
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start : start + chunksize]
+        return
+
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [
+            str(name) if name is not None else f"column_{index}"
+            for index, name in enumerate(header)
+        ]
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunksize:
+                yield pd.DataFrame(batch, columns=columns).infer_objects()
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=columns).infer_objects()
+    finally:
+        workbook.close()
+
+
+def _to_rows(chunk: pd.DataFrame) -> Iterator[tuple]:
+    """Convert a chunk to tuples of plain Python values sqlite3 can bind."""
+    chunk = chunk.copy()
+    for column in chunk.columns:
+        if pd.api.types.is_datetime64_any_dtype(chunk[column].dtype):
+            chunk[column] = chunk[column].dt.strftime("%Y-%m-%d %H:%M:%S")
+    chunk = chunk.astype(object).where(pd.notna(chunk), None)
+    return chunk.itertuples(index=False, name=None)
+
+
+def bulk_insert_chunks(
+    conn: sqlite3.Connection,
+    table_name: str,
+    chunks: Iterable[pd.DataFrame],
+    if_exists: str = "replace",
+) -> IngestionStats:
+    """Insert DataFrame chunks into a table inside a single transaction.
+
+    The schema is inferred from the first chunk and kept for the whole load,
+    so memory use is bounded by the chunk size rather than the file size.
+
+    Args:
+        conn: Writer connection in autocommit mode (isolation_level=None)
+        table_name: Target table
+        chunks: Iterable of DataFrames sharing the same columns
+        if_exists: "replace" to drop and recreate the table, "append" to add rows
+
+    Returns:
+        IngestionStats with row count and throughput
+
+    Raises:
+        ValueError: If the input contains no rows or cannot be parsed
+    """
+    stats = IngestionStats(table_name=table_name)
+    start = time.perf_counter()
+    quoted_table = quote_identifier(table_name)
+
+    try:
+        conn.execute("BEGIN")
+
+        insert_sql = None
+        for chunk in chunks:
+            if chunk.empty:
+                continue
+            chunk = chunk.copy()
+            chunk.columns = clean_column_names(chunk.columns)
+
+            if insert_sql is None:
+                stats.columns = infer_sqlite_schema(chunk)
+                if if_exists == "replace":
+                    conn.execute(f"DROP TABLE IF EXISTS {quoted_table}")
+                column_definitions = ", ".join(
+                    f"{quote_identifier(name)} {sql_type}"
+                    for name, sql_type in stats.columns.items()
+                )
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {quoted_table} ({column_definitions})"
+                )
+                quoted_columns = ", ".join(
+                    quote_identifier(name) for name in stats.columns
+                )
+                placeholders = ", ".join("?" for _ in stats.columns)
+                insert_sql = f"INSERT INTO {quoted_table} ({quoted_columns}) VALUES ({placeholders})"
+
+            conn.executemany(insert_sql, _to_rows(chunk))
+            stats.rows_inserted += len(chunk)
+            _logger.debug(
+                f"Inserted {stats.rows_inserted} rows into '{table_name}' so far"
+            )
+
+        if stats.rows_inserted == 0:
+            raise ValueError("File contains no data")
+
+        conn.execute("COMMIT")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+
+    stats.seconds = time.perf_counter() - start
+    _logger.info(
+        f"Loaded {stats.rows_inserted} rows into '{table_name}' in {stats.seconds:.2f}s "
+        f"({stats.rows_per_second:.0f} rows/s)"
+    )
+    return stats
+
+
+def ingest_file(
+    conn: sqlite3.Connection,
+    file: BinaryIO,
+    file_extension: str,
+    table_name: str,
+    if_exists: str = "replace",
+    chunksize: int = DEFAULT_CHUNK_SIZE,
+) -> IngestionStats:
+    """Stream a CSV or Excel file object into a SQLite table.
+
+    CSV files are decoded as UTF-8 first; if that fails the transaction is
+    rolled back and the file is re-read as latin-1.
+    """
+    if file_extension == "csv":
+        try:
+            return bulk_insert_chunks(
+                conn, table_name, iter_csv_chunks(file, "utf-8", chunksize), if_exists
+            )
+        except UnicodeDecodeError:
+            _logger.info(f"'{table_name}' is not valid UTF-8, retrying as latin-1")
+            file.seek(0)
+            return bulk_insert_chunks(
+                conn,
+                table_name,
+                iter_csv_chunks(file, "latin-1", chunksize),
+                if_exists,
+            )
+
+    return bulk_insert_chunks(
+        conn,
+        table_name,
+        iter_excel_chunks(file, file_extension, chunksize),
+        if_exists,
+    )
@@ -0,0 +1,162 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_READERS = 8
+
+# Set once on the writer; WAL is persistent and lets readers run during writes
+_WAL_PRAGMA = "PRAGMA journal_mode=WAL"
+_WRITER_PRAGMAS = [
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",  # 64 MiB page cache
+]
+_READER_PRAGMAS = [
+    "PRAGMA mmap_size=268435456",  # 256 MiB of the file mapped, shared through the OS page cache
+    "PRAGMA cache_size=-16384",  # 16 MiB page cache per reader
+    "PRAGMA temp_store=MEMORY",
+]
+
+
+class SqliteConnectionPool:
+    """Pooled connections to one SQLite database: read-only readers and a single writer.
+
+    The database is switched to WAL journal mode, so readers never wait for
+    the writer and a bulk load does not make queries fail with "database is
+    locked"; a database that cannot be switched, e.g. a read-only file,
+    keeps its journal mode. Readers are opened read-only without the writer,
+    reused across queries and may be used from any thread; sqlite3 releases the GIL while a statement runs,
+    so queries on different threads run in parallel. At most `max_readers`
+    readers exist at a time, further queries wait for one to be returned.
+    """
+
+    def __init__(self, db_path: str, max_readers: int = DEFAULT_MAX_READERS):
+        self.db_path = db_path
+        self._reader_uri = Path(db_path).absolute().as_uri() + "?mode=ro"
+        self._idle_readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._all_readers: List[sqlite3.Connection] = []
+        self._reader_slots = threading.BoundedSemaphore(max_readers)
+        self._readers_lock = threading.Lock()
+        self._writer_connection: Optional[sqlite3.Connection] = None
+        self._writer_open_lock = threading.Lock()
+        # Serializes writes; readers never take it
+        self._writer_lock = threading.RLock()
+        self.write_generation = 0
+
+    def _open_writer(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(
+            self.db_path, isolation_level=None, check_same_thread=False, timeout=30
+        )
+        try:
+            connection.execute(_WAL_PRAGMA)
+        except sqlite3.OperationalError as e:
+            _logger.warning(
+                f"Could not switch {self.db_path} to WAL journal mode, keeping its current mode: {e}"
+            )
+        for pragma in _WRITER_PRAGMAS:
+            connection.execute(pragma)
+        _logger.debug(f"Opened writer connection to {self.db_path}")
+        return connection
+
+    def _get_writer_connection(self) -> sqlite3.Connection:
+        with self._writer_open_lock:
+            if self._writer_connection is None:
+                self._writer_connection = self._open_writer()
+            return self._writer_connection
+
+    def _open_reader(self) -> sqlite3.Connection:
+        if not os.path.exists(self.db_path):
+            # A read-only connection cannot create the database; the writer does
+            self._get_writer_connection()
+        connection = sqlite3.connect(self._reader_uri, uri=True, check_same_thread=False)
+        for pragma in _READER_PRAGMAS:
+            connection.execute(pragma)
+        with self._readers_lock:
+            self._all_readers.append(connection)
+        return connection
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a read-only connection."""
+        self._reader_slots.acquire()
+        try:
+            try:
+                connection = self._idle_readers.get_nowait()
+            except queue.Empty:
+                connection = self._open_reader()
+            try:
+                yield connection
+            finally:
+                if connection.in_transaction:
+                    connection.rollback()
+                self._idle_readers.put(connection)
+        finally:
+            self._reader_slots.release()
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """Hold the writer connection (autocommit mode) until the block exits."""
+        with self._writer_lock:
+            try:
+                yield self._get_writer_connection()
+            finally:
+                self.write_generation += 1
+
+    def get_data_version(self) -> Tuple:
+        """A token that changes whenever the data may have changed.
+
+        Writes through this pool bump `write_generation`; writes by other
+        processes change the size or modification time of the database or
+        its write-ahead log.
+        """
+        files = []
+        for path in (self.db_path, self.db_path + "-wal"):
+            try:
+                stat = os.stat(path)
+                files.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                files.append(None)
+        return (self.write_generation, *files)
+
+    def close(self):
+        with self._writer_lock, self._writer_open_lock:
+            if self._writer_connection is not None:
+                self._writer_connection.close()
+                self._writer_connection = None
+        with self._readers_lock:
+            for connection in self._all_readers:
+                connection.close()
+            self._all_readers.clear()
+        self._idle_readers = queue.LifoQueue()
+
+
+_pools: Dict[str, SqliteConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_connection_pool(db_path: str) -> SqliteConnectionPool:
+    """The pool of a database, shared by every source opened on the same file."""
+    key = os.path.abspath(db_path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = SqliteConnectionPool(db_path)
+            _pools[key] = pool
+        return pool
+
+
+def close_connection_pool(db_path: str):
+    with _pools_lock:
+        pool = _pools.pop(os.path.abspath(db_path), None)
+    if pool is not None:
+        pool.close()
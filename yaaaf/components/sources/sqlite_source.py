@@ -1,19 +1,94 @@
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
 import pandas as pd
 
 from yaaaf.components.sources.base_source import BaseSource
+from yaaaf.components.sources.sqlite_ingestion import (
+    DEFAULT_CHUNK_SIZE,
+    IngestionStats,
+    bulk_insert_chunks,
+    ingest_file,
+)
+from yaaaf.components.sources.sqlite_catalog import SchemaCatalog, get_catalog
+from yaaaf.components.sources.query_result_cache import (
+    invalidate_query_results,
+    strip_sql_terminator,
+)
+from yaaaf.components.sources.sqlite_pool import get_connection_pool
+
+# SQLite virtual machine instructions between two checks of the deadline
+_PROGRESS_INTERVAL = 10000
+DEFAULT_BATCH_SIZE = 5000
+
+
+class QueryTimeoutError(TimeoutError):
+    """Raised when a query runs past its deadline and is interrupted."""
+
+
+class QueryCancelledError(Exception):
+    """Raised when a query is interrupted because its caller gave up on it."""
 
 
 class SqliteSource(BaseSource):
     def __init__(self, name: str, db_path: str):
         super().__init__(name)
         self.db_path = db_path
+        # Shared with every other source on the same file
+        self._pool = get_connection_pool(db_path)
+
+    @contextmanager
+    def _interruptible_reader(
+        self, timeout: Optional[float], cancel_event: Optional[threading.Event]
+    ) -> Iterator[sqlite3.Connection]:
+        """Borrow a reader whose statements are interrupted at the deadline or on cancellation.
+
+        SQLite's progress handler checks both every few thousand VM
+        instructions; an interrupted statement raises QueryTimeoutError or
+        QueryCancelledError.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        def should_interrupt() -> int:
+            if cancel_event is not None and cancel_event.is_set():
+                return 1
+            return int(deadline is not None and time.monotonic() > deadline)
+
+        with self._pool.reader() as conn:
+            if deadline is not None or cancel_event is not None:
+                conn.set_progress_handler(should_interrupt, _PROGRESS_INTERVAL)
+            try:
+                yield conn
+            except (sqlite3.OperationalError, pd.errors.DatabaseError) as e:
+                if "interrupted" not in str(e):
+                    raise
+                if cancel_event is not None and cancel_event.is_set():
+                    raise QueryCancelledError("Query cancelled") from e
+                raise QueryTimeoutError(
+                    f"Query exceeded the time limit of {timeout:g} seconds"
+                ) from e
+            finally:
+                conn.set_progress_handler(None, 0)
+
+    def get_data(
+        self,
+        query: str,
+        timeout: Optional[float] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> pd.DataFrame:
+        """Run a read-only query.
 
-    def get_data(self, query: str) -> pd.DataFrame:
-        conn = sqlite3.connect(self.db_path)
+        The query is interrupted once `timeout` seconds have passed
+        (QueryTimeoutError) or `cancel_event` is set (QueryCancelledError).
+        Other SQL errors are returned as a dataframe describing the error.
+        """
         try:
-            return pd.read_sql_query(query, conn)
-        except (ValueError, pd.errors.DatabaseError) as e:
+            with self._interruptible_reader(timeout, cancel_event) as conn:
+                return pd.read_sql_query(query, conn)
+        except (ValueError, sqlite3.Error, pd.errors.DatabaseError) as e:
             return pd.DataFrame.from_dict(
                 {
                     "Errors": [f"Error in executing SQL query: {e}"],
@@ -21,26 +96,95 @@ class SqliteSource(BaseSource):
                 }
             )
 
+    def iter_batches(
+        self,
+        query: str,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        timeout: Optional[float] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """Run a read-only query and yield its rows in dataframes of at most batch_size rows.
+
+        Only one batch is held at a time. The reader is returned to the pool
+        when the generator is exhausted or closed. An empty result yields a
+        single empty dataframe with the result's columns. SQL errors are raised.
+        """
+        with self._interruptible_reader(timeout, cancel_event) as conn:
+            cursor = conn.execute(query)
+            try:
+                columns = [column[0] for column in cursor.description or []]
+                yielded = False
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yielded = True
+                    yield pd.DataFrame.from_records(rows, columns=columns)
+                if not yielded:
+                    yield pd.DataFrame(columns=columns)
+            finally:
+                cursor.close()
+
+    def count_rows(
+        self,
+        query: str,
+        timeout: Optional[float] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> int:
+        """Number of rows a read-only query returns, counted inside SQLite."""
+        subquery = strip_sql_terminator(query)
+        with self._interruptible_reader(timeout, cancel_event) as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM ({subquery})").fetchone()[0]
+
+    def explain_query_plan(self, query: str) -> List[Tuple[int, int, str]]:
+        """(id, parent id, detail) rows of EXPLAIN QUERY PLAN; the query is prepared but not run.
+
+        Raises sqlite3.Error for unknown tables or columns, ambiguous names
+        and syntax errors.
+        """
+        subquery = strip_sql_terminator(query)
+        with self._pool.reader() as conn:
+            rows = conn.execute(f"EXPLAIN QUERY PLAN {subquery}").fetchall()
+        return [(row[0], row[1], row[3]) for row in rows]
+
+    def get_catalog(self) -> SchemaCatalog:
+        """Tables, column types, row counts and sample values, cached until the database changes."""
+        return get_catalog(self._pool)
+
     def get_description(self) -> str:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        tables = cursor.execute(
-            "SELECT name FROM sqlite_master WHERE type='table';"
-        ).fetchall()
-        markdown_schema: str = ""
-        for table_name in tables:
-            table_name = table_name[0].replace(" ", "_")
-            table = pd.read_sql_query(f"SELECT * FROM {table_name} LIMIT 1", conn)
-            table_columns = [item.replace(" ", "_") for item in table.columns.tolist()]
-            markdown_schema += f"# Columns for the table called {table_name} are:\n{table_columns}\n\n\n"
-        cursor.close()
-        conn.close()
-        return markdown_schema
+        return self.get_catalog().to_markdown()
+
+    def get_data_version(self) -> Tuple:
+        """Changes whenever rows or tables of the database may have changed."""
+        return self._pool.get_data_version()
 
     def ingest(
-        self, df: pd.DataFrame, table_name: str, if_exists: str = "replace"
-    ) -> None:
-        conn = sqlite3.connect(self.db_path)
-        df.columns = [col.replace(" ", "_") for col in df.columns]
-        df.to_sql(table_name, conn, if_exists=if_exists, index=False)
-        conn.close()
+        self,
+        df: pd.DataFrame,
+        table_name: str,
+        if_exists: str = "replace",
+        chunksize: int = DEFAULT_CHUNK_SIZE,
+    ) -> IngestionStats:
+        chunks = (
+            df.iloc[start : start + chunksize] for start in range(0, len(df), chunksize)
+        )
+        try:
+            with self._pool.writer() as conn:
+                return bulk_insert_chunks(conn, table_name, chunks, if_exists)
+        finally:
+            invalidate_query_results(self.db_path)
+
+    def ingest_file(
+        self,
+        file: BinaryIO,
+        file_extension: str,
+        table_name: str,
+        if_exists: str = "replace",
+        chunksize: int = DEFAULT_CHUNK_SIZE,
+    ) -> IngestionStats:
+        """Stream a CSV/Excel file into a table in bounded chunks."""
+        try:
+            with self._pool.writer() as conn:
+                return ingest_file(conn, file, file_extension, table_name, if_exists, chunksize)
+        finally:
+            invalidate_query_results(self.db_path)
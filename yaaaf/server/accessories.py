@@ -1,6 +1,6 @@
 import logging
 import os
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set
 from yaaaf.components.agents.orchestrator_agent import OrchestratorAgent
 from yaaaf.components.data_types import Note
 from yaaaf.components.safety_filter import SafetyFilter
@@ -27,6 +27,7 @@ class StreamStatus:
 
 
 _stream_id_to_status: Dict[str, StreamStatus] = {}
+_starting_stream_ids: Set[str] = set()  # streams whose orchestrator is still being built
 
 
 async def do_compute(stream_id, messages, orchestrator: OrchestratorAgent, env_path: Optional[str] = None, working_dir: Optional[str] = None):
@@ -263,6 +264,35 @@ def get_stream_status(stream_id):
         return None
 
 
+def mark_stream_starting(stream_id: str):
+    """Record a stream whose orchestrator is being built, before it has notes or a status."""
+    _starting_stream_ids.add(stream_id)
+
+
+def mark_stream_started(stream_id: str):
+    _starting_stream_ids.discard(stream_id)
+
+
+def stream_exists(stream_id: str) -> bool:
+    """Whether a stream was started, even if its orchestrator is still being built"""
+    return (
+        stream_id in _stream_id_to_status
+        or stream_id in _stream_id_to_messages
+        or stream_id in _starting_stream_ids
+    )
+
+
+def get_stream_counts() -> Dict[str, int]:
+    """Count running and paused streams (paused streams are waiting for user input)"""
+    paused_ids = set(_stream_id_to_paused_state)
+    active = sum(
+        1
+        for stream_id, status in list(_stream_id_to_status.items())
+        if status.is_active and stream_id not in paused_ids
+    )
+    return {"active": active, "paused": len(paused_ids)}
+
+
 def update_stream_status(stream_id, goal: str = None, current_agent: str = None):
     """Update the status of a stream"""
     try:
@@ -31,6 +31,21 @@ class SourceSettings(BaseSettings):
     type: str | None = None
     path: str | None = None
     description: str | None = None
+    embedding_model: str | None = None  # Local sentence-transformers model for hybrid retrieval (text/rag sources)
+
+
+class ChunkingSettings(BaseSettings):
+    chunk_size: int = 256  # Maximum words per passage indexed by text/RAG sources
+    chunk_overlap: int = 32  # Words shared by consecutive passages of the same section
+
+
+class DeduplicationSettings(BaseSettings):
+    enabled: bool = True  # Drop chunks nearly identical to an indexed one when text/RAG sources ingest
+    threshold: float = 0.9  # Estimated Jaccard similarity of word 3-grams above which a chunk is dropped
+
+    @property
+    def near_duplicate_threshold(self) -> Optional[float]:
+        return self.threshold if self.enabled else None
 
 
 class ToolSettings(BaseSettings):
@@ -70,11 +85,23 @@ class Settings(BaseSettings):
     agents: List[str | AgentSettings] = []
     safety_filter: SafetyFilterSettings = SafetyFilterSettings()
     api_keys: APISettings = APISettings()
+    chunking: ChunkingSettings = ChunkingSettings()
+    deduplication: DeduplicationSettings = DeduplicationSettings()
     generate_summary: bool = False
     disable_user_prompts: bool = False  # If True, skip user prompts on validation failure and replan instead
     skip_bash_safety_check: bool = False  # If True, allow all bash commands without safety filtering
     max_replan_attempts: int = 3  # Maximum number of replan attempts before giving up
     allow_code_edit_overwrite: bool = True  # If True, code_edit 'create' can overwrite existing files
+    ingestion_workers: int = 4  # Number of background workers indexing uploaded documents
+    ingestion_processes: Optional[int] = None  # Processes extracting text from document folders (default: CPU count)
+    ingestion_job_ttl: float = 3600.0  # Seconds a finished ingestion job stays queryable
+    ingestion_max_finished_jobs: int = 1000  # Finished ingestion jobs kept at most; the oldest are forgotten first
+    sql_query_timeout: float = 30.0  # Seconds an SQL query may run before it is interrupted
+    sql_preview_rows: int = 1000  # Rows of an SQL result kept in memory; larger results are spooled to disk
+    sql_max_rows: int = 1_000_000  # Rows of an SQL result kept at all; the result is marked truncated beyond them
+    sql_preflight: bool = True  # Check SQL queries with EXPLAIN QUERY PLAN against the schema before running them
+    sql_result_cache_bytes: int = 256 * 1024 * 1024  # Memory and spool disk for cached SQL results shared by all streams (0 disables)
+    websocket_send_queue_size: int = 256  # Outgoing WebSocket messages buffered per session before producers wait
 
 
 def _get_simple_config() -> Settings:
@@ -0,0 +1,137 @@
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from yaaaf.server.config import get_config
+
+_logger = logging.getLogger(__name__)
+
+
+class IngestionJob:
+    """Progress of a single background upload (parse -> chunk -> index -> persist)."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+    def __init__(self, filename: str, source_id: str):
+        self.job_id: str = uuid.uuid4().hex
+        self.filename: str = filename
+        self.source_id: str = source_id
+        self.status: str = IngestionJob.QUEUED
+        self.total_pages: int = 0
+        self.pages_parsed: int = 0
+        self.chunks_indexed: int = 0
+        self.error: Optional[str] = None
+        self.created_at: float = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def update_progress(self, pages_parsed: int, total_pages: int, chunks_indexed: int):
+        """Progress callback handed to the RAG source while it ingests the file."""
+        self.pages_parsed = pages_parsed
+        self.total_pages = total_pages
+        self.chunks_indexed = chunks_indexed
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (IngestionJob.COMPLETED, IngestionJob.FAILED)
+
+
+_job_id_to_job: Dict[str, IngestionJob] = {}
+_jobs_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Create the ingestion worker pool lazily, sized from the configuration."""
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            max_workers = max(1, get_config().ingestion_workers)
+            _executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="yaaaf-ingestion"
+            )
+            _logger.info(f"Started ingestion worker pool with {max_workers} workers")
+        return _executor
+
+
+def _run_job(job: IngestionJob, work: Callable[[IngestionJob], None]):
+    job.status = IngestionJob.RUNNING
+    job.started_at = time.time()
+    try:
+        work(job)
+        job.status = IngestionJob.COMPLETED
+        _logger.info(
+            f"Ingestion job {job.job_id} for '{job.filename}' completed: "
+            f"{job.pages_parsed} pages parsed, {job.chunks_indexed} chunks indexed"
+        )
+    except Exception as e:
+        job.status = IngestionJob.FAILED
+        job.error = str(e)
+        _logger.error(f"Ingestion job {job.job_id} for '{job.filename}' failed: {e}")
+    finally:
+        job.finished_at = time.time()
+
+
+def _evict_finished_jobs(ttl: float, max_finished_jobs: int):
+    """Forget finished jobs older than `ttl` seconds, and the oldest beyond `max_finished_jobs`.
+
+    Queued and running jobs are always kept. Must be called with _jobs_lock held.
+    """
+    finished = sorted(
+        (job for job in _job_id_to_job.values() if job.finished_at is not None),
+        key=lambda job: job.finished_at,
+    )
+    cutoff = time.time() - ttl
+    expired = sum(1 for job in finished if job.finished_at < cutoff)
+    evicted = max(expired, len(finished) - max_finished_jobs)
+    for job in finished[:evicted]:
+        del _job_id_to_job[job.job_id]
+    if evicted:
+        _logger.debug(f"Forgot {evicted} finished ingestion jobs")
+
+
+def submit_ingestion_job(
+    filename: str, source_id: str, work: Callable[[IngestionJob], None]
+) -> IngestionJob:
+    """Queue `work` on the ingestion pool and return the job tracking its progress.
+
+    Finished jobs stay queryable for `ingestion_job_ttl` seconds, up to
+    `ingestion_max_finished_jobs` of them; older ones are forgotten here.
+
+    Args:
+        filename: Name of the uploaded file
+        source_id: Identifier of the RAG source receiving the chunks
+        work: Callable doing the parsing/indexing; it receives the job so it can report progress
+
+    Returns:
+        The queued IngestionJob
+    """
+    config = get_config()
+    job = IngestionJob(filename=filename, source_id=source_id)
+    with _jobs_lock:
+        _evict_finished_jobs(config.ingestion_job_ttl, config.ingestion_max_finished_jobs)
+        _job_id_to_job[job.job_id] = job
+    _get_executor().submit(_run_job, job, work)
+    _logger.info(f"Queued ingestion job {job.job_id} for '{filename}'")
+    return job
+
+
+def get_ingestion_job(job_id: str) -> Optional[IngestionJob]:
+    """Get an ingestion job by id, or None if unknown or forgotten."""
+    with _jobs_lock:
+        return _job_id_to_job.get(job_id)
+
+
+def get_all_ingestion_jobs() -> List[IngestionJob]:
+    """Get all known ingestion jobs, most recent first."""
+    with _jobs_lock:
+        jobs = list(_job_id_to_job.values())
+    return sorted(jobs, key=lambda job: job.created_at, reverse=True)
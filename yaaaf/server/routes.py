@@ -3,25 +3,37 @@ import logging
 import threading
 import hashlib
 import sqlite3
-import pandas as pd
 
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from pydantic import BaseModel
-from fastapi.responses import StreamingResponse
-from fastapi import UploadFile, HTTPException, Form
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi import UploadFile, HTTPException, Form, Response
 
+from yaaaf.components import metrics
 from yaaaf.components.agents.artefacts import Artefact, ArtefactStorage
 from yaaaf.components.data_types import Utterance, Messages, Note
-from yaaaf.components.orchestrator_builder import OrchestratorBuilder
+from yaaaf.components.orchestrator_builder import OrchestratorBuilder, get_text_rag_sources
 from yaaaf.components.sources.rag_source import RAGSource
-from yaaaf.components.sources.persistent_rag_source import PersistentRAGSource
+from yaaaf.components.sources.chunking import TextChunker
+from yaaaf.components.sources.persistent_rag_source import get_persistent_rag_source
+from yaaaf.components.sources.sqlite_source import SqliteSource
 from yaaaf.server.accessories import (
     do_compute,
     get_utterances,
     get_paused_state,
+    get_stream_counts,
+    mark_stream_started,
+    mark_stream_starting,
     resume_paused_execution,
 )
 from yaaaf.server.config import get_config
+from yaaaf.server.ingestion import (
+    IngestionJob,
+    submit_ingestion_job,
+    get_ingestion_job,
+    get_all_ingestion_jobs,
+)
+from yaaaf.server.warmup import WarmupTask, get_warmup
 
 _logger = logging.getLogger(__name__)
 
@@ -76,23 +88,102 @@ class ArtefactOutput(BaseModel):
         )
 
 
+class ArtefactRowsArguments(BaseModel):
+    artefact_id: str
+    offset: int = 0
+    limit: int = 100
+
+
+class ArtefactRowsOutput(BaseModel):
+    data: str
+    offset: int
+    total_rows: Optional[int]
+    truncated: bool
+
+    @staticmethod
+    def create_from_artefact(
+        artefact: Artefact, offset: int, limit: int
+    ) -> "ArtefactRowsOutput":
+        rows = artefact.get_rows(offset, limit)
+        total_rows = artefact.total_rows
+        if total_rows is None and artefact.data is not None and not artefact.truncated:
+            total_rows = len(artefact.data)
+        return ArtefactRowsOutput(
+            data=rows.to_html(index=False) if rows is not None else "",
+            offset=offset,
+            total_rows=total_rows,
+            truncated=artefact.truncated,
+        )
+
+
 class ImageArguments(BaseModel):
     image_id: str
 
 
-def create_stream(arguments: CreateStreamArguments):
-    try:
-        stream_id = arguments.stream_id
-        messages = Messages(utterances=arguments.messages)
-        env_path = arguments.env_path
-        working_dir = arguments.working_dir
+def start_stream(
+    stream_id: str,
+    messages: Messages,
+    env_path: Optional[str] = None,
+    working_dir: Optional[str] = None,
+):
+    """Build an orchestrator and run the conversation on a background thread."""
 
-        async def build_and_compute():
-            orchestrator = await OrchestratorBuilder(get_config()).build()
+    async def build_and_compute():
+        try:
+            try:
+                orchestrator = await OrchestratorBuilder(get_config()).build()
+            finally:
+                metrics.STREAMS.dec(state="queued")
             await do_compute(stream_id, messages, orchestrator, env_path=env_path, working_dir=working_dir)
+        finally:
+            # do_compute registered the stream by now, unless building failed
+            mark_stream_started(stream_id)
+
+    metrics.STREAMS.inc(state="queued")
+    mark_stream_starting(stream_id)
+    t = threading.Thread(target=asyncio.run, args=(build_and_compute(),))
+    t.start()
+
 
-        t = threading.Thread(target=asyncio.run, args=(build_and_compute(),))
-        t.start()
+def resume_stream(stream_id: str, user_response: str):
+    """Resume a paused stream with the user's reply on a background thread."""
+
+    async def build_and_resume():
+        orchestrator = await OrchestratorBuilder(get_config()).build()
+        await resume_paused_execution(stream_id, user_response, orchestrator)
+
+    t = threading.Thread(target=asyncio.run, args=(build_and_resume(),))
+    t.start()
+
+
+def serialize_note(note: Note) -> dict:
+    """The note fields sent to the frontend."""
+    return {
+        "message": note.message,
+        "artefact_id": note.artefact_id,
+        "agent_name": note.agent_name,
+        "model_name": note.model_name,
+        "is_status": getattr(note, "is_status", False),
+    }
+
+
+def is_terminal_note(note: Note) -> bool:
+    """True when the orchestrator or system (error) completed or paused the stream."""
+    agent_lower = (getattr(note, "agent_name", "") or "").lower()
+    message_lower = note.message.lower()
+    return agent_lower in ("orchestrator", "system") and (
+        "<taskcompleted/>" in message_lower or "<taskpaused/>" in message_lower
+    )
+
+
+def create_stream(arguments: CreateStreamArguments):
+    try:
+        start_stream(
+            arguments.stream_id,
+            Messages(utterances=arguments.messages),
+            env_path=arguments.env_path,
+            working_dir=arguments.working_dir,
+        )
     except Exception as e:
         _logger.error(f"Routes: Failed to create stream for {arguments.stream_id}: {e}")
         raise
@@ -123,6 +214,26 @@ def get_artifact(arguments: ArtefactArguments) -> ArtefactOutput:
 
 
 
+def get_artifact_rows(arguments: ArtefactRowsArguments) -> ArtefactRowsOutput:
+    """A page of a table artifact, read from disk for results too large to keep in memory."""
+    try:
+        artefact = ArtefactStorage(arguments.artefact_id).retrieve_from_id(
+            arguments.artefact_id
+        )
+        limit = max(1, min(arguments.limit, 10000))
+        return ArtefactRowsOutput.create_from_artefact(
+            artefact, max(0, arguments.offset), limit
+        )
+    except FileNotFoundError as e:
+        raise HTTPException(
+            status_code=410,
+            detail=f"The rows of artifact {arguments.artefact_id} are no longer stored, run the query again: {e}",
+        )
+    except Exception as e:
+        _logger.error(f"Routes: Failed to get rows of artifact {arguments.artefact_id}: {e}")
+        raise
+
+
 def get_image(arguments: ImageArguments) -> str:
     try:
         image_id = arguments.image_id
@@ -157,6 +268,74 @@ class FileUploadResponse(BaseModel):
     message: str
     source_id: str
     filename: str
+    job_id: Optional[str] = None  # Background ingestion job indexing the file
+
+
+class IngestionJobArguments(BaseModel):
+    job_id: str
+
+
+class IngestionJobStatusResponse(BaseModel):
+    job_id: str
+    filename: str
+    source_id: str
+    status: str  # "queued", "running", "completed" or "failed"
+    pages_parsed: int
+    total_pages: int
+    chunks_indexed: int
+    error: Optional[str] = None
+
+    @staticmethod
+    def create_from_job(job: IngestionJob) -> "IngestionJobStatusResponse":
+        return IngestionJobStatusResponse(
+            job_id=job.job_id,
+            filename=job.filename,
+            source_id=job.source_id,
+            status=job.status,
+            pages_parsed=job.pages_parsed,
+            total_pages=job.total_pages,
+            chunks_indexed=job.chunks_indexed,
+            error=job.error,
+        )
+
+
+class DeduplicationReportResponse(BaseModel):
+    source_id: str
+    chunks_seen: int
+    exact_duplicates: int
+    near_duplicates: int
+    examples: List[Tuple[str, str, float]]  # (dropped chunk source, kept chunk id, similarity)
+
+    @staticmethod
+    def create_from_source(
+        source_id: str, rag_source: RAGSource
+    ) -> "DeduplicationReportResponse":
+        report = rag_source.get_deduplication_report()
+        return DeduplicationReportResponse(
+            source_id=source_id,
+            chunks_seen=report.chunks_seen,
+            exact_duplicates=report.exact_duplicates,
+            near_duplicates=report.near_duplicates,
+            examples=list(report.examples),
+        )
+
+
+class WarmupTaskResponse(BaseModel):
+    name: str
+    status: str  # "pending", "running", "completed" or "failed"
+    seconds: Optional[float] = None
+    error: Optional[str] = None
+
+    @staticmethod
+    def create_from_task(task: WarmupTask) -> "WarmupTaskResponse":
+        return WarmupTaskResponse(
+            name=task.name, status=task.status, seconds=task.seconds, error=task.error
+        )
+
+
+class ReadinessResponse(BaseModel):
+    ready: bool
+    tasks: List[WarmupTaskResponse] = []
 
 
 class UpdateDescriptionRequest(BaseModel):
@@ -174,6 +353,7 @@ class SqlUpdateResponse(BaseModel):
     message: str
     table_name: str
     rows_inserted: int
+    rows_per_second: float = 0.0
 
 
 class SqlSourceInfo(BaseModel):
@@ -232,41 +412,30 @@ def get_agents_config() -> List[AgentInfo]:
 # Global variable to store uploaded document sources
 _uploaded_rag_sources = {}
 
-# Global variable to store persistent RAG source if configured
-_persistent_rag_source = None
+def _create_chunker() -> TextChunker:
+    chunking = get_config().chunking
+    return TextChunker(
+        chunk_size=chunking.chunk_size, chunk_overlap=chunking.chunk_overlap
+    )
 
 
 def _get_persistent_rag_source():
     """Get or create persistent RAG source if configured in sources."""
-    global _persistent_rag_source
-
-    if _persistent_rag_source is not None:
-        return _persistent_rag_source
-
-    config = get_config()
-
-    # Look for a RAG source in the sources configuration
-    for source_config in config.sources:
-        if source_config.type == "rag":
-            _persistent_rag_source = PersistentRAGSource(
-                description=source_config.description
-                or source_config.name
-                or "Persistent RAG Source",
-                source_path=source_config.name or "persistent_rag",
-                pickle_path=source_config.path,
-            )
-            _logger.info(
-                f"Initialized persistent RAG source: {source_config.name} at {source_config.path}"
-            )
-            return _persistent_rag_source
-
-    return None
+    return get_persistent_rag_source(get_config())
 
 
 async def upload_file_to_rag(
-    file: UploadFile, pages_per_chunk: int = Form(-1)
+    file: UploadFile, pages_per_chunk: Optional[int] = Form(None)
 ) -> FileUploadResponse:
-    """Upload a file and add it to the document retriever agent sources"""
+    """Upload a file and queue it for indexing in the document retriever agent sources.
+
+    PDFs are split into overlapping passages unless `pages_per_chunk` asks for
+    whole pages per chunk (-1: the whole document as one chunk).
+
+    The response returns as soon as the file is received; parsing, chunking,
+    indexing and persistence run on the ingestion worker pool. Poll
+    `/get_ingestion_job_status` with the returned job_id to follow progress.
+    """
     try:
         # Check if document retriever agent is configured
         config = get_config()
@@ -320,14 +489,15 @@ async def upload_file_to_rag(
         else:
             # Create temporary document source and index the content
             rag_source = RAGSource(
-                description=initial_description, source_path=f"uploaded_{source_id}"
+                description=initial_description,
+                source_path=f"uploaded_{source_id}",
+                chunker=_create_chunker(),
+                near_duplicate_threshold=get_config().deduplication.near_duplicate_threshold,
             )
             _logger.info(f"Creating temporary RAG source for {file.filename}")
 
-        if file_extension == "pdf":
-            # Handle PDF files with configurable chunking
-            rag_source.add_pdf(content, file.filename, pages_per_chunk=pages_per_chunk)
-        else:
+        text_content = None
+        if file_extension != "pdf":
             # Handle text files
             # Try to decode as UTF-8, fallback to latin-1
             try:
@@ -340,25 +510,44 @@ async def upload_file_to_rag(
                         status_code=400, detail="File encoding is not supported"
                     )
 
-            rag_source.add_text(text_content)
-
         # Store the source globally so it can be used by the orchestrator
         # Only store in temporary sources if not using persistent RAG
         if not persistent_rag:
             _uploaded_rag_sources[source_id] = rag_source
 
-        _logger.info(
-            f"Successfully uploaded and indexed file {file.filename} with source ID {source_id}. Total documents in RAG: {rag_source.get_document_count() if hasattr(rag_source, 'get_document_count') else 'unknown'}"
-        )
-
         # Return appropriate source_id based on storage type
         response_source_id = "persistent_rag" if persistent_rag else source_id
+        filename = file.filename
+
+        def ingest(job: IngestionJob):
+            # Parsing, chunking, indexing and persistence run on the worker pool
+            if file_extension == "pdf":
+                # Handle PDF files with configurable chunking
+                rag_source.add_pdf(
+                    content,
+                    filename,
+                    pages_per_chunk=pages_per_chunk,
+                    progress_callback=job.update_progress,
+                )
+            else:
+                rag_source.add_text(
+                    text_content,
+                    progress_callback=job.update_progress,
+                    filename=filename,
+                )
+
+            _logger.info(
+                f"Successfully indexed file {filename} with source ID {response_source_id}. Total documents in RAG: {rag_source.get_document_count()}"
+            )
+
+        job = submit_ingestion_job(filename, response_source_id, ingest)
 
         return FileUploadResponse(
             success=True,
-            message=f"File '{file.filename}' uploaded and indexed successfully",
+            message=f"File '{filename}' uploaded and queued for indexing",
             source_id=response_source_id,
-            filename=file.filename,
+            filename=filename,
+            job_id=job.job_id,
         )
 
     except HTTPException:
@@ -368,6 +557,40 @@ async def upload_file_to_rag(
         raise HTTPException(status_code=500, detail=f"Failed to upload file: {str(e)}")
 
 
+def get_ingestion_job_status(
+    arguments: IngestionJobArguments,
+) -> IngestionJobStatusResponse:
+    """Get the progress of a background document ingestion job"""
+    job = get_ingestion_job(arguments.job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404, detail=f"Ingestion job {arguments.job_id} not found"
+        )
+    return IngestionJobStatusResponse.create_from_job(job)
+
+
+def get_ingestion_jobs() -> List[IngestionJobStatusResponse]:
+    """Get the progress of all background document ingestion jobs"""
+    return [
+        IngestionJobStatusResponse.create_from_job(job)
+        for job in get_all_ingestion_jobs()
+    ]
+
+
+def get_deduplication_reports() -> List[DeduplicationReportResponse]:
+    """Get the duplicate chunks dropped while indexing each document source"""
+    reports = [
+        DeduplicationReportResponse.create_from_source(source_id, rag_source)
+        for source_id, rag_source in list(_uploaded_rag_sources.items())
+    ]
+    persistent_rag = _get_persistent_rag_source()
+    if persistent_rag:
+        reports.append(
+            DeduplicationReportResponse.create_from_source("persistent_rag", persistent_rag)
+        )
+    return reports
+
+
 def update_rag_source_description(
     request: UpdateDescriptionRequest,
 ) -> UpdateDescriptionResponse:
@@ -380,9 +603,7 @@ def update_rag_source_description(
         if source_id == "persistent_rag":
             persistent_rag = _get_persistent_rag_source()
             if persistent_rag:
-                persistent_rag._description = new_description
-                # Save the updated description
-                persistent_rag._save_to_pickle()
+                persistent_rag.set_description(new_description)
                 _logger.info("Updated description for persistent RAG source")
                 return UpdateDescriptionResponse(
                     success=True, message="Description updated successfully"
@@ -615,35 +836,6 @@ async def update_sql_source(
                 detail="Unsupported file type. Only .csv, .xlsx, .xls files are supported",
             )
 
-        # Read file content
-        content = await file.read()
-
-        # Parse file into DataFrame
-        try:
-            if file_extension == "csv":
-                # Try different encodings for CSV
-                try:
-                    df = pd.read_csv(pd.io.common.BytesIO(content), encoding="utf-8")
-                except UnicodeDecodeError:
-                    df = pd.read_csv(pd.io.common.BytesIO(content), encoding="latin-1")
-            else:  # Excel files
-                df = pd.read_excel(pd.io.common.BytesIO(content))
-
-        except Exception as e:
-            raise HTTPException(
-                status_code=400, detail=f"Failed to parse file: {str(e)}"
-            )
-
-        if df.empty:
-            raise HTTPException(status_code=400, detail="File contains no data")
-
-        # Clean column names (remove spaces, special characters)
-        df.columns = (
-            df.columns.str.strip()
-            .str.replace(" ", "_")
-            .str.replace("[^a-zA-Z0-9_]", "", regex=True)
-        )
-
         # Insert data into SQLite database
         try:
             # Ensure database file exists - create empty one if it doesn't
@@ -657,26 +849,33 @@ async def update_sql_source(
                     conn.execute("SELECT 1")  # Simple query to initialize the database
                 _logger.info(f"Created new database file at '{target_source.path}'")
 
-            with sqlite3.connect(target_source.path) as conn:
-                if replace_table:
-                    # Drop table if it exists and replace_table is True
-                    conn.execute(f"DROP TABLE IF EXISTS {table_name}")
-                    df.to_sql(table_name, conn, index=False, if_exists="replace")
-                    action = "replaced"
-                else:
-                    # Append to existing table or create new one
-                    df.to_sql(table_name, conn, index=False, if_exists="append")
-                    action = "updated"
-
-                rows_inserted = len(df)
+            # Stream the spooled upload in bounded chunks on a worker thread
+            # instead of materializing the whole file as a DataFrame
+            sql_source = SqliteSource(name=target_source.name, db_path=target_source.path)
+            file.file.seek(0)
+            stats = await asyncio.to_thread(
+                sql_source.ingest_file,
+                file.file,
+                file_extension,
+                table_name,
+                "replace" if replace_table else "append",
+            )
+            action = "replaced" if replace_table else "updated"
+            rows_inserted = stats.rows_inserted
 
+        except ValueError as e:
+            # Parsing errors and empty files
+            raise HTTPException(
+                status_code=400, detail=f"Failed to parse file: {str(e)}"
+            )
         except Exception as e:
             raise HTTPException(
                 status_code=500, detail=f"Failed to update database: {str(e)}"
             )
 
         _logger.info(
-            f"Successfully {action} table '{table_name}' in database '{target_source.name}' with {rows_inserted} rows"
+            f"Successfully {action} table '{table_name}' in database '{target_source.name}' with {rows_inserted} rows "
+            f"({stats.rows_per_second:.0f} rows/s)"
         )
 
         return SqlUpdateResponse(
@@ -684,6 +883,7 @@ async def update_sql_source(
             message=f"Successfully {action} table '{table_name}' with {rows_inserted} rows",
             table_name=table_name,
             rows_inserted=rows_inserted,
+            rows_per_second=stats.rows_per_second,
         )
 
     except HTTPException:
@@ -695,6 +895,16 @@ async def update_sql_source(
         )
 
 
+async def _count_sse_connection(stream):
+    """Wrap an SSE generator so open connections show up in /metrics."""
+    metrics.SSE_CONNECTIONS.inc()
+    try:
+        async for event in stream:
+            yield event
+    finally:
+        metrics.SSE_CONNECTIONS.dec()
+
+
 async def stream_utterances(arguments: NewUtteranceArguments):
     """Real-time streaming endpoint for utterances"""
 
@@ -723,24 +933,10 @@ async def stream_utterances(arguments: NewUtteranceArguments):
                         # Send each note as SSE
                         import json
 
-                        note_data = {
-                            "message": note.message,
-                            "artefact_id": note.artefact_id,
-                            "agent_name": note.agent_name,
-                            "model_name": note.model_name,
-                            "is_status": getattr(note, "is_status", False),
-                        }
-                        yield f"data: {json.dumps(note_data)}\n\n"
+                        yield f"data: {json.dumps(serialize_note(note))}\n\n"
 
                         # Check for completion or paused state AFTER sending the message
-                        # End stream when ORCHESTRATOR or SYSTEM (error) sends completion
-                        agent_name = getattr(note, "agent_name", "") or ""
-                        agent_lower = agent_name.lower()
-                        is_terminal_agent = agent_lower in ("orchestrator", "system")
-                        if is_terminal_agent and (
-                            "<taskcompleted/>" in note.message.lower()
-                            or "<taskpaused/>" in note.message.lower()
-                        ):
+                        if is_terminal_note(note):
                             return
                 else:
                     # No new data, increment empty check counter
@@ -760,7 +956,7 @@ async def stream_utterances(arguments: NewUtteranceArguments):
                 return
 
     return StreamingResponse(
-        generate_stream(),
+        _count_sse_connection(generate_stream()),
         media_type="text/event-stream",  # Proper SSE media type
         headers={
             "Cache-Control": "no-cache",
@@ -823,12 +1019,7 @@ def submit_user_response(arguments: SubmitUserResponseArguments):
             )
 
         # Build orchestrator and resume execution in a new thread
-        async def build_and_resume():
-            orchestrator = await OrchestratorBuilder(get_config()).build()
-            await resume_paused_execution(stream_id, user_response, orchestrator)
-
-        t = threading.Thread(target=asyncio.run, args=(build_and_resume(),))
-        t.start()
+        resume_stream(stream_id, user_response)
 
         _logger.info(f"Started resumption thread for stream {stream_id}")
 
@@ -842,3 +1033,47 @@ def submit_user_response(arguments: SubmitUserResponseArguments):
             status_code=500,
             detail=f"Failed to submit user response: {str(e)}"
         )
+
+
+def get_readiness(response: Response) -> ReadinessResponse:
+    """Report whether the start-up warm-up has finished (HTTP 503 until then)"""
+    warmup = get_warmup()
+    if warmup is None:
+        return ReadinessResponse(ready=True)
+    if not warmup.is_ready:
+        response.status_code = 503
+    return ReadinessResponse(
+        ready=warmup.is_ready,
+        tasks=[WarmupTaskResponse.create_from_task(task) for task in warmup.tasks],
+    )
+
+
+def get_metrics() -> PlainTextResponse:
+    """Expose server metrics in the Prometheus text exposition format.
+
+    Stream, artefact and RAG gauges are sampled at scrape time; counters and
+    histograms are fed by the clients, agents and workflow executor.
+    """
+    try:
+        stream_counts = get_stream_counts()
+        for state in ("active", "paused"):
+            metrics.STREAMS.set(stream_counts[state], state=state)
+
+        artefact_storage = ArtefactStorage()
+        metrics.ARTEFACTS.set(artefact_storage.get_size())
+        metrics.ARTEFACT_BYTES.set(artefact_storage.estimate_memory_bytes())
+
+        chunk_counts: Dict[str, int] = {}
+        for rag_source in get_uploaded_rag_sources() + get_text_rag_sources():
+            chunk_counts[rag_source.source_path] = (
+                chunk_counts.get(rag_source.source_path, 0) + rag_source.get_document_count()
+            )
+        metrics.RAG_CHUNKS.clear()
+        for source_path, count in chunk_counts.items():
+            metrics.RAG_CHUNKS.set(count, source=source_path)
+    except Exception as e:
+        _logger.error(f"Routes: Failed to sample metrics: {e}")
+
+    return PlainTextResponse(
+        metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4"
+    )
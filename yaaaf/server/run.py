@@ -7,11 +7,15 @@ from starlette.middleware.cors import CORSMiddleware
 from yaaaf.server.routes import (
     create_stream,
     get_artifact,
+    get_artifact_rows,
     get_image,
     get_all_utterances,
     get_query_suggestions,
     get_agents_config,
     upload_file_to_rag,
+    get_ingestion_job_status,
+    get_ingestion_jobs,
+    get_deduplication_reports,
     update_rag_source_description,
     stream_utterances,
     get_sql_sources,
@@ -20,9 +24,13 @@ from yaaaf.server.routes import (
     get_persistent_documents,
     get_stream_status,
     submit_user_response,
+    get_metrics,
+    get_readiness,
 )
 from yaaaf.server.feedback import save_feedback
+from yaaaf.server.websocket_session import websocket_session
 from yaaaf.server.server_settings import server_settings
+from yaaaf.server.warmup import start_warmup
 
 app = FastAPI()
 app.add_middleware(
@@ -32,12 +40,20 @@ app.add_api_route("/create_stream", endpoint=create_stream, methods=["POST"])
 app.add_api_route("/get_utterances", endpoint=get_all_utterances, methods=["POST"])
 app.add_api_route("/stream_utterances", endpoint=stream_utterances, methods=["POST"])
 app.add_api_route("/get_artefact", endpoint=get_artifact, methods=["POST"])
+app.add_api_route("/get_artefact_rows", endpoint=get_artifact_rows, methods=["POST"])
 app.add_api_route("/get_image", endpoint=get_image, methods=["POST"])
 app.add_api_route(
     "/get_query_suggestions", endpoint=get_query_suggestions, methods=["POST"]
 )
 app.add_api_route("/get_agents_config", endpoint=get_agents_config, methods=["GET"])
 app.add_api_route("/upload_file_to_rag", endpoint=upload_file_to_rag, methods=["POST"])
+app.add_api_route(
+    "/get_ingestion_job_status", endpoint=get_ingestion_job_status, methods=["POST"]
+)
+app.add_api_route("/get_ingestion_jobs", endpoint=get_ingestion_jobs, methods=["GET"])
+app.add_api_route(
+    "/get_deduplication_reports", endpoint=get_deduplication_reports, methods=["GET"]
+)
 app.add_api_route(
     "/update_rag_description", endpoint=update_rag_source_description, methods=["POST"]
 )
@@ -50,6 +66,9 @@ app.add_api_route(
 app.add_api_route("/get_stream_status", endpoint=get_stream_status, methods=["POST"])
 app.add_api_route("/submit_user_response", endpoint=submit_user_response, methods=["POST"])
 app.add_api_route("/save_feedback", endpoint=save_feedback, methods=["POST"])
+app.add_api_route("/metrics", endpoint=get_metrics, methods=["GET"])
+app.add_api_route("/ready", endpoint=get_readiness, methods=["GET"])
+app.add_api_websocket_route("/session", endpoint=websocket_session)
 
 
 def run_server(host: str, port: int):
@@ -77,6 +96,9 @@ def run_server(host: str, port: int):
 
     os.environ["YAAF_API_PORT"] = str(port)
 
+    # Load indexes and models in the background while the server already answers
+    start_warmup()
+
     # Configure uvicorn to use our logging setup
     uvicorn.run(
         app,
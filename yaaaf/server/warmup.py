@@ -0,0 +1,97 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+_logger = logging.getLogger(__name__)
+
+
+class WarmupTask:
+    """A shared resource loaded in the background when the server starts."""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+    def __init__(self, name: str, load: Callable[[], object]):
+        self.name: str = name
+        self.status: str = WarmupTask.PENDING
+        self.error: Optional[str] = None
+        self.seconds: Optional[float] = None
+        self._load = load
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (WarmupTask.COMPLETED, WarmupTask.FAILED)
+
+    def run(self):
+        self.status = WarmupTask.RUNNING
+        started = time.perf_counter()
+        try:
+            self._load()
+            self.status = WarmupTask.COMPLETED
+        except Exception as e:
+            # The resource is loaded again on first use, where the error reaches the user
+            self.status = WarmupTask.FAILED
+            self.error = str(e)
+            _logger.warning(f"Warm-up of {self.name} failed: {e}")
+        finally:
+            self.seconds = time.perf_counter() - started
+
+
+class Warmup:
+    """Runs the warm-up tasks concurrently; ready once every task has finished."""
+
+    def __init__(self, tasks: Dict[str, Callable[[], object]], max_workers: int = 4):
+        self.tasks: List[WarmupTask] = [WarmupTask(name, load) for name, load in tasks.items()]
+        self._max_workers = max(1, min(max_workers, len(self.tasks)))
+        self._done = threading.Event()
+        if not self.tasks:
+            self._done.set()
+
+    @property
+    def is_ready(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def start(self):
+        if self.tasks:
+            threading.Thread(target=self._run, name="yaaaf-warmup", daemon=True).start()
+
+    def _run(self):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(
+            max_workers=self._max_workers, thread_name_prefix="yaaaf-warmup"
+        ) as executor:
+            for task in self.tasks:
+                executor.submit(task.run)
+        failed = [task.name for task in self.tasks if task.status == WarmupTask.FAILED]
+        _logger.info(
+            f"Warm-up of {len(self.tasks)} resources finished in {time.perf_counter() - started:.1f}s"
+            + (f" ({len(failed)} failed: {', '.join(failed)})" if failed else "")
+        )
+        self._done.set()
+
+
+_warmup: Optional[Warmup] = None
+
+
+def start_warmup() -> Warmup:
+    """Load the shared indexes and models of the configured sources in the background."""
+    global _warmup
+
+    from yaaaf.components.orchestrator_builder import OrchestratorBuilder
+    from yaaaf.server.config import get_config
+
+    _warmup = Warmup(OrchestratorBuilder(get_config()).get_warmup_tasks())
+    _logger.info(f"Warming up {', '.join(task.name for task in _warmup.tasks)}")
+    _warmup.start()
+    return _warmup
+
+
+def get_warmup() -> Optional[Warmup]:
+    return _warmup
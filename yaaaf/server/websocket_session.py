@@ -0,0 +1,265 @@
+"""A single WebSocket per client session, multiplexing many streams.
+
+The client sends JSON messages with a ``type`` field:
+
+* ``create_stream``: same fields as ``/create_stream``; starts the stream and subscribes to it
+* ``subscribe``: follow an existing stream, optionally from ``from_index``; unknown streams are an error
+* ``unsubscribe``: stop following a stream
+* ``user_response``: reply to a stream paused by the UserInputAgent and resume it
+* ``ping``: answered with ``pong``
+
+The server answers with ``note``, ``status``, ``paused``, ``completed``,
+``ack``, ``error`` and ``pong`` messages, each tagged with its ``stream_id``.
+A message that is not valid JSON or fails to be handled is answered with an
+``error`` and the session stays open.
+
+Outgoing messages go through a bounded queue drained by a single sender.
+When a client reads slowly the queue fills up and the per-stream pumps wait
+instead of buffering without limit; notes stay in the stream's note list and
+are picked up once the client catches up.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from fastapi import WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+
+from yaaaf.components import metrics
+from yaaaf.components.data_types import Messages
+from yaaaf.server.accessories import (
+    get_paused_state,
+    get_stream_status,
+    get_utterances,
+    stream_exists,
+)
+from yaaaf.server.config import get_config
+from yaaaf.server.routes import (
+    CreateStreamArguments,
+    is_terminal_note,
+    resume_stream,
+    serialize_note,
+    start_stream,
+)
+
+_logger = logging.getLogger(__name__)
+
+POLL_INTERVAL_SECONDS = 0.25
+
+
+class WebSocketSession:
+    """Serves the streams followed by one WebSocket connection."""
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        send_queue_size: int = 256,
+        poll_interval: float = POLL_INTERVAL_SECONDS,
+    ):
+        self._websocket = websocket
+        self._outbox: asyncio.Queue = asyncio.Queue(maxsize=max(1, send_queue_size))
+        self._poll_interval = poll_interval
+        self._pumps: Dict[str, asyncio.Task] = {}
+        self._cursors: Dict[str, int] = {}  # stream_id -> index of the next note to send
+
+    async def run(self):
+        """Accept the connection and serve it until the client disconnects."""
+        await self._websocket.accept()
+        metrics.WEBSOCKET_SESSIONS.inc()
+        sender = asyncio.create_task(self._send_loop())
+        try:
+            while True:
+                try:
+                    message = await self._websocket.receive_json()
+                except (ValueError, KeyError) as e:
+                    # Invalid JSON, or a binary frame
+                    await self._send_error(None, f"Messages must be JSON text: {e}")
+                    continue
+                try:
+                    await self._handle(message)
+                except Exception as e:
+                    _logger.error(f"WebSocket: Failed to handle a message: {e}")
+                    await self._send_error(None, f"Failed to handle the message: {str(e)}")
+        except WebSocketDisconnect:
+            _logger.info("WebSocket session closed by client")
+        except Exception as e:
+            _logger.error(f"WebSocket: Session closed after an error: {e}")
+        finally:
+            for pump in self._pumps.values():
+                pump.cancel()
+            sender.cancel()
+            metrics.WEBSOCKET_SESSIONS.dec()
+
+    async def send(self, message: Dict[str, Any]):
+        """Queue a message for the client, waiting while the queue is full."""
+        await self._outbox.put(message)
+
+    async def _send_loop(self):
+        while True:
+            message = await self._outbox.get()
+            try:
+                await self._websocket.send_json(message)
+            except (WebSocketDisconnect, RuntimeError):
+                return
+
+    async def _handle(self, message: Any):
+        if not isinstance(message, dict):
+            await self._send_error(None, "Messages must be JSON objects")
+            return
+
+        message_type = message.get("type")
+        stream_id = message.get("stream_id")
+        try:
+            if message_type == "ping":
+                await self.send({"type": "pong"})
+            elif message_type == "create_stream":
+                await self._create_stream(message)
+            elif message_type == "subscribe":
+                self._require_stream_id(stream_id)
+                self._require_existing_stream(stream_id)
+                self.subscribe(stream_id, from_index=message.get("from_index"))
+                await self.send({"type": "ack", "request": "subscribe", "stream_id": stream_id})
+            elif message_type == "unsubscribe":
+                self._require_stream_id(stream_id)
+                self.unsubscribe(stream_id)
+                await self.send({"type": "ack", "request": "unsubscribe", "stream_id": stream_id})
+            elif message_type == "user_response":
+                await self._submit_user_response(stream_id, message.get("user_response"))
+            else:
+                await self._send_error(stream_id, f"Unknown message type: {message_type}")
+        except (ValueError, ValidationError) as e:
+            await self._send_error(stream_id, str(e))
+        except Exception as e:
+            _logger.error(f"WebSocket: Failed to handle '{message_type}' for {stream_id}: {e}")
+            await self._send_error(stream_id, f"Failed to handle '{message_type}': {str(e)}")
+
+    @staticmethod
+    def _require_stream_id(stream_id: Optional[str]):
+        if not stream_id:
+            raise ValueError("Missing stream_id")
+
+    @staticmethod
+    def _require_existing_stream(stream_id: str):
+        if not stream_exists(stream_id):
+            raise ValueError(f"Stream {stream_id} does not exist")
+
+    async def _send_error(self, stream_id: Optional[str], error: str):
+        await self.send({"type": "error", "stream_id": stream_id, "error": error})
+
+    async def _create_stream(self, message: Dict[str, Any]):
+        arguments = CreateStreamArguments(
+            **{key: value for key, value in message.items() if key != "type"}
+        )
+        start_stream(
+            arguments.stream_id,
+            Messages(utterances=arguments.messages),
+            env_path=arguments.env_path,
+            working_dir=arguments.working_dir,
+        )
+        self.subscribe(arguments.stream_id, from_index=0)
+        await self.send(
+            {"type": "ack", "request": "create_stream", "stream_id": arguments.stream_id}
+        )
+
+    async def _submit_user_response(self, stream_id: Optional[str], user_response: Any):
+        self._require_stream_id(stream_id)
+        if not isinstance(user_response, str) or not user_response:
+            raise ValueError("Missing user_response")
+        if not get_paused_state(stream_id):
+            raise ValueError(f"No paused execution found for stream {stream_id}")
+
+        resume_stream(stream_id, user_response)
+        # The pump stopped at the pause; follow the resumed execution from there
+        self.subscribe(stream_id)
+        await self.send({"type": "ack", "request": "user_response", "stream_id": stream_id})
+
+    def subscribe(self, stream_id: str, from_index: Optional[int] = None):
+        """Start (or restart) forwarding a stream's notes to the client."""
+        self.unsubscribe(stream_id, keep_cursor=True)
+        if from_index is not None:
+            self._cursors[stream_id] = max(0, int(from_index))
+        self._cursors.setdefault(stream_id, 0)
+        self._pumps[stream_id] = asyncio.create_task(self._pump(stream_id))
+
+    def unsubscribe(self, stream_id: str, keep_cursor: bool = False):
+        pump = self._pumps.pop(stream_id, None)
+        if pump is not None:
+            pump.cancel()
+        if not keep_cursor:
+            self._cursors.pop(stream_id, None)
+
+    async def _pump(self, stream_id: str):
+        """Forward new notes and status changes of one stream until it completes or pauses."""
+        last_status = None
+        try:
+            while True:
+                status = get_stream_status(stream_id)
+                if status is None:
+                    if not stream_exists(stream_id):
+                        # Never started, or building its orchestrator failed
+                        await self._send_error(stream_id, f"Stream {stream_id} does not exist")
+                        return
+                    # The orchestrator is still being built
+                    await asyncio.sleep(self._poll_interval)
+                    continue
+
+                notes = get_utterances(stream_id)
+                while self._cursors[stream_id] < len(notes):
+                    index = self._cursors[stream_id]
+                    note = notes[index]
+                    self._cursors[stream_id] = index + 1
+                    if getattr(note, "internal", False):
+                        continue
+
+                    await self.send(
+                        {"type": "note", "stream_id": stream_id, "index": index, **serialize_note(note)}
+                    )
+                    if is_terminal_note(note):
+                        await self._send_end_of_stream(stream_id, note.message)
+                        return
+
+                current_status = (status.goal, status.current_agent, status.is_active)
+                if current_status != last_status:
+                    last_status = current_status
+                    await self.send(
+                        {
+                            "type": "status",
+                            "stream_id": stream_id,
+                            "goal": status.goal,
+                            "current_agent": status.current_agent,
+                            "is_active": status.is_active,
+                        }
+                    )
+
+                await asyncio.sleep(self._poll_interval)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            _logger.error(f"WebSocket: Error while streaming {stream_id}: {e}")
+            await self._send_error(stream_id, f"Stream error: {str(e)}")
+        finally:
+            if self._pumps.get(stream_id) is asyncio.current_task():
+                del self._pumps[stream_id]
+
+    async def _send_end_of_stream(self, stream_id: str, final_message: str):
+        if "<taskpaused/>" not in final_message.lower():
+            await self.send({"type": "completed", "stream_id": stream_id})
+            return
+
+        paused_state = get_paused_state(stream_id)
+        await self.send(
+            {
+                "type": "paused",
+                "stream_id": stream_id,
+                "question": paused_state.question_asked if paused_state else "",
+            }
+        )
+
+
+async def websocket_session(websocket: WebSocket):
+    """WebSocket endpoint carrying all streams of one client session"""
+    session = WebSocketSession(
+        websocket, send_queue_size=get_config().websocket_send_queue_size
+    )
+    await session.run()